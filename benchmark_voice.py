@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+语音链路性能测试脚本
+使用虚拟音频设备，在没有声卡的机器上测量 录音→STT→智能体→TTS 各阶段延迟
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _summarize(rows, keys):
+    """打印各阶段的平均值与最大值"""
+    print("\n" + "=" * 60)
+    print("📊 延迟汇总 (毫秒)")
+    print("=" * 60)
+    for key in keys:
+        values = [row[key] for row in rows if key in row]
+        if values:
+            print(f"   {key:<12} 平均 {sum(values) / len(values):8.1f}   最大 {max(values):8.1f}")
+
+
+def run_pipeline(args):
+    """回放音频文件，逐轮测量完整语音链路的延迟"""
+    from voice.voice_session import create_voice_session
+
+    def echo(text: str) -> str:
+        return f"你说了: {text}"
+
+    session = create_voice_session(
+        stt_engine=args.stt,
+        tts_engine=args.tts,
+        process_message=echo,
+        stt_config={"model_name": args.model, "precision": args.precision} if args.stt == "whisper" else {},
+        audio_source=args.source,
+        realtime=args.realtime,
+        virtual_player=True,
+        streaming_stt=args.streaming
+    )
+
+    rows = []
+    for turn in range(args.turns):
+        started = time.perf_counter()
+        user_text, response = session.single_interaction()
+        timings = dict(session.last_timings)
+        timings["total_ms"] = (time.perf_counter() - started) * 1000
+        rows.append(timings)
+        print(f"[{turn + 1}/{args.turns}] {user_text!r} -> "
+              + ", ".join(f"{k}={v:.0f}" for k, v in timings.items()))
+
+    _summarize(rows, ["record_ms", "stt_ms", "agent_ms", "tts_ms", "total_ms"])
+    print(f"\n🔊 捕获的 TTS 音频: {session.player.played_seconds:.1f} 秒")
+
+
+def run_batch(args):
+    """比较逐段转录与批量转录的吞吐量"""
+    from voice.stt import get_stt_engine
+    from voice.virtual_audio import load_clips
+
+    clips = load_clips(args.source, 16000)
+    clips = (clips * (args.items // len(clips) + 1))[:args.items]
+    if args.stt == "whisper":
+        stt = get_stt_engine(args.stt, model_name=args.model, precision=args.precision)
+    else:
+        stt = get_stt_engine(args.stt)
+    audio_seconds = sum(clip.duration for clip in clips)
+
+    started = time.perf_counter()
+    for clip in clips:
+        stt.transcribe_pcm(clip)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for offset in range(0, len(clips), args.batch):
+        stt.transcribe_batch(clips[offset:offset + args.batch])
+    batched = time.perf_counter() - started
+
+    print(f"\n📊 {len(clips)} 段音频，共 {audio_seconds:.1f} 秒")
+    print(f"   逐段转录   {sequential:7.2f} 秒   {audio_seconds / sequential:6.1f}x 实时")
+    print(f"   批量 ({args.batch:>2})  {batched:7.2f} 秒   {audio_seconds / batched:6.1f}x 实时")
+
+
+def _char_error_rate(reference: str, hypothesis: str) -> float:
+    """字错误率：忽略空白与标点后的编辑距离除以参考文本长度"""
+    import unicodedata
+
+    def normalize(text):
+        return [c for c in text.lower() if not c.isspace() and not unicodedata.category(c).startswith("P")]
+
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_audio_ctx(args):
+    """比较完整 30 秒上下文与短句模式（截断音频上下文）的准确率和延迟"""
+    from voice.stt import WhisperSTT, load_wav_audio
+
+    source = Path(args.source)
+    paths = sorted(source.glob("*.wav")) if source.is_dir() else [source]
+    full = WhisperSTT(model_name=args.model, language=args.language)
+    short = WhisperSTT(model_name=args.model, language=args.language, short_utterance=True,
+                       ctx_margin_ms=args.margin)
+
+    rows = []
+    for path in paths:
+        audio = load_wav_audio(str(path))
+        if audio is None:
+            continue
+        reference_path = path.with_suffix(".txt")
+        row = {"audio_s": len(audio) / 16000}
+        for name, engine in (("full", full), ("short", short)):
+            started = time.perf_counter()
+            row[name] = engine.transcribe_pcm(audio, 16000)
+            row[f"{name}_ms"] = (time.perf_counter() - started) * 1000
+        # 没有参考文本时以完整上下文的结果为参考
+        reference = reference_path.read_text(encoding="utf-8").strip() if reference_path.exists() else row["full"]
+        row["full_cer"] = _char_error_rate(reference, row["full"])
+        row["short_cer"] = _char_error_rate(reference, row["short"])
+        rows.append(row)
+        print(f"{path.name}: {row['audio_s']:.1f}s  完整 {row['full_ms']:.0f}ms {row['full']!r}  "
+              f"短句 {row['short_ms']:.0f}ms {row['short']!r}")
+
+    if not rows:
+        print("❌ 没有可用的 WAV 文件")
+        return
+    _summarize(rows, ["full_ms", "short_ms"])
+    for key in ("full_cer", "short_cer"):
+        print(f"   {key:<12} 平均 {sum(row[key] for row in rows) / len(rows):8.3f}")
+
+
+def run_threads(args):
+    """扫描 PyTorch 线程数，报告每个设置下的实时率，找出不再明显提速的最小线程数"""
+    import torch
+    from concurrent.futures import ThreadPoolExecutor
+    from voice.cpu_budget import available_cpus, apply_thread_budget, parse_cpus
+    from voice.stt import WhisperSTT
+    from voice.virtual_audio import load_clips
+
+    cpus = parse_cpus(args.cpus) if args.cpus else available_cpus()
+    apply_thread_budget(interop_threads=1, cpus=cpus)
+    if args.counts:
+        counts = [int(count) for count in args.counts.split(",")]
+    else:
+        counts = sorted({min(2 ** i, len(cpus)) for i in range(len(cpus).bit_length() + 1)})
+
+    clips = load_clips(args.source, 16000)[:args.items]
+    stt = WhisperSTT(model_name=args.model, precision=args.precision, short_utterance=True)
+    stt.transcribe_pcm(clips[0])
+
+    def transcribe(clip):
+        started = time.perf_counter()
+        stt.transcribe_pcm(clip)
+        return (time.perf_counter() - started) / clip.duration
+
+    print(f"\n📊 {len(clips)} 段音频，{args.sessions} 个并发会话，CPU {cpus}")
+    results = []
+    for count in counts:
+        torch.set_num_threads(count)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+            rtfs = list(executor.map(transcribe, clips * args.sessions))
+        wall = time.perf_counter() - started
+        rtf = sum(rtfs) / len(rtfs)
+        throughput = sum(clip.duration for clip in clips) * args.sessions / wall
+        results.append((count, rtf))
+        print(f"   线程 {count:>3}   平均 RTF {rtf:6.3f}   最大 RTF {max(rtfs):6.3f}   吞吐 {throughput:6.1f}x 实时")
+
+    best_rtf = min(rtf for _, rtf in results)
+    suggested = min(count for count, rtf in results if rtf <= best_rtf * 1.1)
+    print(f"\n✅ 建议线程数: {suggested}（与最快设置相差不超过 10%）")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="语音链路性能测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = subparsers.add_parser("pipeline", help="完整语音链路延迟")
+    pipeline.add_argument("--source", required=True, help="WAV 文件或包含 WAV 的目录")
+    pipeline.add_argument("--turns", type=int, default=5, help="测试轮数")
+    pipeline.add_argument("--stt", default="whisper", help="STT 引擎 (whisper/mock)")
+    pipeline.add_argument("--tts", default="mock", help="TTS 引擎 (auto/pyttsx3/system/mock)")
+    pipeline.add_argument("--model", default="tiny", help="Whisper 模型 (tiny/base/small)")
+    pipeline.add_argument("--precision", default="fp32", choices=["fp32", "int8"], help="Whisper 推理精度")
+    pipeline.add_argument("--realtime", action="store_true", help="按真实时间节奏回放音频")
+    pipeline.add_argument("--streaming", action="store_true", help="边录音边转录（配合 --realtime 才能体现收益）")
+    pipeline.set_defaults(func=run_pipeline)
+
+    batch = subparsers.add_parser("batch", help="逐段与批量转录的吞吐量对比")
+    batch.add_argument("--source", required=True, help="WAV 文件或包含 WAV 的目录")
+    batch.add_argument("--items", type=int, default=16, help="转录的音频段数")
+    batch.add_argument("--batch", type=int, default=8, help="每批段数")
+    batch.add_argument("--stt", default="whisper", help="STT 引擎 (whisper/mock)")
+    batch.add_argument("--model", default="tiny", help="Whisper 模型 (tiny/base/small)")
+    batch.add_argument("--precision", default="fp32", choices=["fp32", "int8"], help="Whisper 推理精度")
+    batch.set_defaults(func=run_batch)
+
+    audio_ctx = subparsers.add_parser("audio-ctx", help="完整上下文与短句模式的准确率/延迟对比")
+    audio_ctx.add_argument("--source", required=True, help="WAV 文件或目录（同名 .txt 为参考文本，可选）")
+    audio_ctx.add_argument("--model", default="tiny", help="Whisper 模型 (tiny/base/small)")
+    audio_ctx.add_argument("--language", default="zh", help="识别语言")
+    audio_ctx.add_argument("--margin", type=float, default=1000.0, help="截断上下文时保留的余量（毫秒）")
+    audio_ctx.set_defaults(func=run_audio_ctx)
+
+    threads = subparsers.add_parser("threads", help="扫描 STT 推理线程数，报告各设置的实时率")
+    threads.add_argument("--source", required=True, help="WAV 文件或包含 WAV 的目录")
+    threads.add_argument("--items", type=int, default=8, help="每个设置转录的音频段数")
+    threads.add_argument("--model", default="tiny", help="Whisper 模型 (tiny/base/small)")
+    threads.add_argument("--precision", default="fp32", choices=["fp32", "int8"], help="Whisper 推理精度")
+    threads.add_argument("--counts", help="逗号分隔的线程数，默认按 2 的幂扫描到可用核心数")
+    threads.add_argument("--sessions", type=int, default=1, help="并发会话数，模拟多会话负载")
+    threads.add_argument("--cpus", help="限定使用的 CPU（如 0-3），默认全部")
+    threads.set_defaults(func=run_threads)
+
+    args = parser.parse_args()
+
+    # 切换到脚本目录
+    os.chdir(Path(__file__).parent)
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
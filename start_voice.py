@@ -72,15 +72,22 @@ def choose_interaction_mode():
     
     return "text"
 
-def start_voice_mode():
-    """启动语音模式"""
+def start_voice_mode(barge_in: bool = False, model: str = "auto", latency_budget_ms: float = 1500.0):
+    """
+    启动语音模式
+    
+    Args:
+        barge_in: 是否允许在助手说话时直接插话打断
+        model: Whisper 模型；auto 时按实时率在 tiny/base/small 之间自动切换
+        latency_budget_ms: auto 模式下每句话转录耗时的预算（毫秒）
+    """
     print("\n🎙️  启动语音模式...")
     
     # 导入必要的模块
     import autogen
     from config import load_llm_config, load_executor_config, load_summarizer_config, load_planner_config
     from tools import search_web, search_duckduckgo, search_wikipedia, search_news, extract_webpage_content, get_exchange_rate, get_weather
-    from voice.voice_session import VoiceSession
+    from voice.voice_session import VoiceSession, SYSTEM_PROMPTS
     from voice import get_stt_engine, get_tts_engine, get_audio_recorder, get_audio_player
     
     try:
@@ -182,8 +189,13 @@ def start_voice_mode():
         
         # 创建语音组件
         print("正在加载语音组件...")
-        stt = get_stt_engine("whisper", model_name="tiny", language="zh")
-        tts = get_tts_engine("system")  # macOS 使用系统 TTS
+        if model == "auto":
+            stt = get_stt_engine("adaptive", latency_budget_ms=latency_budget_ms,
+                                 language="zh", short_utterance=True)
+        else:
+            stt = get_stt_engine("whisper", model_name=model, language="zh", short_utterance=True)
+        # macOS 使用系统 TTS；固定提示语在加载模型期间提前合成
+        tts = get_tts_engine("system", cache_size=64, prewarm=SYSTEM_PROMPTS)
         recorder = get_audio_recorder()
         player = get_audio_player()
         
@@ -219,7 +231,7 @@ def start_voice_mode():
                 return f"处理过程中出现错误: {str(e)}"
         
         # 创建语音会话
-        session = VoiceSession(stt, tts, recorder, player, process_message)
+        session = VoiceSession(stt, tts, recorder, player, process_message, barge_in=barge_in)
         
         # 开始对话
         session.start_conversation()
@@ -383,7 +395,9 @@ def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="支持语音的多智能体助手")
     parser.add_argument("--mode", choices=["text", "voice"], help="指定交互模式")
-    parser.add_argument("--model", default="tiny", help="Whisper 模型 (tiny/base/small)")
+    parser.add_argument("--model", default="auto", help="Whisper 模型 (auto/tiny/base/small)，auto 按负载自动切换")
+    parser.add_argument("--latency-budget", type=float, default=1500.0, help="auto 模式下每句话转录耗时的预算（毫秒）")
+    parser.add_argument("--barge-in", action="store_true", help="允许在助手说话时直接插话打断")
     
     args = parser.parse_args()
     
@@ -403,9 +417,10 @@ def main():
     
     # 启动相应模式
     if mode == "voice":
-        # 设置 Whisper 模型
-        os.environ["WHISPER_MODEL"] = args.model
-        start_voice_mode()
+        # 在导入 autogen、创建智能体的同时于后台加载并预热 Whisper（auto 从 tiny 起步）
+        from voice.model_registry import preload_model
+        preload_model("tiny" if args.model == "auto" else args.model, language="zh")
+        start_voice_mode(barge_in=args.barge_in, model=args.model, latency_budget_ms=args.latency_budget)
     else:
         start_text_mode()
 
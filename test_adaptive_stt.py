@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+单元测试：按实时率自适应切换 STT 档位
+"""
+
+import unittest
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.adaptive_stt import AdaptiveSTT, build_ladder
+from voice.stt import STTBase
+
+
+class _TierSTT(STTBase):
+    """返回档位名称的引擎"""
+
+    def __init__(self, tier, loaded=True):
+        self.tier = tier
+        self.ready = threading.Event()
+        if loaded:
+            self.ready.set()
+
+    def transcribe_file(self, audio_path):
+        return self.tier.label
+
+    def transcribe_bytes(self, audio_bytes):
+        return self.tier.label
+
+    def transcribe_pcm(self, pcm, sample_rate=None):
+        # 与 WhisperSTT 相同：模型还在加载时先等待
+        self.ready.wait()
+        return self.tier.label
+
+
+def _adaptive(levels=4, budget_ms=1000.0, patience=2, loaded=True):
+    ladder = build_ladder(("tiny", "base"))[:levels]
+    engines = []
+
+    def factory(tier):
+        engines.append(_TierSTT(tier, loaded))
+        return engines[-1]
+
+    stt = AdaptiveSTT(ladder, latency_budget_ms=budget_ms, patience=patience, engine_factory=factory)
+    return stt, engines
+
+
+class TestDecodeTier(unittest.TestCase):
+    """测试档位序列"""
+
+    def test_ladder_ordered_by_cost(self):
+        """测试档位从快到准排列"""
+        ladder = build_ladder(("tiny", "base", "small"))
+        self.assertEqual(len(ladder), 6)
+        costs = [tier.cost for tier in ladder]
+        self.assertEqual(costs, sorted(costs))
+        self.assertEqual(ladder[1].label, "tiny/beam5+fallback")
+
+
+class TestAdaptiveSTT(unittest.TestCase):
+    """测试升降档策略"""
+
+    def test_steps_up_when_idle(self):
+        """测试连续几句都有余量时升档"""
+        stt, _ = _adaptive(patience=2)
+        stt.observe(0, 3.0, 0.1)
+        self.assertEqual(stt.level, 0)
+        stt.observe(0, 3.0, 0.1)
+        self.assertEqual(stt.level, 1)
+
+    def test_steps_down_over_budget(self):
+        """测试超出预算时立即降到预计能满足预算的档位"""
+        stt, _ = _adaptive(patience=1)
+        for level in range(3):
+            stt.observe(level, 3.0, 0.05)
+        self.assertEqual(stt.level, 3)
+
+        # 负载突增：当前档位 2 秒才转完 3 秒音频
+        stt.observe(3, 3.0, 2.0)
+        self.assertLess(stt.level, 3)
+        self.assertLessEqual(stt.estimated_rtf(stt.level) * 3.0, 1.0)
+
+    def test_no_upgrade_without_headroom(self):
+        """测试预计升档后超出预算比例时保持当前档位"""
+        stt, _ = _adaptive(patience=1, budget_ms=1000.0)
+        for _ in range(5):
+            stt.observe(0, 3.0, 0.5)
+        self.assertEqual(stt.level, 0)
+
+    def test_waits_for_model_load(self):
+        """测试更大的模型还在加载时先不切换"""
+        stt, engines = _adaptive(patience=1, loaded=False)
+        stt.observe(0, 3.0, 0.05)
+        self.assertEqual(stt.level, 0)
+        self.assertEqual(len(engines), 2)
+
+        engines[1].ready.set()
+        stt.observe(0, 3.0, 0.05)
+        self.assertEqual(stt.level, 1)
+
+    def test_transcribe_uses_current_tier(self):
+        """测试转录使用当前档位的引擎并记录实时率"""
+        stt, _ = _adaptive()
+        text = stt.transcribe_pcm(np.zeros(16000, dtype=np.int16), 16000)
+        self.assertEqual(text, "tiny/greedy")
+        self.assertEqual(stt.get_stats()["utterances"], 1)
+        self.assertEqual(stt.transcribe_pcm(np.zeros(0, dtype=np.int16), 16000), "")
+
+    def test_load_wait_not_timed(self):
+        """测试首次使用档位时等待模型加载的时间不计入实时率"""
+        stt, engines = _adaptive(loaded=False)
+        threading.Timer(0.3, engines[0].ready.set).start()
+        stt.transcribe_pcm(np.zeros(16000, dtype=np.int16), 16000)
+        self.assertLess(stt.last_rtf, 0.1)
+
+        engines[0].ready.clear()
+        threading.Timer(0.3, engines[0].ready.set).start()
+        stt.transcribe_batch([np.zeros(16000, dtype=np.int16)], 16000)
+        self.assertLess(stt.last_rtf, 0.1)
+
+    def test_stale_observation_ignored_for_switching(self):
+        """测试切换前开始的转录结果只更新实时率，不再触发切换"""
+        stt, _ = _adaptive(patience=1)
+        stt.observe(0, 3.0, 0.05)
+        self.assertEqual(stt.level, 1)
+        stt.observe(0, 3.0, 5.0)
+        self.assertEqual(stt.level, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+单元测试：异步语音识别
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.async_stt import STTExecutor
+from voice.stt import MockSTT, STTBase
+
+RATE = 16000
+FRAME = 320
+
+
+class _SlowSTT(STTBase):
+    """转录耗时固定、记录调用的引擎"""
+
+    def __init__(self, delay=0.05, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.calls = []
+
+    def transcribe_file(self, audio_path):
+        return ""
+
+    def transcribe_bytes(self, audio_bytes):
+        return ""
+
+    def transcribe_pcm(self, pcm, sample_rate=None):
+        self.calls.append(len(pcm))
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        return f"{len(pcm)}"
+
+
+class _ScriptedSTT(MockSTT):
+    """流式解码时逐次返回更长的假设"""
+
+    def __init__(self):
+        self.passes = 0
+        self.threads = set()
+
+    def decode_window(self, audio, prompt=""):
+        self.passes += 1
+        self.threads.add(threading.current_thread().name)
+        words = ["今", "天", "天", "气", "不", "错"]
+        return "".join(words[:min(len(words), self.passes + 1)]), []
+
+    def start_stream(self, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        return super().start_stream(**kwargs)
+
+
+async def _frames(seconds, delay=0.0):
+    for _ in range(int(seconds * RATE / FRAME)):
+        if delay:
+            await asyncio.sleep(delay)
+        yield np.zeros(FRAME, dtype=np.int16)
+
+
+class TestTranscribeAsync(unittest.TestCase):
+    """测试异步转录"""
+
+    def test_transcribe(self):
+        """测试异步转录返回与同步接口相同的结果"""
+        executor = STTExecutor()
+        text = asyncio.run(MockSTT().transcribe_async(np.zeros(1600, dtype=np.int16), 16000, executor=executor))
+        self.assertEqual(text, "这是模拟的语音识别结果")
+        self.assertEqual(executor.get_stats()["completed"], 1)
+        executor.shutdown()
+
+    def test_bounded_concurrency(self):
+        """测试同时执行的转录数不超过上限"""
+        executor = STTExecutor(max_concurrency=2)
+        stt = _SlowSTT(delay=0.05)
+
+        async def main():
+            return await asyncio.gather(*[
+                stt.transcribe_async(np.zeros(100 + i, dtype=np.int16), 16000, executor=executor)
+                for i in range(5)
+            ])
+
+        self.assertEqual(asyncio.run(main()), [str(100 + i) for i in range(5)])
+        self.assertEqual(executor.get_stats()["peak_running"], 2)
+        executor.shutdown()
+
+    def test_event_loop_not_blocked(self):
+        """测试转录期间事件循环仍在运行其他协程"""
+        executor = STTExecutor()
+        stt = _SlowSTT(delay=0.2)
+
+        async def main():
+            ticks = 0
+            task = asyncio.ensure_future(stt.transcribe_async(np.zeros(10, dtype=np.int16), executor=executor))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks
+
+        self.assertGreater(asyncio.run(main()), 5)
+        executor.shutdown()
+
+    def test_cancel_queued_request(self):
+        """测试取消排队中的转录时引擎不会再执行它"""
+        executor = STTExecutor(max_concurrency=1)
+        gate = threading.Event()
+        stt = _SlowSTT(delay=0.0, gate=gate)
+
+        async def main():
+            first = asyncio.ensure_future(stt.transcribe_async(np.zeros(1, dtype=np.int16), executor=executor))
+            second = asyncio.ensure_future(stt.transcribe_async(np.zeros(2, dtype=np.int16), executor=executor))
+            await asyncio.sleep(0.05)
+            second.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await second
+            gate.set()
+            return await first
+
+        self.assertEqual(asyncio.run(main()), "1")
+        self.assertEqual(stt.calls, [1])
+        self.assertEqual(executor.get_stats()["cancelled"], 1)
+        executor.shutdown()
+
+
+class TestStreamAsync(unittest.TestCase):
+    """测试异步流式转录"""
+
+    def _collect(self, stt, frames, executor, limit=None):
+        async def main():
+            updates = []
+            async for update in stt.stream_async(frames, executor=executor, step_ms=500):
+                updates.append(update)
+                if limit and len(updates) >= limit:
+                    break
+            return updates
+        return asyncio.run(main())
+
+    def test_stream_updates(self):
+        """测试创建流与解码都在执行器中进行，最后一个结果为定稿"""
+        executor = STTExecutor()
+        stt = _ScriptedSTT()
+        updates = self._collect(stt, _frames(2.0, delay=0.001), executor)
+
+        self.assertGreaterEqual(len(updates), 2)
+        self.assertTrue(updates[-1].final)
+        self.assertFalse(any(update.final for update in updates[:-1]))
+        self.assertTrue(updates[-1].committed)
+        self.assertTrue(all(name.startswith("stt-async") for name in stt.threads))
+        executor.shutdown()
+
+    def test_stream_stops_early(self):
+        """测试提前退出迭代时会话结束，不再解码"""
+        executor = STTExecutor()
+        stt = _ScriptedSTT()
+        updates = self._collect(stt, _frames(3.0, delay=0.001), executor, limit=1)
+
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(updates[0].final)
+        self.assertEqual(stt.passes, 1)
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
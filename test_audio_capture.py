@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+单元测试：流式采集引擎（环形缓冲区与帧订阅）
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.capture import RingBuffer, CaptureEngine
+from voice.devices import AudioDeviceManager
+
+
+class _FakeStream:
+    """模拟的 PortAudio 流"""
+    
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.active = kwargs.get('start', True)
+        self.closed = False
+    
+    def start_stream(self):
+        self.active = True
+    
+    def stop_stream(self):
+        self.active = False
+    
+    def is_stopped(self):
+        return not self.active
+    
+    def close(self):
+        self.closed = True
+
+
+class _FakePyAudio:
+    """模拟的 PyAudio，记录打开的流"""
+    
+    def __init__(self):
+        self.streams = []
+    
+    def open(self, **kwargs):
+        stream = _FakeStream(**kwargs)
+        self.streams.append(stream)
+        return stream
+    
+    def terminate(self):
+        pass
+
+
+class TestRingBuffer(unittest.TestCase):
+    """测试预分配环形缓冲区"""
+    
+    def test_write_and_read(self):
+        """测试按绝对位置读取"""
+        ring = RingBuffer(8)
+        ring.write(np.arange(5, dtype=np.int16))
+        
+        self.assertEqual(ring.total_written, 5)
+        self.assertEqual(ring.read(1, 4).tolist(), [1, 2, 3])
+    
+    def test_wrap_around(self):
+        """测试写满后覆盖最旧的数据"""
+        ring = RingBuffer(8)
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.write(np.arange(6, 12, dtype=np.int16))
+        
+        self.assertEqual(ring.oldest_position, 4)
+        self.assertEqual(ring.read(0).tolist(), list(range(4, 12)))
+        self.assertEqual(ring.latest(3).tolist(), [9, 10, 11])
+    
+    def test_oversized_write(self):
+        """测试单次写入超过容量时只保留最新数据"""
+        ring = RingBuffer(4)
+        ring.write(np.arange(10, dtype=np.int16))
+        
+        self.assertEqual(ring.total_written, 10)
+        self.assertEqual(ring.read(0).tolist(), [6, 7, 8, 9])
+
+
+class TestCaptureEngine(unittest.TestCase):
+    """测试采集回调的帧分发（不依赖真实声卡）"""
+    
+    def _feed(self, engine, values):
+        frame = np.asarray(values, dtype=np.int16).tobytes()
+        engine._callback(frame, len(values), None, 0)
+    
+    def test_frame_size(self):
+        """测试帧长度由 frame_ms 决定"""
+        engine = CaptureEngine(rate=16000, frame_ms=20)
+        self.assertEqual(engine.frame_size, 320)
+        self.assertAlmostEqual(engine.frame_ms, 20.0)
+    
+    def test_subscribers_receive_frames(self):
+        """测试订阅者按顺序收到帧"""
+        engine = CaptureEngine(rate=100, frame_ms=40, buffer_seconds=1.0)
+        with engine.subscribe() as subscription:
+            self._feed(engine, [1, 2, 3, 4])
+            self._feed(engine, [5, 6, 7, 8])
+            
+            self.assertEqual(subscription.get(timeout=0.1).tolist(), [1, 2, 3, 4])
+            self.assertEqual(subscription.get(timeout=0.1).tolist(), [5, 6, 7, 8])
+        
+        self.assertEqual(engine._subscribers, [])
+    
+    def test_preroll(self):
+        """测试订阅时补发环形缓冲区中的历史音频"""
+        engine = CaptureEngine(rate=100, frame_ms=40, buffer_seconds=1.0)
+        self._feed(engine, [1, 2, 3, 4])
+        self._feed(engine, [5, 6, 7, 8])
+        
+        with engine.subscribe(preroll_ms=40) as subscription:
+            self.assertEqual(subscription.get(timeout=0.1).tolist(), [5, 6, 7, 8])
+    
+    def test_slow_consumer_drops_oldest(self):
+        """测试消费者积压时丢弃最旧的帧而不阻塞采集"""
+        engine = CaptureEngine(rate=100, frame_ms=50, buffer_seconds=0.1)
+        subscription = engine.subscribe()
+        for value in range(5):
+            self._feed(engine, [value] * 5)
+        
+        self.assertEqual(subscription.dropped, 3)
+        self.assertEqual(subscription.get(timeout=0.1).tolist(), [3] * 5)
+
+
+
+class TestAudioDeviceManager(unittest.TestCase):
+    """测试共享设备管理器的流复用"""
+    
+    def setUp(self):
+        self.manager = AudioDeviceManager()
+        self.manager._pa = _FakePyAudio()
+    
+    def test_output_stream_reused(self):
+        """测试相同格式的输出流被复用"""
+        first = self.manager.acquire_output(22050, 1)
+        self.manager.release_output(first)
+        second = self.manager.acquire_output(22050, 1)
+        
+        self.assertIs(first, second)
+        self.assertTrue(second.active)
+        self.assertEqual(self.manager.get_stats()["opened"], 1)
+        self.assertEqual(self.manager.get_stats()["reused"], 1)
+    
+    def test_output_stream_keyed_by_format(self):
+        """测试不同采样率使用不同的流"""
+        first = self.manager.acquire_output(22050, 1)
+        self.manager.release_output(first)
+        second = self.manager.acquire_output(16000, 1)
+        
+        self.assertIsNot(first, second)
+    
+    def test_capture_engine_reuses_input(self):
+        """测试采集引擎多次启停复用同一个输入流"""
+        engine = CaptureEngine(self.manager, rate=16000, frame_ms=20)
+        engine.start()
+        pooled = engine._stream
+        engine.stop()
+        engine.start()
+        
+        self.assertIs(engine._stream, pooled)
+        self.assertEqual(len(self.manager._pa.streams), 1)
+        self.assertEqual(pooled.callback, engine._callback)
+        engine.close()
+        self.assertIsNone(pooled.callback)
+    
+    def test_terminate_closes_idle(self):
+        """测试释放时关闭空闲流"""
+        self.manager.prewarm_output(16000)
+        stream = self.manager._pa.streams[0]
+        self.manager.terminate()
+        
+        self.assertTrue(stream.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
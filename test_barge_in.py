@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+单元测试：全双工插话
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.barge_in import BargeInDetector
+from voice.pcm import PCMBuffer
+from voice.playback import OutputMeter
+from voice.stt import MockSTT
+from voice.tts import MockTTS
+from voice.virtual_audio import VirtualAudioRecorder, VirtualAudioPlayer
+from voice.voice_session import VoiceSession
+
+RATE = 16000
+FRAME = 320
+
+
+def _tone(seconds, level=8000, freq=440):
+    """生成正弦音"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (np.sin(2 * np.pi * freq * t) * level).astype(np.int16)
+
+
+class _LongReplyTTS(MockTTS):
+    """返回 3 秒回复音频的模拟 TTS"""
+
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        return PCMBuffer(_tone(3.0, level=3000, freq=220), RATE)
+
+
+class TestBargeInDetector(unittest.TestCase):
+    """测试回声门限"""
+
+    def test_echo_does_not_trigger(self):
+        """测试播放回声（低于播放电平）不会触发插话"""
+        detector = BargeInDetector(rate=RATE)
+        playback = _tone(0.02, level=8000)
+        echo = (playback * 0.4).astype(np.int16)
+        playback_level = float(np.sqrt(np.mean(playback.astype(np.float64) ** 2)))
+
+        for _ in range(100):
+            self.assertFalse(detector.process(echo, playback_level))
+
+    def test_speech_over_playback_triggers(self):
+        """测试明显高于回声的语音在最短时长后触发"""
+        detector = BargeInDetector(rate=RATE, min_speech_ms=200.0)
+        playback_level = 2000.0
+        speech = _tone(0.02, level=12000)
+
+        results = [detector.process(speech, playback_level) for _ in range(12)]
+        self.assertFalse(any(results[:9]))
+        self.assertTrue(results[-1])
+
+    def test_short_burst_ignored(self):
+        """测试短促的声音不会触发"""
+        detector = BargeInDetector(rate=RATE, min_speech_ms=200.0)
+        loud = _tone(0.02, level=12000)
+        quiet = np.zeros(FRAME, dtype=np.int16)
+
+        for _ in range(5):
+            for frame in [loud] * 4 + [quiet]:
+                self.assertFalse(detector.process(frame, 0.0))
+
+    def test_coupling_learned_from_echo(self):
+        """测试回声耦合系数向实际回声比例收敛"""
+        detector = BargeInDetector(rate=RATE, initial_coupling=0.3, coupling_alpha=0.2)
+        playback = _tone(0.02, level=8000)
+        echo = (playback * 0.15).astype(np.int16)
+        level = float(np.sqrt(np.mean(playback.astype(np.float64) ** 2)))
+
+        for _ in range(50):
+            detector.process(echo, level)
+        self.assertAlmostEqual(detector.coupling, 0.15, delta=0.02)
+        self.assertFalse(detector.triggered)
+
+
+class TestOutputMeter(unittest.TestCase):
+    """测试输出电平表"""
+
+    def test_level_tracks_recent_output(self):
+        """测试电平取参考窗口内的最大值"""
+        meter = OutputMeter()
+        self.assertEqual(meter.level(), 0.0)
+        meter.update(_tone(0.05, level=1000))
+        meter.update(_tone(0.05, level=4000))
+        self.assertAlmostEqual(meter.level(), 4000 / np.sqrt(2), delta=50)
+
+
+class TestVoiceSessionBargeIn(unittest.TestCase):
+    """测试语音会话的插话流程"""
+
+    def _session(self, clips):
+        recorder = VirtualAudioRecorder(clips, realtime=True, loop=False,
+                                        lead_silence=0.3, tail_silence=0.8)
+        player = VirtualAudioPlayer(realtime=True)
+        return VoiceSession(MockSTT(), _LongReplyTTS(), recorder, player,
+                            lambda text: "好的", barge_in=True)
+
+    def test_user_speech_stops_playback(self):
+        """测试用户开口后停止播放，并把这句话留给下一轮"""
+        session = self._session([_tone(0.5), _tone(0.8)])
+
+        user_text, response = session.single_interaction()
+
+        self.assertEqual(response, "好的")
+        self.assertEqual(session.barge_ins, 1)
+        self.assertLess(session.player.played_seconds, 1.5)
+        self.assertIsNotNone(session.pending_pcm)
+        self.assertAlmostEqual(session.recorder.last_stats.speech_ms, 800, delta=150)
+
+        # 下一轮直接使用打断时录到的语音，不再录音
+        session.single_interaction()
+        self.assertEqual(session.recorder.remaining, 0)
+
+    def test_no_speech_plays_to_end(self):
+        """测试播放期间没有人说话时完整播放"""
+        session = self._session([_tone(0.5), np.zeros(RATE, dtype=np.int16)])
+
+        session.single_interaction()
+
+        self.assertEqual(session.barge_ins, 0)
+        self.assertIsNone(session.pending_pcm)
+        self.assertAlmostEqual(session.player.played_seconds, 3.0, delta=0.1)
+
+    def test_disabled_without_listen_support(self):
+        """测试不支持监听的录音器会关闭插话模式"""
+        from voice.audio_io import MockAudioRecorder, MockAudioPlayer
+        session = VoiceSession(MockSTT(), MockTTS(), MockAudioRecorder(), MockAudioPlayer(),
+                               lambda text: text, barge_in=True)
+        self.assertFalse(session.barge_in)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+单元测试：批量转录与微批调度
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.audio_io import MockAudioPlayer, MockAudioRecorder
+from voice.batching import BatchingSTT
+from voice.stt import MockSTT, STTBase, Transcript, get_stt_engine
+from voice.tts import MockTTS
+from voice.voice_session import VoiceSession
+
+
+class _BatchRecorder(STTBase):
+    """记录每批大小、按音频长度返回文本的引擎"""
+    
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.batch_sizes = []
+    
+    def transcribe_file(self, audio_path):
+        return ""
+    
+    def transcribe_bytes(self, audio_bytes):
+        return ""
+    
+    def transcribe_batch(self, items, sample_rate=None):
+        self.batch_sizes.append(len(items))
+        time.sleep(self.delay)
+        return [str(len(item)) for item in items]
+    
+    def transcribe_batch_detailed(self, items, sample_rate=None):
+        self.detailed_batches = getattr(self, "detailed_batches", 0) + 1
+        return [Transcript(text, [{"text": text, "no_speech_prob": 0.1, "avg_logprob": -0.3}])
+                for text in self.transcribe_batch(items, sample_rate)]
+    
+    def transcribe_detailed(self, pcm, sample_rate=None):
+        raise AssertionError("应当经过批量解码")
+
+
+class TestTranscribeBatch(unittest.TestCase):
+    """测试默认的批量接口"""
+    
+    def test_default_batch_preserves_order(self):
+        """测试默认实现逐段转录并保持顺序"""
+        texts = MockSTT().transcribe_batch([np.zeros(160, dtype=np.int16)] * 3, 16000)
+        self.assertEqual(texts, ["这是模拟的语音识别结果"] * 3)
+
+
+class TestBatchingSTT(unittest.TestCase):
+    """测试微批调度"""
+    
+    def test_idle_request_not_delayed(self):
+        """测试空闲时单个请求立即执行"""
+        engine = _BatchRecorder(delay=0.0)
+        stt = BatchingSTT(engine, max_wait_ms=500)
+        try:
+            started = time.perf_counter()
+            self.assertEqual(stt.transcribe_pcm(np.zeros(1600, dtype=np.int16)), "1600")
+            self.assertLess(time.perf_counter() - started, 0.2)
+        finally:
+            stt.close()
+    
+    def test_concurrent_requests_batched(self):
+        """测试并发请求被合并，每个请求拿到自己的结果"""
+        engine = _BatchRecorder()
+        stt = BatchingSTT(engine, max_batch=4, max_wait_ms=20)
+        results = {}
+        
+        def worker(n):
+            results[n] = stt.transcribe_pcm(np.zeros(1000 + n, dtype=np.int16))
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stt.close()
+        
+        self.assertEqual(results, {n: str(1000 + n) for n in range(10)})
+        self.assertLessEqual(max(engine.batch_sizes), 4)
+        self.assertLess(len(engine.batch_sizes), 10)
+        self.assertEqual(stt.get_stats()["items"], 10)
+    
+    def test_detailed_requests_batched(self):
+        """测试需要置信度的请求与普通请求一起合批，各自拿到对应类型的结果"""
+        engine = _BatchRecorder()
+        stt = BatchingSTT(engine, max_batch=8, max_wait_ms=50)
+        results = {}
+        
+        def worker(n):
+            audio = np.zeros(1000 + n, dtype=np.int16)
+            results[n] = stt.transcribe_detailed(audio) if n % 2 else stt.transcribe_pcm(audio)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stt.close()
+        
+        for n, result in results.items():
+            if n % 2:
+                self.assertEqual((result.text, result.no_speech_prob), (str(1000 + n), 0.1))
+            else:
+                self.assertEqual(result, str(1000 + n))
+        self.assertLess(len(engine.batch_sizes), 6)
+    
+    def test_gated_session_turn_batched(self):
+        """测试开启语音门控的会话回合经过微批调度（一次批量解码）"""
+        engine = _BatchRecorder(delay=0.0)
+        stt = BatchingSTT(engine)
+        calls = []
+        session = VoiceSession(stt, MockTTS(), MockAudioRecorder(), MockAudioPlayer(),
+                               lambda text: calls.append(text) or "好的")
+        try:
+            user_text, _ = session.single_interaction()
+        finally:
+            stt.close()
+        
+        self.assertIsNotNone(session.speech_gate)
+        self.assertEqual(engine.detailed_batches, 1)
+        self.assertEqual(stt.get_stats()["batches"], 1)
+        self.assertEqual(calls, [user_text])
+    
+    def test_engine_error_fails_batch(self):
+        """测试引擎出错时整批请求都收到异常"""
+        class Broken(_BatchRecorder):
+            def transcribe_batch(self, items, sample_rate=None):
+                raise RuntimeError("解码失败")
+        
+        stt = BatchingSTT(Broken())
+        try:
+            with self.assertRaises(RuntimeError):
+                stt.transcribe_pcm(np.zeros(160, dtype=np.int16))
+        finally:
+            stt.close()
+    
+    def test_factory_wraps_engine(self):
+        """测试 get_stt_engine 的 max_batch 参数"""
+        stt = get_stt_engine("mock", max_batch=4)
+        try:
+            self.assertIsInstance(stt, BatchingSTT)
+            self.assertEqual(stt.transcribe_pcm(np.zeros(160, dtype=np.int16)), "这是模拟的语音识别结果")
+        finally:
+            stt.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+单元测试：CPU 线程预算与绑定
+"""
+
+import unittest
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+from voice.cpu_budget import AFFINITY_AVAILABLE, available_cpus, parse_cpus, pinned, plan_affinity
+
+
+class TestCPUBudget(unittest.TestCase):
+    """测试 CPU 列表解析与划分"""
+
+    def test_parse_cpus(self):
+        """测试解析编号与范围"""
+        self.assertEqual(parse_cpus("0-3,6"), [0, 1, 2, 3, 6])
+        self.assertEqual(parse_cpus("2, 1,"), [1, 2])
+
+    def test_plan_disjoint(self):
+        """测试核心足够时各工作进程分到互不重叠的 CPU"""
+        plan = plan_affinity(3, 2, cpus=range(8))
+        self.assertEqual(plan, [[0, 1], [2, 3], [4, 5]])
+
+    def test_plan_wraps_when_oversubscribed(self):
+        """测试核心不够时循环复用"""
+        plan = plan_affinity(3, 2, cpus=[0, 1, 2, 3])
+        self.assertEqual(plan, [[0, 1], [2, 3], [0, 1]])
+        self.assertEqual(plan_affinity(2, 8, cpus=[0, 1]), [[0, 1], [0, 1]])
+
+    @unittest.skipUnless(AFFINITY_AVAILABLE, "需要 CPU 绑定")
+    def test_pinned_restores(self):
+        """测试只绑定当前线程，退出后恢复"""
+        before = available_cpus()
+        tid = threading.get_native_id()
+        with pinned([before[0]]):
+            self.assertEqual(sorted(os.sched_getaffinity(tid)), [before[0]])
+        self.assertEqual(sorted(os.sched_getaffinity(tid)), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+单元测试：自适应端点检测
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.endpoint import Endpointer
+
+RATE = 16000
+FRAME = 320  # 20 毫秒
+
+
+def _frames(level, seconds, seed=0):
+    """生成指定 RMS 量级的 20 毫秒帧序列"""
+    rng = np.random.default_rng(seed)
+    count = int(seconds * RATE / FRAME)
+    return [(rng.standard_normal(FRAME) * level).astype(np.int16) for _ in range(count)]
+
+
+def _run(endpointer, frames):
+    endpointer.reset()
+    for frame in frames:
+        if endpointer.process(frame):
+            break
+    return endpointer
+
+
+class TestEndpointer(unittest.TestCase):
+    """测试端点检测规则"""
+    
+    def test_endpoint_after_hangover(self):
+        """测试语音结束后经过拖尾时长即判定结束"""
+        endpointer = Endpointer(rate=RATE, preroll_ms=200, hangover_ms=400)
+        frames = _frames(50, 1.0) + _frames(3000, 1.0, seed=1) + _frames(50, 3.0, seed=2)
+        _run(endpointer, frames)
+        stats = endpointer.stats
+        
+        self.assertEqual(stats.reason, Endpointer.ENDPOINT)
+        self.assertAlmostEqual(stats.speech_start_ms, 1000, delta=40)
+        self.assertAlmostEqual(stats.speech_ms, 1000, delta=60)
+        self.assertAlmostEqual(stats.endpoint_delay_ms, 400, delta=40)
+        # 音频包含 pre-roll + 语音 + 拖尾
+        self.assertAlmostEqual(len(endpointer.audio()) / RATE, 1.6, delta=0.05)
+    
+    def test_short_click_ignored(self):
+        """测试短于最短语音时长的脉冲不会触发"""
+        endpointer = Endpointer(rate=RATE, min_speech_ms=150, no_speech_timeout=1.0)
+        frames = _frames(50, 0.3) + _frames(3000, 0.06, seed=1) + _frames(50, 2.0, seed=2)
+        _run(endpointer, frames)
+        
+        self.assertEqual(endpointer.stats.reason, Endpointer.NO_SPEECH)
+        self.assertEqual(len(endpointer.audio()), 0)
+    
+    def test_adaptive_noise_floor(self):
+        """测试噪声底随环境噪声抬高阈值"""
+        endpointer = Endpointer(rate=RATE, min_threshold=100, no_speech_timeout=2.0)
+        _run(endpointer, _frames(400, 2.0))
+        
+        self.assertEqual(endpointer.stats.reason, Endpointer.NO_SPEECH)
+        self.assertGreater(endpointer.threshold, 1000)
+    
+    def test_max_duration(self):
+        """测试持续说话时从语音起点算起在最长时长处截断"""
+        endpointer = Endpointer(rate=RATE, max_duration=1.0)
+        _run(endpointer, _frames(50, 0.5) + _frames(3000, 3.0, seed=1))
+        
+        self.assertEqual(endpointer.stats.reason, Endpointer.MAX_DURATION)
+        self.assertAlmostEqual(endpointer.stats.captured_ms, 1500, delta=40)
+    
+    def test_speech_at_first_frame(self):
+        """测试一开始录音就说话（首句和之后的句子）都能检测到"""
+        endpointer = Endpointer(rate=RATE, hangover_ms=400)
+        for seed in range(3):
+            _run(endpointer, _frames(3000, 1.0, seed=seed) + _frames(50, 1.0, seed=seed + 10))
+            stats = endpointer.stats
+            
+            self.assertEqual(stats.reason, Endpointer.ENDPOINT)
+            self.assertAlmostEqual(stats.speech_start_ms, 0, delta=40)
+            self.assertAlmostEqual(len(endpointer.audio()) / RATE, 1.4, delta=0.05)
+    
+    def test_speech_during_calibration_after_reset(self):
+        """测试学习到噪声底之后，说话不会在下一句开头被当作噪声"""
+        endpointer = Endpointer(rate=RATE, hangover_ms=400)
+        _run(endpointer, _frames(50, 1.0) + _frames(3000, 0.5, seed=1) + _frames(50, 1.0, seed=2))
+        floor = endpointer.noise_floor
+        
+        _run(endpointer, _frames(50, 0.1, seed=3) + _frames(3000, 0.5, seed=4) + _frames(50, 1.0, seed=5))
+        self.assertEqual(endpointer.stats.reason, Endpointer.ENDPOINT)
+        self.assertAlmostEqual(endpointer.stats.speech_start_ms, 100, delta=40)
+        self.assertLess(endpointer.noise_floor, floor * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+单元测试：Whisper 模型注册表
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+sys.path.append(os.path.dirname(__file__))
+
+from voice.mmap_weights import mmap_cache_path, mmap_enabled
+from voice.model_registry import ModelRegistry, estimated_mb, registry_name, split_registry_name
+
+# 与注册表加载前的预估值一致
+SIZES = {"tiny": 150, "base": 290, "small": 970}
+
+
+class _Model:
+    """记录调用的模型替身"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.transcribed = 0
+    
+    def transcribe(self, audio, **kwargs):
+        self.transcribed += 1
+        return {"text": ""}
+
+
+class _Loader:
+    """计数的加载函数"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+    
+    def __call__(self, model_name, device):
+        self.calls.append(model_name)
+        time.sleep(self.delay)
+        return _Model(model_name)
+
+
+def _registry(budget=None, delay=0.0):
+    loader = _Loader(delay)
+    registry = ModelRegistry(budget, loader=loader, sizer=lambda m: SIZES.get(m.name, 0))
+    return registry, loader
+
+
+class TestModelRegistry(unittest.TestCase):
+    """测试模型共享、预加载与淘汰"""
+    
+    def test_shared_between_callers(self):
+        """测试同一模型只加载一次"""
+        registry, loader = _registry()
+        first = registry.get("tiny")
+        second = registry.get("tiny")
+        
+        self.assertIs(first, second)
+        self.assertEqual(loader.calls, ["tiny"])
+        self.assertEqual(registry.get_stats()["hits"], 1)
+    
+    def test_concurrent_get_loads_once(self):
+        """测试并发获取时只加载一次"""
+        registry, loader = _registry(delay=0.1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("base"))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(loader.calls, ["base"])
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(registry.get_stats()["hits"], 3)
+    
+    def test_preload_warms_up(self):
+        """测试后台预加载并做一次预热解码"""
+        registry, loader = _registry(delay=0.05)
+        done = registry.preload("tiny")
+        
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(registry.get("tiny").transcribed, 1)
+        self.assertEqual(loader.calls, ["tiny"])
+    
+    def test_concurrent_preload_warms_once(self):
+        """测试同时预加载同一模型时只预热一次"""
+        registry, loader = _registry(delay=0.05)
+        events = [registry.preload("tiny") for _ in range(4)]
+        
+        self.assertTrue(all(done.wait(2.0) for done in events))
+        self.assertEqual(registry.get("tiny").transcribed, 1)
+        self.assertEqual(loader.calls, ["tiny"])
+    
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "需要 CPU 绑定")
+    def test_preload_pins_warmup_thread(self):
+        """测试预热解码（首次推理，OpenMP 线程池在此创建）运行在绑定的 CPU 上"""
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        affinity = []
+        
+        class _AffinityModel(_Model):
+            def transcribe(self, audio, **kwargs):
+                affinity.append(sorted(os.sched_getaffinity(threading.get_native_id())))
+                return super().transcribe(audio, **kwargs)
+        
+        registry = ModelRegistry(loader=lambda name, device: _AffinityModel(name), sizer=lambda m: 0)
+        self.assertTrue(registry.preload("tiny", cpus=[cpu]).wait(2.0))
+        self.assertEqual(affinity, [[cpu]])
+    
+    def test_budget_evicts_least_recently_used(self):
+        """测试超出预算时淘汰最久未使用的空闲模型"""
+        registry, loader = _registry(budget=1200)
+        registry.get("tiny")
+        registry.get("base")
+        registry.get("tiny")
+        registry.get("small")
+        
+        stats = registry.get_stats()
+        self.assertEqual(stats["loaded"], ["tiny@cpu", "small@cpu"])
+        self.assertEqual(stats["evictions"], 1)
+        self.assertLessEqual(stats["memory_mb"], 1200)
+    
+    def test_model_in_use_not_evicted(self):
+        """测试正在使用的模型不会被淘汰"""
+        registry, loader = _registry(budget=300)
+        with registry.use("base") as model:
+            registry.get("small")
+            self.assertIn(("base", "cpu"), registry.loaded())
+            self.assertEqual(model.name, "base")
+        self.assertTrue(registry.evict("small"))
+        self.assertFalse(registry.evict("small"))
+    
+    def test_load_error_propagates_and_retries(self):
+        """测试加载失败时抛出异常，之后可以重试"""
+        attempts = []
+        
+        def loader(name, device):
+            attempts.append(name)
+            if len(attempts) == 1:
+                raise RuntimeError("磁盘错误")
+            return _Model(name)
+        
+        registry = ModelRegistry(loader=loader, sizer=lambda m: 0)
+        with self.assertRaises(RuntimeError):
+            registry.get("tiny")
+        self.assertEqual(registry.get("tiny").name, "tiny")
+
+
+class TestPrecisionNames(unittest.TestCase):
+    """测试量化模型的注册表名称"""
+
+    def test_round_trip(self):
+        """测试 fp32 保持原名，int8 带后缀且可以还原"""
+        self.assertEqual(registry_name("base"), "base")
+        self.assertEqual(registry_name("base", "int8"), "base:int8")
+        self.assertEqual(split_registry_name("base:int8"), ("base", "int8"))
+        self.assertEqual(split_registry_name("small.en"), ("small.en", "fp32"))
+        with self.assertRaises(ValueError):
+            registry_name("base", "fp8")
+
+    def test_int8_cached_separately(self):
+        """测试量化模型与 fp32 模型分别加载，预估内存更小"""
+        registry, loader = _registry()
+        registry.get("tiny")
+        registry.get(registry_name("tiny", "int8"))
+        self.assertEqual(loader.calls, ["tiny", "tiny:int8"])
+        self.assertLess(estimated_mb("small:int8"), estimated_mb("small"))
+
+
+class TestMmapSettings(unittest.TestCase):
+    """测试内存映射加载的开关与缓存位置"""
+
+    def test_env_switch_and_path(self):
+        """测试环境变量开关与转换文件路径"""
+        with mock.patch.dict(os.environ, {"WHISPER_MMAP_WEIGHTS": "1", "XDG_CACHE_HOME": "/tmp/cache"}):
+            self.assertTrue(mmap_enabled())
+            self.assertEqual(mmap_cache_path("base"), "/tmp/cache/whisper/mmap/base.pt")
+        with mock.patch.dict(os.environ, {"WHISPER_MMAP_WEIGHTS": "0"}):
+            self.assertFalse(mmap_enabled())
+
+
+if __name__ == "__main__":
+    unittest.main()
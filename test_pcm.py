@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+单元测试：内存 PCM 缓冲区
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.pcm import PCMBuffer, resample_float
+
+
+class TestPCMBuffer(unittest.TestCase):
+    """测试 PCM 缓冲区的编解码与转换"""
+    
+    def test_wav_round_trip(self):
+        """测试内存 WAV 编解码往返"""
+        pcm = PCMBuffer(np.arange(-100, 100, dtype=np.int16), 16000)
+        decoded = PCMBuffer.from_wav_bytes(pcm.to_wav_bytes())
+        
+        self.assertEqual(decoded.rate, 16000)
+        self.assertEqual(decoded.channels, 1)
+        self.assertEqual(decoded.samples.tolist(), pcm.samples.tolist())
+    
+    def test_duration_and_empty(self):
+        """测试时长与空缓冲区"""
+        self.assertAlmostEqual(PCMBuffer(np.zeros(8000), 16000).duration, 0.5)
+        self.assertFalse(PCMBuffer.empty())
+    
+    def test_resample(self):
+        """测试重采样后的长度"""
+        pcm = PCMBuffer(np.zeros(22050, dtype=np.int16), 22050)
+        self.assertEqual(len(pcm.resample(16000)), 16000)
+        self.assertIs(pcm.resample(22050), pcm)
+    
+    def test_to_float32_mixes_down(self):
+        """测试转换为单声道 float32"""
+        stereo = PCMBuffer(np.array([16384, 0, 16384, 0], dtype=np.int16), 16000, channels=2)
+        audio = stereo.to_float32()
+        
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(len(audio), 2)
+        self.assertAlmostEqual(float(audio[0]), 0.25, places=3)
+    
+    def test_resample_float_anti_aliasing(self):
+        """测试降采样前的低通滤波抑制超出目标奈奎斯特频率的成分"""
+        t = np.arange(48000) / 48000.0
+        tone = np.sin(2 * np.pi * 10000 * t).astype(np.float32)
+        speech = np.sin(2 * np.pi * 1000 * t).astype(np.float32)
+        
+        aliased = resample_float(tone, 48000, 16000)
+        kept = resample_float(speech, 48000, 16000)
+        
+        self.assertEqual(len(kept), 16000)
+        self.assertLess(float(np.abs(aliased[200:-200]).max()), 0.05)
+        self.assertGreater(float(np.abs(kept[200:-200]).max()), 0.9)
+    
+    def test_chunks_are_views(self):
+        """测试切片不复制数据"""
+        pcm = PCMBuffer(np.arange(10, dtype=np.int16), 16000)
+        chunks = list(pcm.chunks(4))
+        
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        self.assertTrue(np.shares_memory(chunks[0], pcm.samples))
+
+
+if __name__ == "__main__":
+    unittest.main()
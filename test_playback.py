@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+单元测试：流式播放与抖动缓冲
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.audio_io import AudioPlayer
+from voice.pcm import PCMBuffer
+from voice.playback import JitterBuffer
+from voice.virtual_audio import VirtualAudioPlayer
+
+
+def _chunks(count, samples, rate, delay=0.0):
+    """产出若干音频块，可模拟边合成边产出"""
+    for i in range(count):
+        if delay:
+            time.sleep(delay)
+        yield PCMBuffer(np.full(samples, i + 1, dtype=np.int16), rate)
+
+
+class TestJitterBuffer(unittest.TestCase):
+    """测试抖动缓冲区"""
+    
+    def _drain(self, buffer, block_frames=256):
+        buffer.start()
+        self.assertIsNotNone(buffer.wait_format())
+        return list(buffer.blocks(block_frames))
+    
+    def test_gapless_fixed_blocks(self):
+        """测试不规则的音频块被重新切分为固定块且不丢样本"""
+        buffer = JitterBuffer(_chunks(5, 300, 16000))
+        blocks = self._drain(buffer)
+        
+        self.assertTrue(all(len(b) == 256 for b in blocks[:-1]))
+        self.assertEqual(sum(len(b) for b in blocks), 1500)
+        self.assertEqual(np.concatenate(blocks)[299:301].tolist(), [1, 2])
+    
+    def test_resample_to_stream_rate(self):
+        """测试与第一块采样率不同的块被即时重采样"""
+        source = [PCMBuffer(np.zeros(1600, dtype=np.int16), 16000),
+                  PCMBuffer(np.zeros(800, dtype=np.int16), 8000)]
+        buffer = JitterBuffer(source)
+        blocks = self._drain(buffer)
+        
+        self.assertEqual(buffer.rate, 16000)
+        self.assertEqual(buffer.resampled_chunks, 1)
+        self.assertEqual(sum(len(b) for b in blocks), 3200)
+    
+    def test_accepts_raw_arrays_and_bytes(self):
+        """测试数组与原始字节块"""
+        source = [np.zeros(100, dtype=np.int16), np.zeros(100, dtype=np.int16).tobytes()]
+        blocks = self._drain(JitterBuffer(source, rate=8000))
+        
+        self.assertEqual(sum(len(b) for b in blocks), 200)
+    
+    def test_empty_source(self):
+        """测试没有音频时不打开输出"""
+        buffer = JitterBuffer(iter([]))
+        buffer.start()
+        self.assertIsNone(buffer.wait_format())
+    
+    def test_slow_producer_underrun(self):
+        """测试生产者慢于播放时记录欠载并重新预缓冲"""
+        buffer = JitterBuffer(_chunks(3, 400, 16000, delay=0.03), prebuffer_ms=20)
+        blocks = self._drain(buffer)
+        
+        self.assertEqual(sum(len(b) for b in blocks), 1200)
+        self.assertGreaterEqual(buffer.underruns, 1)
+    
+    def test_producer_error_propagates(self):
+        """测试合成端的异常在播放端抛出"""
+        def broken():
+            yield PCMBuffer(np.zeros(100, dtype=np.int16), 16000)
+            raise RuntimeError("合成失败")
+        
+        buffer = JitterBuffer(broken())
+        with self.assertRaises(RuntimeError):
+            self._drain(buffer)
+
+
+class TestPlayStream(unittest.TestCase):
+    """测试播放器的流式接口"""
+    
+    def test_virtual_play_stream(self):
+        """测试虚拟播放器捕获流式播放内容"""
+        player = VirtualAudioPlayer()
+        player.play_stream(_chunks(4, 1000, 16000))
+        
+        self.assertAlmostEqual(player.played_seconds, 0.25, places=3)
+        self.assertEqual(len(player.captured_pcm()), 4000)
+    
+    def test_stop_interrupts_playback(self):
+        """测试 stop() 立即中止实时播放"""
+        player = VirtualAudioPlayer(realtime=True)
+        timer = threading.Timer(0.1, player.stop)
+        timer.start()
+        started = time.monotonic()
+        player.play_pcm(PCMBuffer(np.zeros(32000, dtype=np.int16), 16000))
+        
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(player.playing)
+
+    
+    def test_stereo_pcm_keeps_channels(self):
+        """测试播放立体声 PCM 时按原声道数打开输出流，不混成单声道"""
+        left = np.arange(1000, dtype=np.int16)
+        stereo = PCMBuffer(np.stack([left, -left], axis=1).reshape(-1), 16000, 2)
+        
+        class _Stream:
+            data = b""
+            
+            def write(self, data):
+                self.data += data
+        
+        stream = _Stream()
+        devices = mock.Mock(pa=None)
+        devices.acquire_output.return_value = stream
+        with mock.patch("voice.audio_io.PYAUDIO_AVAILABLE", True):
+            AudioPlayer(devices).play_pcm(stereo)
+        
+        devices.acquire_output.assert_called_once_with(16000, 2)
+        np.testing.assert_array_equal(np.frombuffer(stream.data, dtype=np.int16), stereo.samples)
+        
+        player = VirtualAudioPlayer()
+        player.play_pcm(stereo)
+        self.assertEqual(player.captured[0].channels, 2)
+        self.assertAlmostEqual(player.played_seconds, 1000 / 16000, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+单元测试：分句流水线播放
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.pcm import PCMBuffer
+from voice.speaker import PipelinedSpeaker, split_sentences, strip_markdown
+from voice.audio_io import MockAudioRecorder
+from voice.stt import MockSTT
+from voice.tts import MockTTS
+from voice.virtual_audio import VirtualAudioPlayer
+from voice.voice_session import VoiceSession
+
+RATE = 16000
+
+
+class _SlowTTS(MockTTS):
+    """每句合成耗时固定、音频长度与字数成正比的模拟 TTS"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.synthesized = []
+        self.spoken = []
+        self.lock = threading.Lock()
+
+    def text_to_pcm(self, text):
+        with self.lock:
+            self.synthesized.append(text)
+        time.sleep(self.delay)
+        return PCMBuffer(np.full(len(text) * 800, 1000, dtype=np.int16), RATE)
+
+    def speak(self, text):
+        self.spoken.append(text)
+
+
+class TestSplitSentences(unittest.TestCase):
+    """测试分句"""
+
+    def test_mixed_punctuation(self):
+        """测试中英文句末标点，英文小数点不切开"""
+        self.assertEqual(
+            split_sentences("今天天气晴朗，气温25度。明天有雨！Hello world. It costs 3.5 dollars?"),
+            ["今天天气晴朗，气温25度。", "明天有雨！", "Hello world.", "It costs 3.5 dollars?"]
+        )
+
+    def test_long_sentence_split_at_clauses(self):
+        """测试超长句子在逗号处切开"""
+        pieces = split_sentences("这是一个比较长的分句，" * 8, max_chars=30)
+        self.assertGreater(len(pieces), 1)
+        self.assertTrue(all(len(piece) <= 30 for piece in pieces))
+        self.assertEqual("".join(pieces), "这是一个比较长的分句，" * 8)
+
+    def test_short_fragments_merged(self):
+        """测试过短的片段并入下一句"""
+        self.assertEqual(split_sentences("好。我来查一下天气。"), ["好。我来查一下天气。"])
+
+    def test_markdown_stripped(self):
+        """测试去掉 Markdown 标记与代码块"""
+        text = "## 天气\n- **北京**：晴\n- 详见[天气网](https://example.com)\n```\nprint(1)\n```"
+        self.assertNotIn("*", strip_markdown(text))
+        self.assertEqual(split_sentences(text), ["天气，北京：晴", "详见天气网"])
+
+
+class TestPipelinedSpeaker(unittest.TestCase):
+    """测试流水线合成与播放"""
+
+    def test_plays_all_sentences_in_order(self):
+        """测试全部句子按顺序播放"""
+        tts = _SlowTTS(delay=0.0)
+        player = VirtualAudioPlayer()
+        speaker = PipelinedSpeaker(tts, player)
+
+        self.assertTrue(speaker.speak("第一句话。第二句话！第三句话？"))
+        self.assertEqual(tts.synthesized, ["第一句话。", "第二句话！", "第三句话？"])
+        self.assertAlmostEqual(player.played_seconds, 15 * 800 / RATE, places=3)
+        self.assertEqual(speaker.get_stats()["sentences"], 3)
+
+    def test_first_audio_before_full_synthesis(self):
+        """测试第一句合成完即开始播放，不等待整段"""
+        tts = _SlowTTS(delay=0.1)
+        speaker = PipelinedSpeaker(tts, VirtualAudioPlayer(realtime=True))
+        speaker.speak("第一句话。第二句话。第三句话。第四句话。")
+
+        stats = speaker.get_stats()
+        self.assertLess(stats["first_audio_ms"], 250)
+        self.assertGreater(stats["synthesis_ms"], 350)
+
+    def test_cancel_stops_synthesis(self):
+        """测试中途取消时停止播放，后续句子不再合成"""
+        tts = _SlowTTS(delay=0.02)
+        player = VirtualAudioPlayer(realtime=True)
+        speaker = PipelinedSpeaker(tts, player)
+        text = "".join(f"这是第{i}句话。" for i in range(20))
+
+        timer = threading.Timer(0.3, speaker.cancel)
+        timer.start()
+        started = time.monotonic()
+        completed = speaker.speak(text)
+        timer.join()
+
+        self.assertFalse(completed)
+        self.assertTrue(speaker.get_stats()["cancelled"])
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertLess(len(tts.synthesized), 20)
+
+    def test_synthesis_error_raised(self):
+        """测试合成错误抛给调用方"""
+        class _FailingTTS(MockTTS):
+            def text_to_pcm(self, text):
+                raise RuntimeError("合成失败")
+
+        speaker = PipelinedSpeaker(_FailingTTS(), VirtualAudioPlayer())
+        with self.assertRaises(RuntimeError):
+            speaker.speak("你好世界。")
+
+
+class TestSessionSpeaking(unittest.TestCase):
+    """测试会话默认的发声路径"""
+
+    def test_default_session_speaks_sentence_by_sentence(self):
+        """测试默认配置（不经 tts_via_player）下只要播放器支持流式播放就逐句合成播放"""
+        tts = _SlowTTS(delay=0.0)
+        player = VirtualAudioPlayer()
+        session = VoiceSession(MockSTT(), tts, MockAudioRecorder(), player, lambda text: text)
+        session._speak("第一句话。第二句话！")
+
+        self.assertEqual(tts.spoken, [])
+        self.assertEqual(tts.synthesized, ["第一句话。", "第二句话！"])
+        self.assertAlmostEqual(player.played_seconds, 10 * 800 / RATE, places=3)
+
+    def test_engine_speaks_without_player(self):
+        """测试没有播放器时交给引擎自行发声"""
+        tts = _SlowTTS(delay=0.0)
+        session = VoiceSession(MockSTT(), tts, MockAudioRecorder(), None, lambda text: text)
+        self.assertIsNone(session.speaker)
+        session._speak("你好。")
+        self.assertEqual(tts.spoken, ["你好。"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+单元测试：语音门控
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from voice.speech_gate import SpeechGate
+from voice.stt import MockSTT, Transcript
+from voice.tts import MockTTS
+from voice.audio_io import MockAudioRecorder, MockAudioPlayer
+from voice.voice_session import VoiceSession
+
+
+def _transcript(text, no_speech_prob=0.1, avg_logprob=-0.3):
+    return Transcript(text, [{"text": text, "no_speech_prob": no_speech_prob, "avg_logprob": avg_logprob}])
+
+
+class _FixedSTT(MockSTT):
+    """返回固定结果的模拟引擎"""
+
+    def __init__(self, transcript):
+        self.transcript = transcript
+
+    def transcribe_detailed(self, pcm, sample_rate=None):
+        return self.transcript
+
+
+class TestSpeechGate(unittest.TestCase):
+    """测试拒绝规则与计数"""
+
+    def test_accepts_confident_speech(self):
+        """测试正常语音通过"""
+        gate = SpeechGate()
+        self.assertTrue(gate.check(_transcript("今天北京天气怎么样")))
+        self.assertTrue(gate.check(Transcript("再见")))
+
+    def test_rejects_no_speech(self):
+        """测试无语音概率高且置信度低时拒绝"""
+        gate = SpeechGate()
+        self.assertEqual(gate.reason(_transcript("嗯", no_speech_prob=0.8, avg_logprob=-1.2)), "no_speech")
+        self.assertIsNone(gate.reason(_transcript("嗯", no_speech_prob=0.8, avg_logprob=-0.2)))
+        self.assertEqual(gate.reason(_transcript("阿巴阿巴", avg_logprob=-2.0)), "low_confidence")
+
+    def test_rejects_hallucinations(self):
+        """测试常见幻觉文本被拒绝，包含其他内容时保留"""
+        gate = SpeechGate()
+        for text in ("谢谢观看！", "谢谢观看 请订阅", "字幕由Amara.org社区提供", "Thanks for watching!"):
+            self.assertEqual(gate.reason(Transcript(text)), "hallucination", text)
+        self.assertIsNone(gate.reason(Transcript("谢谢观看这个视频的人有多少")))
+
+    def test_counters(self):
+        """测试按原因计数"""
+        gate = SpeechGate()
+        gate.check(Transcript("谢谢观看"))
+        gate.check(_transcript("嗯", no_speech_prob=0.9, avg_logprob=-1.5))
+        gate.check(_transcript("你好"))
+        self.assertEqual(gate.get_stats(), {
+            "accepted": 1, "rejected": 2, "reasons": {"hallucination": 1, "no_speech": 1}
+        })
+
+
+class TestVoiceSessionGating(unittest.TestCase):
+    """测试会话在调用智能体前门控"""
+
+    def _session(self, transcript, **kwargs):
+        calls = []
+        session = VoiceSession(_FixedSTT(transcript), MockTTS(), MockAudioRecorder(), MockAudioPlayer(),
+                               lambda text: calls.append(text) or "好的", **kwargs)
+        return session, calls
+
+    def test_rejected_turn_skips_agent(self):
+        """测试被拒绝的识别结果不会交给智能体"""
+        session, calls = self._session(Transcript("谢谢观看"))
+        user_text, response = session.single_interaction()
+
+        self.assertEqual(user_text, "")
+        self.assertEqual(calls, [])
+        self.assertEqual(session.last_timings["rejected"], 1.0)
+        self.assertEqual(session.speech_gate.get_stats()["rejected"], 1)
+
+    def test_gating_can_be_disabled(self):
+        """测试关闭门控后照常处理"""
+        session, calls = self._session(Transcript("谢谢观看"), speech_gating=False)
+        session.single_interaction()
+        self.assertEqual(calls, ["谢谢观看"])
+
+
+if __name__ == "__main__":
+    unittest.main()
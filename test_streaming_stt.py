@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+单元测试：流式语音识别
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.stt import LogMelExtractor, MockSTT
+from voice.streaming_stt import StreamingTranscriber, common_prefix, tokenize
+from voice.tts import MockTTS
+from voice.virtual_audio import VirtualAudioRecorder, VirtualAudioPlayer
+from voice.voice_session import VoiceSession
+
+RATE = 16000
+FRAME = 320
+
+
+class _ScriptedDecoder:
+    """按顺序返回预设假设的解码函数"""
+    
+    def __init__(self, hypotheses, segments=None):
+        self.hypotheses = list(hypotheses)
+        self.segments = segments or {}
+        self.calls = []
+    
+    def __call__(self, audio, prompt):
+        self.calls.append((len(audio), prompt))
+        index = min(len(self.calls) - 1, len(self.hypotheses) - 1)
+        return self.hypotheses[index], self.segments.get(index, [])
+
+
+def _feed(stream, seconds):
+    for _ in range(int(seconds * RATE / FRAME)):
+        stream.feed(np.zeros(FRAME, dtype=np.int16))
+
+
+class TestTokenize(unittest.TestCase):
+    """测试切分与公共前缀"""
+    
+    def test_mixed_text(self):
+        """测试中文按字、英文按词切分"""
+        self.assertEqual(tokenize("打开 music app"), ["打", "开", " music", " app"])
+    
+    def test_prefix_ignores_punctuation(self):
+        """测试公共前缀忽略标点与大小写"""
+        self.assertEqual(common_prefix(tokenize("你好，世界"), tokenize("你好世界吗")), 4)
+        self.assertEqual(common_prefix(tokenize("Hello world."), tokenize("hello world again")), 2)
+
+
+class TestStreamingTranscriber(unittest.TestCase):
+    """测试流式转录会话"""
+    
+    def test_local_agreement_commits_prefix(self):
+        """测试相邻两次解码一致的前缀被确认，之后不再改变"""
+        decoder = _ScriptedDecoder(["今天", "今天天汽", "今天天气怎么", "今天天气怎么样"])
+        updates = []
+        stream = StreamingTranscriber(decoder, step_ms=500, background=False, on_update=updates.append)
+        
+        _feed(stream, 2.0)
+        
+        self.assertEqual(stream.passes, 4)
+        self.assertEqual([u.committed for u in updates], ["", "今天", "今天天", "今天天气怎么"])
+        self.assertEqual(updates[1].partial, "天汽")
+        self.assertEqual(updates[-1].partial, "样")
+        # 最后一次解码已覆盖全部音频，结束时无需再次解码
+        self.assertEqual(stream.finish(), "今天天气怎么样")
+        self.assertEqual(len(decoder.calls), 4)
+    
+    def test_finish_decodes_remaining_audio(self):
+        """测试结束时还有未解码的音频则做最后一次解码"""
+        decoder = _ScriptedDecoder(["打开", "打开音乐", "打开音乐播放器"])
+        stream = StreamingTranscriber(decoder, step_ms=500, background=False)
+        
+        _feed(stream, 1.2)
+        
+        self.assertEqual(stream.finish(), "打开音乐播放器")
+        self.assertEqual(len(decoder.calls), 3)
+        self.assertTrue(stream.last_update.final)
+    
+    def test_window_trimmed_at_committed_segment(self):
+        """测试窗口超过上限时移出已确认的片段，并把它作为提示"""
+        segments = {1: [("第一句。", 1.0), ("第二", 2.0)]}
+        decoder = _ScriptedDecoder(["第一句。第二", "第一句。第二", "第二句"], segments)
+        stream = StreamingTranscriber(decoder, step_ms=1000, window_seconds=1.5, background=False)
+        
+        _feed(stream, 2.0)
+        self.assertEqual(stream.committed_text, "第一句。第二")
+        _feed(stream, 1.0)
+        
+        self.assertEqual(decoder.calls[-1][1], "第一句。")
+        self.assertEqual(decoder.calls[-1][0], 2 * RATE)
+        self.assertEqual(stream.finish(), "第一句。第二句")
+    
+    def test_features_follow_window(self):
+        """测试增量特征提取器随窗口追加与裁剪，与窗口音频保持一致"""
+        features = LogMelExtractor(np.ones((4, 201), dtype=np.float32))
+        frames = []
+        
+        def decode(audio, prompt):
+            frames.append((len(audio) // 160, features.spectrogram().shape[1]))
+            return ("第一句。第二", [("第一句。", 1.0), ("第二", 2.0)]) if len(frames) < 3 else ("第二句", [])
+        
+        stream = StreamingTranscriber(decode, step_ms=1000, window_seconds=1.5, background=False,
+                                      features=features)
+        _feed(stream, 3.0)
+        
+        self.assertEqual(features.samples, 2 * RATE)
+        for expected, actual in frames:
+            self.assertEqual(expected, actual)
+    
+    def test_background_decoding(self):
+        """测试后台线程解码"""
+        def decoder(audio, prompt):
+            return ("你好吗" if len(audio) >= RATE else "你好"), []
+        stream = StreamingTranscriber(decoder, step_ms=200)
+        _feed(stream, 1.0)
+        
+        self.assertEqual(stream.finish(), "你好吗")
+        self.assertGreaterEqual(stream.passes, 1)
+        with self.assertRaises(RuntimeError):
+            stream.feed(np.zeros(FRAME, dtype=np.int16))
+
+
+class TestVoiceSessionStreaming(unittest.TestCase):
+    """测试语音会话的流式转录"""
+    
+    def test_single_interaction_streams(self):
+        """测试边录边转录的单次交互"""
+        t = np.arange(RATE) / RATE
+        clip = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+        recorder = VirtualAudioRecorder(clip, realtime=False)
+        session = VoiceSession(MockSTT(), MockTTS(), recorder, VirtualAudioPlayer(),
+                               lambda text: "好的", tts_via_player=True, streaming_stt=True)
+        
+        user_text, response = session.single_interaction()
+        
+        self.assertEqual(user_text, "这是模拟的语音识别结果")
+        self.assertIn("stt_ms", session.last_timings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+单元测试：STT 的内存音频输入
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.pcm import PCMBuffer
+from voice.stt import (LogMelExtractor, MockSTT, audio_context_frames, load_wav_audio, needs_temperature_fallback,
+                       to_whisper_input, trim_silence, WHISPER_WINDOW_FRAMES)
+
+
+class TestWhisperInput(unittest.TestCase):
+    """测试转换为 Whisper 输入数组"""
+    
+    def test_int16_array_resampled(self):
+        """测试 int16 数组按给定采样率重采样到 16kHz"""
+        audio = to_whisper_input(np.full(44100, 16384, dtype=np.int16), 44100)
+        
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(len(audio), 16000)
+        self.assertAlmostEqual(float(audio[8000]), 0.5, places=3)
+    
+    def test_float_stereo_array(self):
+        """测试浮点二维数组混缩为单声道"""
+        stereo = np.zeros((16000, 2), dtype=np.float32)
+        stereo[:, 0] = 0.5
+        audio = to_whisper_input(stereo)
+        
+        self.assertEqual(audio.shape, (16000,))
+        self.assertAlmostEqual(float(audio[100]), 0.25, places=5)
+    
+    def test_pcm_buffer_uses_own_rate(self):
+        """测试 PCMBuffer 使用自带的采样率"""
+        pcm = PCMBuffer(np.zeros(8000, dtype=np.int16), 8000)
+        self.assertEqual(len(to_whisper_input(pcm, sample_rate=48000)), 16000)
+    
+    def test_load_wav_audio(self):
+        """测试 WAV 文件在进程内解码，非 WAV 返回 None"""
+        with tempfile.TemporaryDirectory() as tmp:
+            wav_path = os.path.join(tmp, "a.wav")
+            with open(wav_path, "wb") as f:
+                f.write(PCMBuffer(np.zeros(22050, dtype=np.int16), 22050).to_wav_bytes())
+            other_path = os.path.join(tmp, "a.mp3")
+            with open(other_path, "wb") as f:
+                f.write(b"ID3" + b"\x00" * 64)
+            
+            self.assertEqual(len(load_wav_audio(wav_path)), 16000)
+            self.assertIsNone(load_wav_audio(other_path))
+    
+    def test_mock_accepts_array(self):
+        """测试模拟引擎接受数组输入"""
+        self.assertTrue(MockSTT().transcribe_pcm(np.zeros(1600, dtype=np.int16), 16000))
+
+
+class TestShortUtterance(unittest.TestCase):
+    """测试短句模式的静音裁剪与上下文长度"""
+    
+    def test_trim_leading_and_trailing_silence(self):
+        """测试首尾静音被裁掉，保留余量"""
+        t = np.arange(16000) / 16000
+        tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        audio = np.concatenate([np.zeros(16000, np.float32), tone, np.zeros(32000, np.float32)])
+        
+        trimmed = trim_silence(audio, pad_ms=200.0)
+        self.assertAlmostEqual(len(trimmed), 16000 + 2 * 3200, delta=640)
+    
+    def test_trim_all_silence(self):
+        """测试全部静音时返回空数组"""
+        self.assertEqual(len(trim_silence(np.zeros(16000, np.float32))), 0)
+    
+    def test_context_frames(self):
+        """测试上下文帧数按时长增长、取偶数并封顶 30 秒"""
+        frames = audio_context_frames(3 * 16000, margin_ms=1000.0)
+        self.assertEqual(frames, 400)
+        self.assertEqual(audio_context_frames(16001, margin_ms=0.0) % 2, 0)
+        self.assertEqual(audio_context_frames(40 * 16000), WHISPER_WINDOW_FRAMES)
+    
+    def test_temperature_fallback_rule(self):
+        """测试重复或低置信度的结果需要提高温度重试，静音不重试"""
+        def result(compression_ratio=1.2, avg_logprob=-0.3, no_speech_prob=0.1):
+            return type("Result", (), dict(compression_ratio=compression_ratio, avg_logprob=avg_logprob,
+                                           no_speech_prob=no_speech_prob))()
+        
+        self.assertFalse(needs_temperature_fallback(result()))
+        self.assertTrue(needs_temperature_fallback(result(compression_ratio=3.0)))
+        self.assertTrue(needs_temperature_fallback(result(avg_logprob=-1.5)))
+        self.assertFalse(needs_temperature_fallback(result(avg_logprob=-1.5, no_speech_prob=0.9)))
+
+
+def _reference_log_mel(audio, filters):
+    """按 Whisper transcribe 的方式整段计算 log-mel（补零后反射填充）"""
+    frames = len(audio) // 160
+    padded = np.pad(np.concatenate([audio, np.zeros(1000, np.float32)]), (200, 200), mode="reflect")
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(400) / 400)
+    segments = np.lib.stride_tricks.sliding_window_view(padded, 400)[::160][:frames]
+    mel = filters @ (np.abs(np.fft.rfft(segments * window, axis=1)) ** 2).T
+    log_spec = np.log10(np.maximum(mel, 1e-10))
+    return (np.maximum(log_spec, log_spec.max() - 8.0) + 4.0) / 4.0
+
+
+class TestLogMelExtractor(unittest.TestCase):
+    """测试增量 log-mel 特征"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.filters = np.abs(rng.normal(size=(80, 201))).astype(np.float32)
+        self.audio = (rng.normal(size=16000 * 3) * 0.1).astype(np.float32)
+    
+    def test_matches_full_computation(self):
+        """测试分块追加后的特征与整段计算一致"""
+        extractor = LogMelExtractor(self.filters)
+        position = 0
+        for step in (3000, 777, 5000, 16000, 123):
+            extractor.feed(self.audio[position:position + step])
+            position += step
+            expected = _reference_log_mel(self.audio[:position], self.filters)
+            np.testing.assert_allclose(extractor.spectrogram(), expected, atol=1e-5)
+    
+    def test_trim_keeps_cached_frames(self):
+        """测试裁剪窗口开头后仍然一致，且只计算新增的帧"""
+        extractor = LogMelExtractor(self.filters)
+        extractor.feed(self.audio[:32000])
+        extractor.spectrogram()
+        computed = extractor.computed_frames
+        
+        extractor.trim(3200)
+        extractor.feed(self.audio[32000:40000])
+        expected = _reference_log_mel(self.audio[3200:40000], self.filters)
+        np.testing.assert_allclose(extractor.spectrogram(), expected, atol=1e-5)
+        self.assertLess(extractor.computed_frames - computed, 60)
+        
+        with self.assertRaises(ValueError):
+            extractor.trim(100)
+
+
+if __name__ == "__main__":
+    unittest.main()
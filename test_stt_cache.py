@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+单元测试：转录缓存
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.cache import DISKCACHE_AVAILABLE
+from voice.pcm import PCMBuffer
+from voice.stt import STTBase, get_stt_engine
+from voice.stt_cache import CachedSTT, TranscriptionCache
+
+RATE = 16000
+
+
+class _CountingSTT(STTBase):
+    """记录实际转录次数的引擎"""
+
+    def __init__(self, identity="counting"):
+        self.identity = identity
+        self.calls = 0
+        self.batches = []
+
+    def transcribe_file(self, audio_path):
+        self.calls += 1
+        return "file"
+
+    def transcribe_bytes(self, audio_bytes):
+        self.calls += 1
+        return "bytes"
+
+    def transcribe_pcm(self, pcm, sample_rate=None):
+        self.calls += 1
+        return f"text-{self.calls}"
+
+    def transcribe_batch(self, items, sample_rate=None):
+        self.batches.append(len(items))
+        return [self.transcribe_pcm(item, sample_rate) for item in items]
+
+    def cache_identity(self):
+        return self.identity
+
+
+def _tone(seconds=0.5, freq=440):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+
+
+class TestCachedSTT(unittest.TestCase):
+    """测试缓存命中与统计"""
+
+    def test_repeated_audio_hits(self):
+        """测试相同音频只转录一次"""
+        engine = _CountingSTT()
+        stt = CachedSTT(engine)
+        first = stt.transcribe_pcm(_tone(), RATE)
+        second = stt.transcribe_pcm(_tone(), RATE)
+
+        self.assertEqual(first, second)
+        self.assertEqual(engine.calls, 1)
+        stats = stt.get_stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_key_normalizes_format(self):
+        """测试 int16、浮点与 WAV 字节输入共用同一条缓存"""
+        engine = _CountingSTT()
+        stt = CachedSTT(engine)
+        tone = _tone()
+        stt.transcribe_pcm(tone, RATE)
+        stt.transcribe_pcm(tone.astype(np.float32) / 32768.0, RATE)
+        stt.transcribe_bytes(PCMBuffer(tone, RATE).to_wav_bytes())
+        self.assertEqual(engine.calls, 1)
+
+    def test_identity_separates_engines(self):
+        """测试不同引擎配置不共享结果"""
+        cache = TranscriptionCache()
+        first, second = _CountingSTT("a"), _CountingSTT("b")
+        CachedSTT(first, cache).transcribe_pcm(_tone(), RATE)
+        CachedSTT(second, cache).transcribe_pcm(_tone(), RATE)
+        self.assertEqual((first.calls, second.calls), (1, 1))
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的结果"""
+        engine = _CountingSTT()
+        stt = CachedSTT(engine, TranscriptionCache(max_entries=2))
+        a, b, c = _tone(freq=300), _tone(freq=400), _tone(freq=500)
+        for audio in (a, b, a, c, a, b):
+            stt.transcribe_pcm(audio, RATE)
+        # b 在 c 写入时被淘汰，a 一直被使用
+        self.assertEqual(engine.calls, 4)
+
+    def test_batch_only_sends_misses(self):
+        """测试批量转录只把未命中的音频交给引擎"""
+        engine = _CountingSTT()
+        stt = CachedSTT(engine)
+        stt.transcribe_pcm(_tone(freq=300), RATE)
+        texts = stt.transcribe_batch([_tone(freq=300), _tone(freq=400), np.zeros(0, np.int16)], RATE)
+
+        self.assertEqual(engine.batches, [1])
+        self.assertEqual(texts[0], "text-1")
+        self.assertEqual(texts[2], "")
+
+    @unittest.skipUnless(DISKCACHE_AVAILABLE, "diskcache 未安装")
+    def test_disk_tier_survives_restart(self):
+        """测试磁盘缓存在新的缓存实例中仍然命中"""
+        with tempfile.TemporaryDirectory() as tmp:
+            first = TranscriptionCache(directory=tmp)
+            CachedSTT(_CountingSTT(), first).transcribe_pcm(_tone(), RATE)
+            first.close()
+
+            engine = _CountingSTT()
+            second = TranscriptionCache(directory=tmp)
+            CachedSTT(engine, second).transcribe_pcm(_tone(), RATE)
+            self.assertEqual(engine.calls, 0)
+            self.assertEqual(second.get_stats()["disk_hits"], 1)
+            second.close()
+
+    def test_factory_wraps_engine(self):
+        """测试工厂函数按参数启用缓存"""
+        stt = get_stt_engine("mock", cache_size=8)
+        self.assertIsInstance(stt, CachedSTT)
+        stt.transcribe_pcm(_tone(), RATE)
+        stt.transcribe_pcm(_tone(), RATE)
+        self.assertEqual(stt.get_stats()["memory_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+单元测试：STT 工作进程池
+"""
+
+import unittest
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.stt import STTBase, get_stt_engine
+from voice.stt_pool import STTWorkerPool
+
+
+class _PidSTT(STTBase):
+    """返回工作进程号与音频长度的引擎"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.weights = np.arange(1000000, dtype=np.float32)
+    
+    def transcribe_file(self, audio_path):
+        return "file"
+    
+    def transcribe_bytes(self, audio_bytes):
+        return "bytes"
+    
+    def transcribe_pcm(self, pcm, sample_rate=None):
+        time.sleep(self.delay)
+        if len(pcm) == 3:
+            raise ValueError("坏数据")
+        if len(pcm) == 5:
+            os._exit(1)
+        return f"{os.getpid()}:{len(pcm)}"
+    
+    def affinity(self):
+        return sorted(os.sched_getaffinity(0))
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "需要 fork")
+class TestSTTWorkerPool(unittest.TestCase):
+    """测试进程池的提交、统计与容错"""
+    
+    def test_concurrent_submissions(self):
+        """测试多个请求分散到不同工作进程并发执行"""
+        with STTWorkerPool(_PidSTT(delay=0.2), workers=3) as pool:
+            started = time.perf_counter()
+            futures = [pool.submit_pcm(np.zeros(1600 + i, dtype=np.int16)) for i in range(6)]
+            results = [f.result(timeout=10) for f in futures]
+            elapsed = time.perf_counter() - started
+            
+            self.assertEqual([int(r.split(":")[1]) for r in results], [1600 + i for i in range(6)])
+            self.assertNotIn(str(os.getpid()), {r.split(":")[0] for r in results})
+            self.assertGreater(len({r.split(":")[0] for r in results}), 1)
+            self.assertLess(elapsed, 1.0)
+            
+            stats = pool.get_stats()
+            self.assertEqual(stats["completed"], 6)
+            self.assertEqual(stats["queue_depth"], 0)
+            self.assertEqual(len(stats["utilisation"]), 3)
+    
+    def test_error_propagates(self):
+        """测试工作进程中的异常通过 Future 抛出"""
+        with STTWorkerPool(_PidSTT(), workers=1) as pool:
+            with self.assertRaises(RuntimeError):
+                pool.submit("transcribe_pcm", np.zeros(3, dtype=np.float32)).result(timeout=10)
+            self.assertTrue(pool.transcribe_pcm(np.zeros(10, dtype=np.int16)).endswith(":10"))
+            self.assertEqual(pool.get_stats()["failed"], 1)
+    
+    def test_detailed_batch_in_worker(self):
+        """测试带置信度的批量转录在工作进程中执行，结果传回父进程"""
+        with STTWorkerPool(_PidSTT(), workers=1) as pool:
+            transcripts = pool.transcribe_batch_detailed([np.zeros(10, dtype=np.int16), np.zeros(20, dtype=np.int16)])
+            self.assertEqual([t.text.split(":")[1] for t in transcripts], ["10", "20"])
+            self.assertNotIn(str(os.getpid()), transcripts[0].text)
+    
+    def test_dead_worker_restarted(self):
+        """测试工作进程意外退出后任务失败并自动重启"""
+        with STTWorkerPool(_PidSTT(), workers=1) as pool:
+            with self.assertRaises(RuntimeError):
+                pool.submit("transcribe_pcm", np.zeros(5, dtype=np.float32)).result(timeout=10)
+            self.assertTrue(pool.transcribe_pcm(np.zeros(10, dtype=np.int16)).endswith(":10"))
+            self.assertEqual(pool.get_stats()["restarts"], 1)
+    
+    def test_worker_killed_during_other_request(self):
+        """测试一个工作进程退出时，另一个工作进程上进行中的请求照常完成"""
+        with STTWorkerPool(_PidSTT(delay=0.3), workers=2) as pool:
+            slow = pool.submit_pcm(np.zeros(1600, dtype=np.int16))
+            crash = pool.submit("transcribe_pcm", np.zeros(5, dtype=np.float32))
+            
+            with self.assertRaises(RuntimeError):
+                crash.result(timeout=10)
+            self.assertTrue(slow.result(timeout=10).endswith(":1600"))
+            
+            results = [f.result(timeout=10) for f in
+                       [pool.submit_pcm(np.zeros(100 + i, dtype=np.int16)) for i in range(4)]]
+            self.assertEqual([int(r.split(":")[1]) for r in results], [100 + i for i in range(4)])
+            stats = pool.get_stats()
+            self.assertEqual(stats["restarts"], 1)
+            self.assertEqual(len(stats["utilisation"]), 2)
+            self.assertEqual(len({r.split(":")[0] for r in results}), 2)
+    
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "需要 CPU 绑定")
+    def test_workers_pinned(self):
+        """测试工作进程按计划绑定 CPU"""
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        with STTWorkerPool(_PidSTT(), workers=2, cpu_affinity=[[cpu], [cpu]]) as pool:
+            self.assertEqual(pool.submit("affinity").result(timeout=10), [cpu])
+            self.assertEqual(pool.get_stats()["affinity"], [[cpu], [cpu]])
+    
+    def test_factory_wraps_engine(self):
+        """测试 get_stt_engine 的 workers 参数"""
+        pool = get_stt_engine("mock", workers=1)
+        try:
+            self.assertIsInstance(pool, STTWorkerPool)
+            self.assertEqual(pool.transcribe_pcm(np.zeros(1600, dtype=np.int16)), "这是模拟的语音识别结果")
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
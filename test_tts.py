@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+单元测试：系统 TTS 的合成命令
+"""
+
+import unittest
+import sys
+import os
+import subprocess
+from unittest import mock
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.espeak import EspeakLibrary
+from voice.pcm import PCMBuffer
+from voice.tts import SystemTTS
+
+
+def _system_tts(system="Linux", commands=("espeak",), **kwargs):
+    with mock.patch("platform.system", return_value=system), \
+            mock.patch("shutil.which", side_effect=lambda name: f"/usr/bin/{name}" if name in commands else None):
+        return SystemTTS(use_library=False, **kwargs)
+
+
+class _FakeLibrary:
+    """记录合成文本的进程内合成器"""
+
+    def __init__(self):
+        self.texts = []
+
+    def synthesize(self, text, voice=None, rate=None):
+        self.texts.append((text, voice, rate))
+        return PCMBuffer(np.zeros(2205, dtype=np.int16), 22050)
+
+
+class TestSystemTTS(unittest.TestCase):
+    """测试命令参数与文本传递"""
+
+    def test_prefers_espeak_ng(self):
+        """测试优先使用 espeak-ng，没有 espeak 时使用 festival"""
+        self.assertEqual(_system_tts(commands=("espeak", "espeak-ng")).command, "espeak-ng")
+        self.assertEqual(_system_tts(commands=("festival",)).command, "festival")
+        with self.assertRaises(RuntimeError):
+            _system_tts(commands=())
+
+    def test_text_passed_on_stdin(self):
+        """测试文本经标准输入传给 espeak，引号不需要转义"""
+        tts = _system_tts(voice="zh", rate=170)
+        text = '他说："今天天气不错" 和 \'明天\''
+        completed = subprocess.CompletedProcess([], 0, stdout=PCMBuffer(np.zeros(160, dtype=np.int16), 16000).to_wav_bytes())
+        with mock.patch("subprocess.run", return_value=completed) as run:
+            pcm = tts.text_to_pcm(text)
+
+        args, kwargs = run.call_args
+        self.assertEqual(args[0], ["espeak", "-v", "zh", "-s", "170", "--stdout"])
+        self.assertEqual(kwargs["input"], text.encode("utf-8"))
+        self.assertNotIn("shell", kwargs)
+        self.assertEqual(len(pcm), 160)
+
+    def test_say_reads_stdin(self):
+        """测试 macOS say 播放时从标准输入读取文本"""
+        tts = _system_tts(system="Darwin", rate=200)
+        with mock.patch("subprocess.run") as run:
+            tts.speak("你好")
+        self.assertEqual(run.call_args[0][0], ["say", "-r", "200", "-f", "-"])
+
+    def test_library_used_for_pcm(self):
+        """测试有进程内合成器时不再启动合成进程"""
+        tts = _system_tts()
+        tts.library = _FakeLibrary()
+        with mock.patch("subprocess.run") as run:
+            wav = tts.text_to_wav("你好")
+        run.assert_not_called()
+        self.assertEqual(tts.library.texts, [("你好", None, None)])
+        self.assertEqual(PCMBuffer.from_wav_bytes(wav).rate, 22050)
+
+    def test_shared_library_per_engine_settings(self):
+        """测试共用进程内合成器的两个引擎各自使用自己的语音与语速"""
+        lib = mock.MagicMock()
+        lib.espeak_Initialize.return_value = 22050
+        lib.espeak_GetParameter.return_value = 175
+        lib.espeak_SetVoiceByName.return_value = 0
+        state = {"voice": None, "speed": 175}
+        active = []
+        lib.espeak_SetVoiceByName.side_effect = lambda name: state.update(voice=name.decode()) or 0
+        lib.espeak_SetParameter.side_effect = lambda param, value, relative: state.update(speed=value)
+        lib.espeak_Synth.side_effect = lambda *args: active.append((state["voice"], state["speed"])) or 0
+        with mock.patch("ctypes.cdll.LoadLibrary", return_value=lib):
+            library = EspeakLibrary("libespeak-ng.so")
+
+        zh, en = _system_tts(voice="zh", rate=140), _system_tts(voice="en")
+        zh.library = en.library = library
+        for tts in (zh, en, zh, zh):
+            tts.text_to_pcm("你好")
+
+        self.assertEqual(active, [("zh", 140), ("en", 175), ("zh", 140), ("zh", 140)])
+        # 设置未变时不重复切换
+        self.assertEqual(lib.espeak_SetVoiceByName.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+单元测试：TTS 短语缓存
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.cache import TwoLevelCache
+from voice.pcm import PCMBuffer
+from voice.stt import MockSTT
+from voice.tts import MockTTS, get_tts_engine
+from voice.tts_cache import CachedTTS
+from voice.audio_io import MockAudioRecorder
+from voice.virtual_audio import VirtualAudioPlayer
+from voice.voice_session import VoiceSession, WELCOME_TEXT
+
+
+class _CountingTTS(MockTTS):
+    """记录合成次数的模拟 TTS"""
+
+    def __init__(self, voice="zh"):
+        self.voice = voice
+        self.synthesized = []
+        self.spoken = []
+
+    def text_to_pcm(self, text):
+        self.synthesized.append(text)
+        return PCMBuffer(np.full(len(text) * 160, 500, dtype=np.int16), 16000)
+
+    def speak(self, text):
+        self.spoken.append(text)
+
+    def cache_identity(self):
+        return f"counting:{self.voice}"
+
+
+class TestCachedTTS(unittest.TestCase):
+    """测试缓存命中与预热"""
+
+    def test_repeated_phrase_synthesized_once(self):
+        """测试相同短语（空白不同）只合成一次"""
+        engine = _CountingTTS()
+        tts = CachedTTS(engine)
+        first = tts.text_to_pcm("好的，再见！")
+        second = tts.text_to_pcm("  好的，再见！\n")
+
+        self.assertIs(first, second)
+        self.assertEqual(engine.synthesized, ["好的，再见！"])
+        self.assertEqual(tts.get_stats()["memory_hits"], 1)
+
+    def test_voice_in_key(self):
+        """测试不同语音的引擎不共用缓存"""
+        cache = TwoLevelCache()
+        zh, en = _CountingTTS("zh"), _CountingTTS("en")
+        CachedTTS(zh, cache).text_to_pcm("你好")
+        CachedTTS(en, cache).text_to_pcm("你好")
+        self.assertEqual((len(zh.synthesized), len(en.synthesized)), (1, 1))
+
+    def test_prewarmed_prompts_survive_eviction(self):
+        """测试预热的提示语不会被 LRU 淘汰"""
+        engine = _CountingTTS()
+        tts = CachedTTS(engine, TwoLevelCache(max_entries=2))
+        tts.prewarm([WELCOME_TEXT], background=False)
+        for i in range(5):
+            tts.text_to_pcm(f"第{i}句回复")
+
+        engine.synthesized.clear()
+        tts.text_to_pcm(WELCOME_TEXT)
+        self.assertEqual(engine.synthesized, [])
+        self.assertEqual(tts.get_stats()["pinned_hits"], 1)
+
+    def test_speak_plays_cached_pcm(self):
+        """测试有播放器时播放缓存的 PCM，没有时交给引擎"""
+        engine = _CountingTTS()
+        player = VirtualAudioPlayer()
+        tts = CachedTTS(engine, player=player)
+        tts.speak("好的，再见！")
+        tts.speak("好的，再见！")
+
+        self.assertEqual(engine.synthesized, ["好的，再见！"])
+        self.assertEqual(engine.spoken, [])
+        self.assertEqual(len(player.captured), 2)
+
+        CachedTTS(engine).speak("你好")
+        self.assertEqual(engine.spoken, ["你好"])
+
+    def test_factory_and_session(self):
+        """测试工厂函数启用缓存，会话把播放器交给缓存包装器"""
+        tts = get_tts_engine("mock", cache_size=8)
+        self.assertIsInstance(tts, CachedTTS)
+        self.assertIsInstance(get_tts_engine("mock"), MockTTS)
+
+        player = VirtualAudioPlayer()
+        VoiceSession(MockSTT(), tts, MockAudioRecorder(), player, lambda text: text)
+        self.assertIs(tts.player, player)
+
+
+if __name__ == "__main__":
+    unittest.main()
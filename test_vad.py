@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+单元测试：向量化帧特征与 VAD
+"""
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.vad import frame_features, frame_rms, EnergyVAD, get_vad
+
+
+class TestFrameFeatures(unittest.TestCase):
+    """测试帧特征计算"""
+    
+    def test_rms_and_peak(self):
+        """测试 RMS 与峰值"""
+        samples = np.array([100, -100, 100, -100, 0, 0, 0, 300], dtype=np.int16)
+        features = frame_features(samples, 4)
+        
+        self.assertEqual(len(features), 2)
+        self.assertAlmostEqual(float(features.rms[0]), 100.0, places=3)
+        self.assertEqual(features.peak.tolist(), [100.0, 300.0])
+        self.assertAlmostEqual(frame_rms(samples[:4]), 100.0, places=3)
+    
+    def test_zero_crossing_rate(self):
+        """测试过零率"""
+        samples = np.array([1, -1, 1, -1, 1, 1, 1, 1], dtype=np.int16)
+        features = frame_features(samples, 4)
+        
+        self.assertEqual(features.zcr.tolist(), [1.0, 0.0])
+    
+    def test_partial_frame_ignored(self):
+        """测试末尾不足一帧的部分被忽略"""
+        features = frame_features(np.ones(10, dtype=np.int16), 4)
+        self.assertEqual(len(features), 2)
+
+
+class TestEnergyVAD(unittest.TestCase):
+    """测试能量 VAD"""
+    
+    def test_speech_mask(self):
+        """测试整段缓冲区的逐帧判断"""
+        quiet = np.full(160, 50, dtype=np.int16)
+        loud = np.full(160, 2000, dtype=np.int16)
+        vad = get_vad("energy", threshold=500)
+        
+        mask = vad.speech_mask(np.concatenate([quiet, loud, quiet]), 160)
+        self.assertEqual(mask.tolist(), [False, True, False])
+        self.assertTrue(vad.is_speech(loud))
+        self.assertFalse(vad.is_speech(quiet))
+    
+    def test_zcr_limit(self):
+        """测试过零率上限过滤高频噪声"""
+        hiss = np.tile(np.array([2000, -2000], dtype=np.int16), 80)
+        vad = EnergyVAD(threshold=500, max_zcr=0.5)
+        
+        self.assertFalse(vad.is_speech(hiss))
+    
+    def test_unknown_engine(self):
+        """测试不支持的 VAD 类型"""
+        with self.assertRaises(ValueError):
+            get_vad("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
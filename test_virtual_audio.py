@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+单元测试：虚拟音频设备
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from voice.audio_io import get_audio_recorder, get_audio_player
+from voice.pcm import PCMBuffer
+from voice.virtual_audio import VirtualAudioRecorder, VirtualAudioPlayer, load_clips
+
+RATE = 16000
+
+
+def _tone(seconds, level=8000):
+    """生成 440Hz 正弦音"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (np.sin(2 * np.pi * 440 * t) * level).astype(np.int16)
+
+
+class TestVirtualAudioRecorder(unittest.TestCase):
+    """测试虚拟录音器"""
+    
+    def test_record_utterance_from_array(self):
+        """测试从数组回放并通过端点检测截取语音"""
+        recorder = get_audio_recorder(source=_tone(1.0), realtime=False)
+        pcm = recorder.record_utterance_pcm()
+        
+        self.assertIsInstance(recorder, VirtualAudioRecorder)
+        self.assertEqual(recorder.last_stats.reason, "endpoint")
+        self.assertAlmostEqual(recorder.last_stats.speech_ms, 1000, delta=60)
+        self.assertGreater(pcm.duration, 1.0)
+    
+    def test_record_fixed_duration(self):
+        """测试固定时长录音"""
+        recorder = VirtualAudioRecorder(_tone(2.0), realtime=False, lead_silence=0)
+        pcm = recorder.record_pcm(duration=0.5)
+        
+        self.assertAlmostEqual(pcm.duration, 0.5, delta=0.02)
+    
+    def test_directory_source_cycles(self):
+        """测试目录来源按顺序循环回放"""
+        with tempfile.TemporaryDirectory() as directory:
+            for name, seconds in (("a.wav", 0.2), ("b.wav", 0.4)):
+                with open(os.path.join(directory, name), 'wb') as f:
+                    f.write(PCMBuffer(_tone(seconds), RATE).to_wav_bytes())
+            
+            clips = load_clips(directory, RATE)
+            self.assertEqual([round(c.duration, 1) for c in clips], [0.2, 0.4])
+            
+            recorder = VirtualAudioRecorder(directory, realtime=False, loop=False,
+                                            lead_silence=0, tail_silence=0)
+            self.assertAlmostEqual(recorder.record_pcm(5.0).duration, 0.2, delta=0.02)
+            self.assertAlmostEqual(recorder.record_pcm(5.0).duration, 0.4, delta=0.02)
+            self.assertEqual(len(recorder.record_pcm(5.0)), 0)
+    
+    def test_float_array_resampled(self):
+        """测试浮点数组按录音器采样率解释"""
+        clips = load_clips(np.zeros(800, dtype=np.float32), RATE)
+        self.assertEqual(clips[0].rate, RATE)
+        self.assertEqual(len(clips[0]), 800)
+
+
+class TestVirtualAudioPlayer(unittest.TestCase):
+    """测试虚拟播放器"""
+    
+    def test_capture_output(self):
+        """测试捕获播放内容"""
+        player = get_audio_player(virtual=True)
+        player.play_pcm(PCMBuffer(_tone(0.5), RATE))
+        player.play_bytes(PCMBuffer(_tone(0.125, 100), 8000).to_wav_bytes())
+        
+        self.assertIsInstance(player, VirtualAudioPlayer)
+        self.assertAlmostEqual(player.played_seconds, 0.75, places=3)
+        self.assertAlmostEqual(player.captured_pcm().duration, 0.75, delta=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
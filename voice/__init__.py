@@ -6,6 +6,8 @@
 from .stt import WhisperSTT, MockSTT, get_stt_engine
 from .tts import get_tts_engine
 from .audio_io import get_audio_recorder, get_audio_player
+from .vad import get_vad
+from .model_registry import get_model_registry, preload_model
 
 __all__ = [
     'WhisperSTT',
@@ -13,5 +15,8 @@ __all__ = [
     'get_stt_engine',
     'get_tts_engine',
     'get_audio_recorder',
-    'get_audio_player'
+    'get_audio_player',
+    'get_vad',
+    'get_model_registry',
+    'preload_model'
 ]
@@ -0,0 +1,283 @@
+"""
+自适应 STT 模块
+按每句话的实时率（RTF，解码耗时 / 音频时长）在模型尺寸与解码设置之间切换：
+空闲时逐级提高准确率，超出延迟预算时立即降级
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .pcm import PCMBuffer, WHISPER_SAMPLE_RATE
+from .stt import AudioInput, STTBase, Transcript, load_wav_audio, to_whisper_input
+
+# 各尺寸模型相对 tiny 的大致解码耗时，用于估计尚未测量过的档位
+_MODEL_COST = {"tiny": 1.0, "base": 2.0, "small": 6.0, "medium": 16.0, "large": 32.0}
+# 束搜索（宽度 5）与温度回退相对贪心解码的耗时倍数
+_BEAM_COST = 1.8
+_FALLBACK_COST = 1.1
+
+
+class DecodeTier:
+    """一个档位：模型尺寸加解码设置"""
+
+    def __init__(self, model_name: str, beam_size: Optional[int] = None, temperature_fallback: bool = False):
+        self.model_name = model_name
+        self.beam_size = beam_size
+        self.temperature_fallback = temperature_fallback
+
+    @property
+    def cost(self) -> float:
+        """相对 tiny 贪心解码的预估耗时"""
+        cost = _MODEL_COST.get(self.model_name.split(".")[0].split("-")[0], 4.0)
+        if self.beam_size and self.beam_size > 1:
+            cost *= _BEAM_COST
+        if self.temperature_fallback:
+            cost *= _FALLBACK_COST
+        return cost
+
+    @property
+    def label(self) -> str:
+        decoding = f"beam{self.beam_size}" if self.beam_size else "greedy"
+        return f"{self.model_name}/{decoding}" + ("+fallback" if self.temperature_fallback else "")
+
+    def __repr__(self) -> str:
+        return f"DecodeTier({self.label})"
+
+
+def build_ladder(models: Sequence[str] = ("tiny", "base", "small")) -> List[DecodeTier]:
+    """
+    由模型列表生成从快到准的档位：每个模型先贪心解码，再束搜索加温度回退
+
+    Args:
+        models: 按从小到大排列的模型名称
+    """
+    ladder = []
+    for model_name in models:
+        ladder.append(DecodeTier(model_name))
+        ladder.append(DecodeTier(model_name, beam_size=5, temperature_fallback=True))
+    return ladder
+
+
+class AdaptiveSTT(STTBase):
+    """按实时率自动切换档位的 STT"""
+
+    def __init__(
+        self,
+        ladder: Optional[List[DecodeTier]] = None,
+        latency_budget_ms: float = 1500.0,
+        headroom: float = 0.6,
+        patience: int = 3,
+        start_level: int = 0,
+        engine_factory: Optional[Callable[[DecodeTier], STTBase]] = None,
+        **whisper_kwargs
+    ):
+        """
+        初始化自适应 STT
+
+        Args:
+            ladder: 从快到准排列的档位，默认 build_ladder()
+            latency_budget_ms: 每句话转录耗时的预算（毫秒）
+            headroom: 预计升档后的耗时不超过预算的这个比例时才考虑升档
+            patience: 连续多少句都有余量才升档（降档不等待）
+            start_level: 初始档位
+            engine_factory: 为档位创建引擎的函数，默认在后台加载的 WhisperSTT
+            **whisper_kwargs: 传给 WhisperSTT 的其他参数（language、device、short_utterance 等）
+        """
+        self.ladder = ladder or build_ladder()
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.headroom = headroom
+        self.patience = max(1, patience)
+        self.engine_factory = engine_factory or self._whisper_engine
+        self.whisper_kwargs = whisper_kwargs
+
+        self.level = min(max(0, start_level), len(self.ladder) - 1)
+        self.switches = 0
+        self.utterances = 0
+        self.last_rtf = 0.0
+
+        self._rtf: Dict[int, float] = {}
+        self._typical_seconds = 3.0
+        self._streak = 0
+        self._engines: Dict[int, STTBase] = {}
+        self._lock = threading.Lock()
+        self._engine(self.level)
+
+    def _whisper_engine(self, tier: DecodeTier) -> STTBase:
+        from .stt import WhisperSTT
+        return WhisperSTT(
+            model_name=tier.model_name,
+            beam_size=tier.beam_size,
+            temperature_fallback=tier.temperature_fallback,
+            lazy=True,
+            **self.whisper_kwargs
+        )
+
+    def _engine(self, level: int) -> STTBase:
+        """取得档位对应的引擎（首次使用时创建，Whisper 在后台加载）"""
+        with self._lock:
+            engine = self._engines.get(level)
+            if engine is None:
+                engine = self.engine_factory(self.ladder[level])
+                self._engines[level] = engine
+            return engine
+
+    def _loaded_engine(self, level: int) -> STTBase:
+        """取得档位的引擎并等待后台加载完成（加载耗时不计入实时率）"""
+        engine = self._engine(level)
+        ready = getattr(engine, "ready", None)
+        if ready is not None:
+            ready.wait()
+        return engine
+
+    def _ready(self, level: int) -> bool:
+        ready = getattr(self._engine(level), "ready", None)
+        return ready is None or ready.is_set()
+
+    @property
+    def tier(self) -> DecodeTier:
+        """当前档位"""
+        return self.ladder[self.level]
+
+    def estimated_rtf(self, level: int) -> float:
+        """档位的实时率：测量过的用测量值，否则按耗时比例由当前档位推算"""
+        with self._lock:
+            return self._estimated_rtf(level)
+
+    def _estimated_rtf(self, level: int) -> float:
+        if level in self._rtf:
+            return self._rtf[level]
+        if self.level in self._rtf:
+            return self._rtf[self.level] * self.ladder[level].cost / self.ladder[self.level].cost
+        return 0.0
+
+    def observe(self, level: int, audio_seconds: float, elapsed: float) -> None:
+        """
+        记录一句话的转录耗时，并据此调整档位
+
+        Args:
+            level: 转录所用的档位
+            audio_seconds: 音频时长（秒）
+            elapsed: 转录耗时（秒）
+        """
+        if audio_seconds <= 0:
+            return
+        rtf = elapsed / audio_seconds
+        upgrade = None
+        with self._lock:
+            self.utterances += 1
+            self.last_rtf = rtf
+            # 实时率反映当前负载，近期的测量权重更高
+            previous = self._rtf.get(level)
+            self._rtf[level] = rtf if previous is None else 0.5 * previous + 0.5 * rtf
+            self._typical_seconds = 0.8 * self._typical_seconds + 0.2 * audio_seconds
+            if level != self.level:
+                return
+
+            if elapsed > self.latency_budget:
+                self._streak = 0
+                target = self.level
+                # 一次降到预计能满足预算的档位
+                while target > 0 and self._estimated_rtf(target) * audio_seconds > self.latency_budget:
+                    target -= 1
+                self._switch(target)
+                return
+
+            if self.level + 1 >= len(self.ladder):
+                return
+            predicted = self._estimated_rtf(self.level + 1) * self._typical_seconds
+            if predicted > self.latency_budget * self.headroom:
+                self._streak = 0
+                return
+            self._streak += 1
+            if self._streak >= self.patience:
+                upgrade = self.level + 1
+
+        if upgrade is not None:
+            # 先在后台加载更大的模型，加载完成后的下一句再切换
+            if self._ready(upgrade):
+                with self._lock:
+                    self._streak = 0
+                    self._switch(upgrade)
+
+    def _switch(self, level: int) -> None:
+        """切换档位（需持有锁）"""
+        if level == self.level:
+            return
+        print(f"🔀 STT 档位 {self.ladder[self.level].label} → {self.ladder[level].label} "
+              f"(RTF {self.last_rtf:.2f})")
+        self.level = level
+        self.switches += 1
+
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """用当前档位转录，并记录实时率"""
+        return self.transcribe_detailed(pcm, sample_rate).text
+
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Transcript:
+        """用当前档位转录并附带置信度，记录实时率"""
+        audio = to_whisper_input(pcm, sample_rate)
+        if len(audio) == 0:
+            return Transcript("")
+        level = self.level
+        engine = self._loaded_engine(level)
+        started = time.perf_counter()
+        transcript = engine.transcribe_detailed(audio, WHISPER_SAMPLE_RATE)
+        self.observe(level, len(audio) / WHISPER_SAMPLE_RATE, time.perf_counter() - started)
+        return transcript
+
+    def transcribe_bytes(self, audio_bytes: bytes) -> str:
+        """转录音频字节流（非 WAV 格式不计入实时率）"""
+        try:
+            pcm = PCMBuffer.from_wav_bytes(audio_bytes)
+        except Exception:
+            return self._engine(self.level).transcribe_bytes(audio_bytes)
+        return self.transcribe_pcm(pcm)
+
+    def transcribe_file(self, audio_path: str) -> str:
+        """转录音频文件（非 WAV 格式不计入实时率）"""
+        audio = load_wav_audio(audio_path)
+        if audio is None:
+            return self._engine(self.level).transcribe_file(audio_path)
+        return self.transcribe_pcm(audio, WHISPER_SAMPLE_RATE)
+
+    def transcribe_batch(self, items, sample_rate: Optional[int] = None) -> List[str]:
+        """整批用当前档位转录，以最长的一段计算实时率"""
+        return self._batch("transcribe_batch", items, sample_rate, "")
+
+    def transcribe_batch_detailed(self, items, sample_rate: Optional[int] = None) -> List[Transcript]:
+        """整批用当前档位转录并附带置信度，以最长的一段计算实时率"""
+        return self._batch("transcribe_batch_detailed", items, sample_rate, Transcript(""))
+
+    def _batch(self, method: str, items, sample_rate: Optional[int], empty) -> list:
+        audios = [to_whisper_input(item, sample_rate) for item in items]
+        longest = max((len(audio) for audio in audios), default=0)
+        if longest == 0:
+            return [empty] * len(audios)
+        level = self.level
+        engine = self._loaded_engine(level)
+        started = time.perf_counter()
+        results = getattr(engine, method)(audios, WHISPER_SAMPLE_RATE)
+        self.observe(level, longest / WHISPER_SAMPLE_RATE, time.perf_counter() - started)
+        return results
+
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """流式窗口由当前档位解码（窗口反复重解，不计入实时率）"""
+        return self._engine(self.level).decode_window(audio, prompt)
+
+    def cache_identity(self) -> str:
+        """结果随档位变化，缓存键包含整个档位序列"""
+        return "adaptive:" + ",".join(tier.label for tier in self.ladder)
+
+    def get_stats(self) -> dict:
+        """返回当前档位、切换次数与各档位的实时率"""
+        with self._lock:
+            return {
+                "tier": self.tier.label,
+                "level": self.level,
+                "switches": self.switches,
+                "utterances": self.utterances,
+                "last_rtf": round(self.last_rtf, 3),
+                "rtf": {self.ladder[level].label: round(rtf, 3) for level, rtf in sorted(self._rtf.items())},
+            }
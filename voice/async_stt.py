@@ -0,0 +1,182 @@
+"""
+异步语音识别模块
+在专用线程池中执行 STT，供 asyncio 事件循环使用：转录与大模型网络请求、音频采集在同一个事件循环中重叠，
+并发数有上限，取消协程时未开始的转录直接出队
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+import numpy as np
+
+from .streaming_stt import StreamUpdate
+
+
+class STTExecutor:
+    """STT 专用执行器"""
+
+    def __init__(self, max_concurrency: int = 1):
+        """
+        初始化执行器
+
+        Args:
+            max_concurrency: 同时执行的转录数上限（线程数）；进程内的单个 Whisper 模型一次只能推理一个请求，
+                使用工作进程池或微批调度时可以调大
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.running = 0
+        self.peak_running = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="stt-async")
+        self._lock = threading.Lock()
+
+    def _call(self, fn: Callable, args: tuple):
+        with self._lock:
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        """
+        在执行器中调用同步函数并等待结果
+
+        协程被取消时：还在排队的调用直接出队；已经开始的调用无法中断，结果被丢弃
+
+        Args:
+            fn: 同步函数
+            *args: 参数
+
+        Returns:
+            fn 的返回值
+        """
+        with self._lock:
+            self.submitted += 1
+        future = self._executor.submit(self._call, fn, args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.cancelled += 1
+            raise
+
+    def get_stats(self) -> dict:
+        """返回提交、完成、取消的调用数与并发情况"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "running": self.running,
+                "peak_running": self.peak_running,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭执行器，取消还在排队的调用"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: Optional[STTExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_stt_executor(max_concurrency: int = 1) -> STTExecutor:
+    """
+    获取进程共享的 STT 执行器
+
+    Args:
+        max_concurrency: 首次创建时的并发上限（之后的调用沿用已创建的执行器）
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = STTExecutor(max_concurrency)
+    return _executor
+
+
+async def transcribe_async(engine, pcm, sample_rate: Optional[int] = None,
+                           executor: Optional[STTExecutor] = None) -> str:
+    """
+    异步转录内存中的音频
+
+    Args:
+        engine: STT 引擎
+        pcm: PCMBuffer 或 NumPy 数组
+        sample_rate: 数组的采样率
+        executor: 执行器，默认为 get_stt_executor()
+
+    Returns:
+        识别文本
+    """
+    executor = executor or get_stt_executor()
+    return await executor.run(engine.transcribe_pcm, pcm, sample_rate)
+
+
+async def stream_async(engine, frames: AsyncIterable[np.ndarray], executor: Optional[STTExecutor] = None,
+                       **kwargs) -> AsyncIterator[StreamUpdate]:
+    """
+    异步流式转录：从异步迭代器读取音频帧，边读边在执行器中解码
+
+    读取音频帧不会被解码阻塞；解码跟不上时中间的音频合并到下一次解码窗口。
+    最后一个结果的 final 为 True；提前退出迭代或取消协程时丢弃剩余音频
+
+    Args:
+        engine: STT 引擎
+        frames: int16 音频帧的异步迭代器（单声道，采样率为 rate）
+        executor: 执行器，默认为 get_stt_executor()
+        **kwargs: StreamingTranscriber 的配置参数（rate, step_ms, window_seconds 等）
+
+    Yields:
+        StreamUpdate
+    """
+    executor = executor or get_stt_executor()
+    kwargs.pop("background", None)
+    # 创建流可能触发模型加载（首次使用或被淘汰后），不能阻塞事件循环
+    stream = await executor.run(functools.partial(engine.start_stream, background=False, **kwargs))
+    wakeup = asyncio.Event()
+    ended = False
+
+    async def pump() -> None:
+        nonlocal ended
+        try:
+            async for frame in frames:
+                stream.append(frame)
+                if stream.decode_due:
+                    wakeup.set()
+        finally:
+            ended = True
+            wakeup.set()
+
+    reader = asyncio.ensure_future(pump())
+    try:
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            if ended:
+                break
+            update = await executor.run(stream.poll)
+            if update is not None:
+                yield update
+
+        # 音频源出错时把异常交给调用方
+        await reader
+        text = await executor.run(stream.finish)
+        final = stream.last_update
+        if final is None or not final.final:
+            final = StreamUpdate(committed=text, partial="", final=True, audio_seconds=0.0, decode_ms=0.0)
+        yield final
+    finally:
+        reader.cancel()
+        stream.cancel()
@@ -3,11 +3,18 @@
 处理录音和播放功能
 """
 
-import wave
-import struct
-import tempfile
-import os
-from typing import Optional, Tuple
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterable, Iterator, Optional
+
+import numpy as np
+
+from .capture import CaptureEngine, FrameSubscription
+from .vad import VADBase, EnergyVAD
+from .endpoint import Endpointer, UtteranceStats
+from .pcm import PCMBuffer
+from .devices import AudioDeviceManager, get_device_manager
+from .playback import JitterBuffer, OutputMeter, PCMChunk
 
 # pyaudio 是可选依赖
 try:
@@ -16,31 +23,34 @@ try:
 except ImportError:
     PYAUDIO_AVAILABLE = False
 
+# 等待单帧的最长时间（秒），超时视为输入设备已停止
+_FRAME_TIMEOUT = 2.0
 
-class AudioRecorder:
-    """音频录制器"""
+
+class BaseRecorder(ABC):
+    """录音器基类：子类提供实时帧订阅，录音/端点检测逻辑在这里共享"""
     
-    def __init__(self, rate: int = 16000, channels: int = 1, chunk: int = 1024):
+    def __init__(self, rate: int, channels: int, frame_size: int, vad: Optional[VADBase] = None):
         """
-        初始化录音器
+        初始化录音逻辑
         
         Args:
             rate: 采样率
             channels: 声道数
-            chunk: 缓冲区大小
+            frame_size: 每帧采样点数
+            vad: 语音活动检测器（可选）
         """
-        if not PYAUDIO_AVAILABLE:
-            raise ImportError(
-                "录音功能需要 pyaudio。\n"
-                "请运行: pip install pyaudio\n"
-                "macOS 用户可能需要先运行: brew install portaudio"
-            )
-        
         self.rate = rate
         self.channels = channels
-        self.chunk = chunk
-        self.format = pyaudio.paInt16
-        self.p = pyaudio.PyAudio()
+        self.chunk = frame_size
+        self.vad = vad
+        self.endpointer = Endpointer(rate=rate, vad=vad)
+        self.last_stats: Optional[UtteranceStats] = None
+    
+    @abstractmethod
+    def listen(self, preroll_ms: float = 0.0) -> ContextManager[FrameSubscription]:
+        """订阅实时音频帧（上下文管理器，产出带 get(timeout) 方法的订阅对象）"""
+        pass
     
     def record(self, duration: float = 3.0) -> bytes:
         """
@@ -52,109 +62,261 @@ class AudioRecorder:
         Returns:
             WAV 格式的音频字节流
         """
-        print(f"🎤 录音中... ({duration}秒)")
+        return self.record_pcm(duration).to_wav_bytes()
+    
+    def record_pcm(self, duration: float = 3.0) -> PCMBuffer:
+        """
+        录制音频，直接返回内存中的 PCM
         
-        stream = self.p.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            input=True,
-            frames_per_buffer=self.chunk
-        )
+        Args:
+            duration: 录音时长（秒）
+            
+        Returns:
+            PCM 缓冲区
+        """
+        print(f"🎤 录音中... ({duration}秒)")
         
         frames = []
-        for _ in range(0, int(self.rate / self.chunk * duration)):
-            data = stream.read(self.chunk)
-            frames.append(data)
-        
-        stream.stop_stream()
-        stream.close()
+        needed = int(self.rate * duration) * self.channels
+        collected = 0
+        with self.listen() as subscription:
+            while collected < needed:
+                frame = subscription.get(timeout=_FRAME_TIMEOUT)
+                if frame is None:
+                    break
+                frames.append(frame)
+                collected += len(frame)
         
         print("✅ 录音完成")
-        
-        # 转换为 WAV 格式
-        return self._frames_to_wav(frames)
+        return self._frames_to_pcm(frames)
     
-    def record_until_silence(self, timeout: float = 10.0, silence_threshold: int = 500) -> bytes:
+    def record_until_silence(
+        self,
+        timeout: float = 10.0,
+        silence_threshold: int = 500,
+        vad: Optional[VADBase] = None
+    ) -> bytes:
         """
         录音直到检测到静音
         
         Args:
             timeout: 最大录音时长
-            silence_threshold: 静音阈值
+            silence_threshold: 静音阈值（帧 RMS，未指定 VAD 时使用）
+            vad: 语音活动检测器（可选，覆盖初始化时的设置）
             
         Returns:
             WAV 格式的音频字节流
         """
         print("🎤 录音中... (检测静音自动停止)")
         
-        stream = self.p.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            input=True,
-            frames_per_buffer=self.chunk
-        )
-        
+        vad = vad or self.vad or EnergyVAD(silence_threshold)
+        vad.reset()
         frames = []
-        silent_chunks = 0
-        max_chunks = int(self.rate / self.chunk * timeout)
+        silent_frames = 0
+        # 与旧版 20 个 1024 点缓冲区的静音时长保持一致
+        max_silent_frames = int(20 * 1024 / self.chunk)
+        max_frames = int(self.rate / self.chunk * timeout)
         
-        for _ in range(max_chunks):
-            data = stream.read(self.chunk)
-            frames.append(data)
-            
-            # 计算音量
-            volume = self._calculate_volume(data)
-            if volume < silence_threshold:
-                silent_chunks += 1
-                if silent_chunks > 20:  # 约 0.5 秒静音
+        with self.listen() as subscription:
+            for _ in range(max_frames):
+                frame = subscription.get(timeout=_FRAME_TIMEOUT)
+                if frame is None:
                     break
-            else:
-                silent_chunks = 0
-        
-        stream.stop_stream()
-        stream.close()
+                frames.append(frame)
+                
+                if not vad.is_speech(frame):
+                    silent_frames += 1
+                    if silent_frames > max_silent_frames:
+                        break
+                else:
+                    silent_frames = 0
         
         print("✅ 录音完成")
-        return self._frames_to_wav(frames)
+        return self._frames_to_pcm(frames).to_wav_bytes()
+    
+    def record_utterance(self, endpointer: Optional[Endpointer] = None) -> bytes:
+        """
+        录制一句话：自适应噪声底检测起止点，保留 pre-roll，静音拖尾后自动停止
+        
+        Args:
+            endpointer: 端点检测器（可选，默认使用录音器自带的实例以延续噪声底）
+            
+        Returns:
+            WAV 格式的音频字节流；未检测到语音时返回空字节串
+        """
+        pcm = self.record_utterance_pcm(endpointer)
+        return pcm.to_wav_bytes() if pcm else b""
+    
+    def record_utterance_pcm(self, endpointer: Optional[Endpointer] = None,
+                             on_speech_frame: Optional[Callable[[np.ndarray], None]] = None) -> PCMBuffer:
+        """
+        录制一句话，直接返回内存中的 PCM
+        
+        Args:
+            endpointer: 端点检测器（可选）
+            on_speech_frame: 语音起点之后（含 pre-roll）每一帧的回调，用于边录边转录
+            
+        Returns:
+            PCM 缓冲区；未检测到语音时为空
+        """
+        print("🎤 请说话...")
+        
+        endpointer = endpointer or self.endpointer
+        endpointer.reset()
+        with self.listen() as subscription:
+            return self._endpoint(endpointer, subscription, on_speech_frame)
     
-    def _frames_to_wav(self, frames: list) -> bytes:
-        """将音频帧转换为 WAV 格式字节流"""
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
+    def continue_utterance(self, subscription, initial_frames: Iterable[np.ndarray] = ()) -> PCMBuffer:
+        """
+        在已打开的帧订阅上接着录完一句话（用于插话：语音已经开始）
         
-        wf = wave.open(tmp_path, 'wb')
-        wf.setnchannels(self.channels)
-        wf.setsampwidth(self.p.get_sample_size(self.format))
-        wf.setframerate(self.rate)
-        wf.writeframes(b''.join(frames))
-        wf.close()
+        Args:
+            subscription: listen() 产出的帧订阅
+            initial_frames: 已经读出的帧（插话起点及之前的音频）
+            
+        Returns:
+            PCM 缓冲区；未检测到语音时为空
+        """
+        # 语音已经开始：第一帧语音即触发，跳过校准并沿用已学习的噪声底
+        base = self.endpointer
+        to_ms = 1000.0 / self.rate
+        endpointer = Endpointer(
+            rate=self.rate,
+            preroll_ms=base.preroll * to_ms,
+            hangover_ms=base.hangover * to_ms,
+            min_speech_ms=1.0,
+            max_duration=base.max_samples / float(self.rate),
+            floor_ratio=base.floor_ratio,
+            min_threshold=base.min_threshold,
+            initial_floor=base.noise_floor,
+            calibration_ms=0.0,
+            vad=base.vad
+        )
+        for frame in initial_frames:
+            endpointer.process(frame)
+        return self._endpoint(endpointer, subscription)
+    
+    def _endpoint(self, endpointer: Endpointer, subscription,
+                  on_speech_frame: Optional[Callable[[np.ndarray], None]] = None) -> PCMBuffer:
+        """从帧订阅读取音频直到端点检测结束"""
+        forwarded = 0
+        while not endpointer.done:
+            frame = subscription.get(timeout=_FRAME_TIMEOUT)
+            if frame is None:
+                break
+            endpointer.process(frame)
+            if on_speech_frame is not None:
+                frames = endpointer.frames
+                for speech_frame in frames[forwarded:]:
+                    on_speech_frame(speech_frame)
+                forwarded = len(frames)
         
-        with open(tmp_path, 'rb') as f:
-            wav_bytes = f.read()
+        self.last_stats = endpointer.stats
+        audio = endpointer.audio()
+        if len(audio) == 0:
+            print("🔇 未检测到语音")
+            return PCMBuffer.empty(self.rate, self.channels)
         
-        os.unlink(tmp_path)
-        return wav_bytes
+        print(f"✅ 录音完成 (语音 {endpointer.stats.speech_ms / 1000:.1f}秒)")
+        return PCMBuffer(audio, self.rate, self.channels)
     
-    def _calculate_volume(self, data: bytes) -> int:
-        """计算音频数据的音量"""
-        count = len(data) // 2
-        format = "%dh" % count
-        shorts = struct.unpack(format, data)
-        return sum(abs(short) for short in shorts) // count
+    def _frames_to_pcm(self, frames: list) -> PCMBuffer:
+        """将音频帧拼接为 PCM 缓冲区"""
+        return PCMBuffer.from_frames(frames, self.rate, self.channels)
+
+
+class AudioRecorder(BaseRecorder):
+    """音频录制器"""
+    
+    def __init__(
+        self,
+        rate: int = 16000,
+        channels: int = 1,
+        chunk: Optional[int] = None,
+        frame_ms: float = 20.0,
+        buffer_seconds: float = 30.0,
+        vad: Optional[VADBase] = None,
+        devices: Optional[AudioDeviceManager] = None
+    ):
+        """
+        初始化录音器
+        
+        Args:
+            rate: 采样率
+            channels: 声道数
+            chunk: 每帧采样点数（可选，设置后覆盖 frame_ms）
+            frame_ms: 每帧时长（毫秒）
+            buffer_seconds: 采集环形缓冲区时长（秒）
+            vad: 语音活动检测器（可选，默认按 silence_threshold 使用能量 VAD）
+            devices: 音频设备管理器（可选，默认使用进程共享实例）
+        """
+        if not PYAUDIO_AVAILABLE:
+            raise ImportError(
+                "录音功能需要 pyaudio。\n"
+                "请运行: pip install pyaudio\n"
+                "macOS 用户可能需要先运行: brew install portaudio"
+            )
+        
+        if chunk is not None:
+            frame_ms = chunk * 1000.0 / rate
+        self.format = pyaudio.paInt16
+        self.devices = devices or get_device_manager()
+        self.p = self.devices.pa
+        self.engine = CaptureEngine(
+            self.devices,
+            rate=rate,
+            channels=channels,
+            frame_ms=frame_ms,
+            buffer_seconds=buffer_seconds
+        )
+        super().__init__(rate, channels, self.engine.frame_size, vad)
+    
+    def start_capture(self) -> None:
+        """启动常驻采集，之后的录音直接订阅已在运行的输入流"""
+        self.engine.start()
+    
+    def stop_capture(self) -> None:
+        """停止常驻采集"""
+        self.engine.stop()
+    
+    @contextmanager
+    def listen(self, preroll_ms: float = 0.0) -> Iterator[FrameSubscription]:
+        """
+        订阅实时音频帧，未启动常驻采集时在订阅期间临时采集
+        
+        Args:
+            preroll_ms: 先补发的历史音频时长（毫秒）
+            
+        Yields:
+            帧订阅对象
+        """
+        started_here = not self.engine.running
+        if started_here:
+            self.engine.start()
+        subscription = self.engine.subscribe(preroll_ms=preroll_ms)
+        try:
+            yield subscription
+        finally:
+            subscription.close()
+            if started_here:
+                self.engine.stop()
     
     def __del__(self):
-        """清理资源"""
-        if hasattr(self, 'p'):
-            self.p.terminate()
+        """清理资源（PortAudio 由设备管理器统一释放）"""
+        if hasattr(self, 'engine'):
+            self.engine.close()
 
 
 class AudioPlayer:
     """音频播放器"""
     
-    def __init__(self):
-        """初始化播放器"""
+    def __init__(self, devices: Optional[AudioDeviceManager] = None):
+        """
+        初始化播放器
+        
+        Args:
+            devices: 音频设备管理器（可选，默认使用进程共享实例）
+        """
         if not PYAUDIO_AVAILABLE:
             raise ImportError(
                 "播放功能需要 pyaudio。\n"
@@ -162,7 +324,10 @@ class AudioPlayer:
                 "macOS 用户可能需要先运行: brew install portaudio"
             )
         
-        self.p = pyaudio.PyAudio()
+        self.devices = devices or get_device_manager()
+        self.p = self.devices.pa
+        self._active: Optional[JitterBuffer] = None
+        self.meter = OutputMeter()
     
     def play_wav(self, wav_path: str) -> None:
         """
@@ -171,23 +336,7 @@ class AudioPlayer:
         Args:
             wav_path: WAV 文件路径
         """
-        wf = wave.open(wav_path, 'rb')
-        
-        stream = self.p.open(
-            format=self.p.get_format_from_width(wf.getsampwidth()),
-            channels=wf.getnchannels(),
-            rate=wf.getframerate(),
-            output=True
-        )
-        
-        data = wf.readframes(1024)
-        while data:
-            stream.write(data)
-            data = wf.readframes(1024)
-        
-        stream.stop_stream()
-        stream.close()
-        wf.close()
+        self.play_pcm(PCMBuffer.from_wav_file(wav_path))
     
     def play_bytes(self, wav_bytes: bytes) -> None:
         """
@@ -196,32 +345,103 @@ class AudioPlayer:
         Args:
             wav_bytes: WAV 格式的音频字节流
         """
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_file.write(wav_bytes)
-            tmp_path = tmp_file.name
+        self.play_pcm(PCMBuffer.from_wav_bytes(wav_bytes))
+    
+    def play_pcm(self, pcm: PCMBuffer) -> None:
+        """
+        播放内存中的 PCM
         
-        self.play_wav(tmp_path)
-        os.unlink(tmp_path)
+        Args:
+            pcm: PCM 缓冲区
+        """
+        self.play_stream([pcm], channels=pcm.channels, prebuffer_ms=0.0)
     
-    def __del__(self):
-        """清理资源"""
-        if hasattr(self, 'p'):
-            self.p.terminate()
+    def play_stream(
+        self,
+        chunks: Iterable[PCMChunk],
+        rate: Optional[int] = None,
+        channels: int = 1,
+        prebuffer_ms: float = 120.0
+    ) -> None:
+        """
+        边到达边播放音频块，多个块之间无缝衔接
+        
+        Args:
+            chunks: 音频块的可迭代对象（PCMBuffer、NumPy 数组或 int16 字节），可以是生成器
+            rate: 输出采样率，默认取第一个音频块的采样率，其余块即时重采样
+            channels: 输出声道数
+            prebuffer_ms: 抖动缓冲的预缓冲时长（毫秒）
+        """
+        buffer = JitterBuffer(chunks, rate=rate, channels=channels, prebuffer_ms=prebuffer_ms)
+        self._active = buffer
+        buffer.start()
+        try:
+            stream_rate = buffer.wait_format()
+            if stream_rate is None:
+                return
+            stream = self.devices.acquire_output(stream_rate, channels)
+            try:
+                for block in buffer.blocks(1024):
+                    stream.write(block.tobytes())
+                    self.meter.update(block)
+            finally:
+                self.devices.release_output(stream)
+        finally:
+            buffer.stop()
+            self._active = None
+    
+    @property
+    def playing(self) -> bool:
+        """是否正在播放"""
+        return self._active is not None
+    
+    def stop(self) -> None:
+        """立即中止当前播放"""
+        buffer = self._active
+        if buffer is not None:
+            buffer.stop()
 
 
 class MockAudioRecorder:
     """模拟录音器，用于测试"""
     
+    last_stats = None
+    
     def record(self, duration: float = 3.0) -> bytes:
         """模拟录音"""
         print(f"[模拟] 录音 {duration} 秒")
         # 返回一个简单的 WAV 头部
         return b'RIFF' + b'\x00' * 40
     
-    def record_until_silence(self, timeout: float = 10.0, silence_threshold: int = 500) -> bytes:
+    def record_until_silence(
+        self,
+        timeout: float = 10.0,
+        silence_threshold: int = 500,
+        vad: Optional[VADBase] = None
+    ) -> bytes:
         """模拟录音"""
         print(f"[模拟] 录音直到静音")
         return b'RIFF' + b'\x00' * 40
+    
+    def record_utterance(self, endpointer: Optional[Endpointer] = None) -> bytes:
+        """模拟录音"""
+        print("[模拟] 录制一句话")
+        return b'RIFF' + b'\x00' * 40
+    
+    def record_pcm(self, duration: float = 3.0) -> PCMBuffer:
+        """模拟录音，返回静音 PCM"""
+        print(f"[模拟] 录音 {duration} 秒")
+        return PCMBuffer(np.zeros(int(16000 * duration), dtype=np.int16), 16000)
+    
+    def record_utterance_pcm(self, endpointer: Optional[Endpointer] = None,
+                             on_speech_frame: Optional[Callable[[np.ndarray], None]] = None) -> PCMBuffer:
+        """模拟录音，返回一秒静音 PCM"""
+        print("[模拟] 录制一句话")
+        pcm = PCMBuffer(np.zeros(16000, dtype=np.int16), 16000)
+        if on_speech_frame is not None:
+            for frame in pcm.chunks(320):
+                on_speech_frame(frame)
+        return pcm
 
 
 class MockAudioPlayer:
@@ -234,17 +454,63 @@ class MockAudioPlayer:
     def play_bytes(self, wav_bytes: bytes) -> None:
         """模拟播放"""
         print(f"[模拟] 播放音频字节流 ({len(wav_bytes)} bytes)")
+    
+    def play_pcm(self, pcm: PCMBuffer) -> None:
+        """模拟播放"""
+        print(f"[模拟] 播放 PCM ({pcm.duration:.2f} 秒)")
+    
+    def play_stream(self, chunks: Iterable[PCMChunk], rate: Optional[int] = None,
+                    channels: int = 1, prebuffer_ms: float = 120.0) -> None:
+        """模拟流式播放"""
+        count = sum(1 for _ in chunks)
+        print(f"[模拟] 流式播放 {count} 个音频块")
+    
+    playing = False
+    
+    def stop(self) -> None:
+        """模拟中止"""
+        pass
 
 
-def get_audio_recorder(mock: bool = False) -> AudioRecorder:
-    """获取录音器实例"""
+def get_audio_recorder(mock: bool = False, source=None, realtime: bool = True, **kwargs) -> BaseRecorder:
+    """
+    获取录音器实例
+    
+    Args:
+        mock: 是否使用模拟录音器
+        source: 虚拟音频来源（WAV 文件、目录或 NumPy 数组），指定时不需要麦克风
+        realtime: 虚拟录音器是否按真实时间节奏出帧
+        **kwargs: 录音器配置参数
+        
+    Returns:
+        录音器实例（真实录音器共享进程内的设备管理器与预热流）
+    """
+    if source is not None:
+        from .virtual_audio import VirtualAudioRecorder
+        return VirtualAudioRecorder(source, realtime=realtime, **kwargs)
     if mock or not PYAUDIO_AVAILABLE:
         return MockAudioRecorder()
-    return AudioRecorder()
+    kwargs.setdefault('devices', get_device_manager())
+    return AudioRecorder(**kwargs)
 
 
-def get_audio_player(mock: bool = False) -> AudioPlayer:
-    """获取播放器实例"""
+def get_audio_player(mock: bool = False, virtual: bool = False, realtime: bool = False, **kwargs) -> AudioPlayer:
+    """
+    获取播放器实例
+    
+    Args:
+        mock: 是否使用模拟播放器
+        virtual: 是否使用把音频捕获到内存的虚拟播放器
+        realtime: 虚拟播放器是否按音频时长阻塞
+        **kwargs: 播放器配置参数
+        
+    Returns:
+        播放器实例（真实播放器共享进程内的设备管理器与预热流）
+    """
+    if virtual:
+        from .virtual_audio import VirtualAudioPlayer
+        return VirtualAudioPlayer(realtime=realtime, **kwargs)
     if mock or not PYAUDIO_AVAILABLE:
         return MockAudioPlayer()
-    return AudioPlayer()
+    kwargs.setdefault('devices', get_device_manager())
+    return AudioPlayer(**kwargs)
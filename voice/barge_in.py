@@ -0,0 +1,90 @@
+"""
+插话检测模块
+在助手播放回复的同时监听麦克风，用播放信号做回声门限，识别用户插话
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from .vad import VADBase, frame_rms
+
+
+class BargeInDetector:
+    """基于回声门限的插话检测器"""
+
+    def __init__(
+        self,
+        rate: int = 16000,
+        threshold: float = 500.0,
+        echo_margin: float = 2.5,
+        min_speech_ms: float = 200.0,
+        coupling_alpha: float = 0.05,
+        initial_coupling: float = 0.3,
+        max_coupling: float = 2.0,
+        vad: Optional[VADBase] = None
+    ):
+        """
+        初始化插话检测器
+
+        Args:
+            rate: 采样率
+            threshold: 麦克风帧 RMS 的绝对下限，低于它不视为插话
+            echo_margin: 麦克风电平需要超过估计回声电平的倍数
+            min_speech_ms: 连续满足条件多久才判定为插话（毫秒），过滤咳嗽、敲击等短促声音
+            coupling_alpha: 回声耦合系数的平滑系数（只在未检测到语音的帧上更新）
+            initial_coupling: 初始回声耦合系数（麦克风回声电平 / 播放电平）
+            max_coupling: 耦合系数上限，防止持续噪声把门限抬到无法插话
+            vad: 附加的语音活动检测器（可选），与回声门限同时满足才计为语音帧
+        """
+        self.rate = rate
+        self.threshold = threshold
+        self.echo_margin = echo_margin
+        self.min_speech_ms = min_speech_ms
+        self.coupling_alpha = coupling_alpha
+        self.initial_coupling = initial_coupling
+        self.max_coupling = max_coupling
+        self.vad = vad
+        self.reset()
+
+    def reset(self) -> None:
+        """开始新一次播放前重置状态（保留已学习的回声耦合系数）"""
+        if not hasattr(self, "coupling"):
+            self.coupling = self.initial_coupling
+        self._speech_ms = 0.0
+        self.triggered = False
+        self.last_threshold = self.threshold
+
+    def gate(self, playback_level: float) -> float:
+        """给定播放电平时的插话门限"""
+        return max(self.threshold, self.echo_margin * self.coupling * playback_level)
+
+    def process(self, frame: np.ndarray, playback_level: float) -> bool:
+        """
+        处理一帧麦克风音频
+
+        Args:
+            frame: int16 采样数组
+            playback_level: 同期播放信号的电平（帧 RMS）
+
+        Returns:
+            是否判定为用户插话
+        """
+        rms = frame_rms(frame)
+        self.last_threshold = self.gate(playback_level)
+        speech = rms > self.last_threshold
+        if speech and self.vad is not None:
+            speech = self.vad.is_speech(frame)
+
+        if speech:
+            self._speech_ms += len(frame) * 1000.0 / self.rate
+        else:
+            self._speech_ms = 0.0
+            if playback_level > 0:
+                # 只用非语音帧学习回声耦合，避免把用户的声音当成回声
+                ratio = min(rms / playback_level, self.max_coupling)
+                self.coupling += self.coupling_alpha * (ratio - self.coupling)
+
+        if self._speech_ms >= self.min_speech_ms:
+            self.triggered = True
+        return self.triggered
@@ -0,0 +1,145 @@
+"""
+微批调度模块
+多个语音会话共享一个 STT 引擎时，把几毫秒内到达的转录请求合并为一批，交给 transcribe_batch
+（有请求需要置信度时为 transcribe_batch_detailed）一次解码
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .pcm import WHISPER_SAMPLE_RATE
+from .stt import AudioInput, STTBase, Transcript, to_whisper_input
+
+
+class BatchingSTT(STTBase):
+    """带微批调度的 STT 包装器"""
+
+    def __init__(self, engine: STTBase, max_batch: int = 8, max_wait_ms: float = 10.0):
+        """
+        初始化微批调度器
+
+        Args:
+            engine: 实际执行转录的引擎（需实现 transcribe_batch / transcribe_batch_detailed 才有批量收益）
+            max_batch: 每批最多的请求数
+            max_wait_ms: 有并发负载时等待凑批的最长时间（毫秒）；空闲时请求立即执行，不增加延迟
+        """
+        self.engine = engine
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+
+        # (音频, Future, 是否需要置信度)
+        self._queue: List[Tuple[np.ndarray, Future, bool]] = []
+        self._cond = threading.Condition()
+        self._last_batch_size = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None, detailed: bool = False) -> Future:
+        """
+        提交一段音频，返回给出文本的 Future
+
+        Args:
+            pcm: PCMBuffer 或 NumPy 数组
+            sample_rate: 数组的采样率
+            detailed: 为 True 时 Future 给出带置信度的 Transcript
+        """
+        future: Future = Future()
+        audio = to_whisper_input(pcm, sample_rate)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("微批调度器已关闭")
+            self._queue.append((audio, future, detailed))
+            self._cond.notify_all()
+        return future
+
+    def _under_load(self) -> bool:
+        """已有请求在排队，或上一批不止一个请求时，才值得等待凑批"""
+        return len(self._queue) > 1 or self._last_batch_size > 1
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+                if self._under_load():
+                    deadline = time.monotonic() + self.max_wait
+                    while len(self._queue) < self.max_batch and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                self._last_batch_size = len(batch)
+
+            self.batches += 1
+            self.items += len(batch)
+            audios = [audio for audio, _, _ in batch]
+            detailed = any(wants for _, _, wants in batch)
+            try:
+                if detailed:
+                    results = self.engine.transcribe_batch_detailed(audios, WHISPER_SAMPLE_RATE)
+                else:
+                    results = self.engine.transcribe_batch(audios, WHISPER_SAMPLE_RATE)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, wants), result in zip(batch, results):
+                future.set_result(result if wants or not detailed else result.text)
+
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """转录内存音频（与其他会话的请求合批执行）"""
+        return self.submit_pcm(pcm, sample_rate).result()
+
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Transcript:
+        """转录内存音频并附带置信度（与其他会话的请求合批执行）"""
+        return self.submit_pcm(pcm, sample_rate, detailed=True).result()
+
+    def transcribe_batch(self, items, sample_rate: Optional[int] = None) -> List[str]:
+        """已经成批的请求直接交给引擎"""
+        return self.engine.transcribe_batch(items, sample_rate)
+
+    def transcribe_batch_detailed(self, items, sample_rate: Optional[int] = None) -> List[Transcript]:
+        """已经成批的请求直接交给引擎"""
+        return self.engine.transcribe_batch_detailed(items, sample_rate)
+
+    def transcribe_file(self, audio_path: str) -> str:
+        """转录音频文件（不参与合批）"""
+        return self.engine.transcribe_file(audio_path)
+
+    def transcribe_bytes(self, audio_bytes: bytes) -> str:
+        """转录音频字节流（不参与合批）"""
+        return self.engine.transcribe_bytes(audio_bytes)
+
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """流式窗口解码依赖上下文提示，不参与合批"""
+        return self.engine.decode_window(audio, prompt)
+
+    def cache_identity(self) -> str:
+        """与被包装的引擎相同"""
+        return self.engine.cache_identity()
+
+    def get_stats(self) -> dict:
+        """返回批次数与平均批大小"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """处理完排队的请求后停止调度线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,103 @@
+"""
+两级缓存模块
+内存 LRU 一级缓存，可选 diskcache 磁盘二级缓存；转录缓存与 TTS 短语缓存共用
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+
+class TwoLevelCache:
+    """两级键值缓存（键为字符串，值需可序列化才能写入磁盘）"""
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None, disk_size_mb: float = 256.0,
+                 name: str = "缓存"):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存中最多保留的条目数（最久未使用的先淘汰）
+            directory: 磁盘缓存目录，None 表示只用内存
+            disk_size_mb: 磁盘缓存的容量上限（MB）
+            name: 提示信息中使用的缓存名称
+        """
+        self.max_entries = max(1, max_entries)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if directory:
+            if DISKCACHE_AVAILABLE:
+                os.makedirs(directory, exist_ok=True)
+                self._disk = diskcache.Cache(directory, size_limit=int(disk_size_mb * 1024 * 1024))
+            else:
+                print(f"⚠️ diskcache 未安装，{name}只使用内存。请运行: pip install diskcache")
+
+    def get(self, key: str) -> Optional[Any]:
+        """查找缓存，磁盘命中时提升到内存"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """写入缓存"""
+        with self._lock:
+            self._remember(key, value)
+        if self._disk is not None:
+            self._disk.set(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        """写入内存层（需持有锁）"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空两级缓存"""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def get_stats(self) -> dict:
+        """返回命中次数与命中率"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """关闭磁盘缓存"""
+        if self._disk is not None:
+            self._disk.close()
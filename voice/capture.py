@@ -0,0 +1,276 @@
+"""
+流式音频采集引擎
+以 pyaudio 回调模式采集音频，写入预分配的环形缓冲区，并把音频帧分发给订阅者
+"""
+
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from .devices import AudioDeviceManager, PooledInputStream, _PA_CONTINUE
+
+# pyaudio 的 paInputOverflow 状态位
+_PA_INPUT_OVERFLOW = 0x2
+
+
+class RingBuffer:
+    """预分配的 int16 环形缓冲区，按绝对采样位置读写"""
+
+    def __init__(self, capacity: int):
+        """
+        初始化环形缓冲区
+
+        Args:
+            capacity: 容量（采样点数）
+        """
+        if capacity <= 0:
+            raise ValueError("环形缓冲区容量必须大于 0")
+
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_written(self) -> int:
+        """累计写入的采样点数（单调递增的绝对位置）"""
+        return self._written
+
+    @property
+    def oldest_position(self) -> int:
+        """缓冲区中仍可读取的最早绝对位置"""
+        return max(0, self._written - self.capacity)
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        写入采样点，超出容量时覆盖最旧的数据
+
+        Args:
+            samples: int16 采样数组
+
+        Returns:
+            写入后的绝对位置
+        """
+        n = len(samples)
+        if n == 0:
+            return self._written
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+
+        with self._lock:
+            start = (self._written + n - len(samples)) % self.capacity
+            end = start + len(samples)
+            if end <= self.capacity:
+                self._data[start:end] = samples
+            else:
+                split = self.capacity - start
+                self._data[start:] = samples[:split]
+                self._data[:end - self.capacity] = samples[split:]
+            self._written += n
+            return self._written
+
+    def read(self, start: int, end: Optional[int] = None) -> np.ndarray:
+        """
+        按绝对位置读取一段采样点（返回副本）
+
+        Args:
+            start: 起始绝对位置，早于最旧数据时自动截断
+            end: 结束绝对位置（不含），默认读到最新位置
+
+        Returns:
+            int16 采样数组
+        """
+        with self._lock:
+            end = self._written if end is None else min(end, self._written)
+            start = max(start, self._written - self.capacity, 0)
+            if start >= end:
+                return np.zeros(0, dtype=np.int16)
+
+            first = start % self.capacity
+            count = end - start
+            if first + count <= self.capacity:
+                return self._data[first:first + count].copy()
+            split = self.capacity - first
+            return np.concatenate((self._data[first:], self._data[:count - split]))
+
+    def latest(self, count: int) -> np.ndarray:
+        """读取最近写入的 count 个采样点"""
+        return self.read(self._written - count)
+
+
+class FrameSubscription:
+    """音频帧订阅，按到达顺序接收采集引擎分发的帧"""
+
+    def __init__(self, engine: "CaptureEngine", max_pending: int):
+        self._engine = engine
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.closed = False
+
+    def _push(self, frame: np.ndarray) -> None:
+        """由采集线程调用；消费者积压时丢弃最旧的帧，绝不阻塞采集"""
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        获取下一帧
+
+        Args:
+            timeout: 等待超时（秒），None 表示一直等待
+
+        Returns:
+            int16 帧数组；超时或订阅关闭时返回 None
+        """
+        if self.closed and self._queue.empty():
+            return None
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self) -> None:
+        """取消订阅"""
+        if self.closed:
+            return
+        self.closed = True
+        self._engine.unsubscribe(self)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def __enter__(self) -> "FrameSubscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CaptureEngine:
+    """回调模式的音频采集引擎"""
+
+    def __init__(
+        self,
+        devices: Optional[AudioDeviceManager] = None,
+        rate: int = 16000,
+        channels: int = 1,
+        frame_ms: float = 20.0,
+        buffer_seconds: float = 30.0,
+        input_device_index: Optional[int] = None
+    ):
+        """
+        初始化采集引擎
+
+        Args:
+            devices: 音频设备管理器（提供共享的 PortAudio 与预热输入流）
+            rate: 采样率
+            channels: 声道数
+            frame_ms: 每帧时长（毫秒），建议 10-20 毫秒以降低端点检测延迟
+            buffer_seconds: 环形缓冲区保留的音频时长（秒）
+            input_device_index: 输入设备索引（可选）
+        """
+        self.devices = devices
+        self.rate = rate
+        self.channels = channels
+        self.frame_size = max(1, int(rate * frame_ms / 1000))
+        self.input_device_index = input_device_index
+        self.ring = RingBuffer(int(rate * buffer_seconds) * channels)
+        self.overflows = 0
+
+        self._stream: Optional[PooledInputStream] = None
+        self._subscribers: List[FrameSubscription] = []
+        self._lock = threading.Lock()
+        self._max_pending = max(1, int(buffer_seconds * 1000 / frame_ms))
+
+    @property
+    def frame_ms(self) -> float:
+        """每帧时长（毫秒）"""
+        return self.frame_size * 1000.0 / self.rate
+
+    @property
+    def running(self) -> bool:
+        """采集是否正在进行"""
+        return self._stream is not None
+
+    def start(self) -> None:
+        """从设备管理器借出回调模式的输入流并开始采集"""
+        if self.running:
+            return
+        if self.devices is None:
+            raise RuntimeError("采集引擎需要音频设备管理器")
+
+        self._stream = self.devices.acquire_input(
+            self.rate,
+            self.channels,
+            self.frame_size,
+            callback=self._callback,
+            device_index=self.input_device_index
+        )
+
+    def stop(self) -> None:
+        """停止采集，把输入流归还给设备管理器"""
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            self.devices.release_input(stream)
+
+    def subscribe(self, preroll_ms: float = 0.0) -> FrameSubscription:
+        """
+        订阅音频帧
+
+        Args:
+            preroll_ms: 先从环形缓冲区补发的历史音频时长（毫秒）
+
+        Returns:
+            帧订阅对象
+        """
+        subscription = FrameSubscription(self, self._max_pending)
+        with self._lock:
+            if preroll_ms > 0:
+                history = self.ring.latest(int(self.rate * preroll_ms / 1000) * self.channels)
+                step = self.frame_size * self.channels
+                for offset in range(0, len(history), step):
+                    subscription._push(history[offset:offset + step])
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription) -> None:
+        """取消订阅"""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PortAudio 回调：只做写环形缓冲区和入队，保证不阻塞"""
+        if status & _PA_INPUT_OVERFLOW:
+            self.overflows += 1
+
+        frame = np.frombuffer(in_data, dtype=np.int16)
+        with self._lock:
+            self.ring.write(frame)
+            subscribers = self._subscribers
+        for subscription in subscribers:
+            subscription._push(frame)
+        return (None, _PA_CONTINUE)
+
+    def close(self) -> None:
+        """停止采集并关闭所有订阅（输入流保留在设备管理器中供复用）"""
+        self.stop()
+        for subscription in list(self._subscribers):
+            subscription.close()
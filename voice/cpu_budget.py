@@ -0,0 +1,112 @@
+"""
+CPU 线程预算模块
+限制 PyTorch 的 intra-op / inter-op 线程数并绑定 CPU，避免 Whisper 占满所有核心、
+挤占同一台机器上的智能体流程与音频采集
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+# 支持线程级 CPU 绑定（Linux）
+AFFINITY_AVAILABLE = hasattr(os, "sched_setaffinity")
+
+
+def available_cpus() -> List[int]:
+    """当前进程允许使用的 CPU 编号"""
+    if AFFINITY_AVAILABLE:
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpus(spec: str) -> List[int]:
+    """
+    解析 CPU 列表（如 "0-3,6"）
+
+    Args:
+        spec: 逗号分隔的编号或范围
+
+    Returns:
+        排序后的 CPU 编号
+    """
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def plan_affinity(workers: int, threads_per_worker: int, cpus: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    为工作进程划分互不重叠的 CPU 集合；核心不够时循环复用
+
+    Args:
+        workers: 工作进程数
+        threads_per_worker: 每个工作进程的线程数（即分到的核心数）
+        cpus: 可用的 CPU，默认为当前进程允许使用的全部 CPU
+
+    Returns:
+        每个工作进程的 CPU 列表
+    """
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    per_worker = max(1, min(threads_per_worker, len(cpus)))
+    return [
+        [cpus[(worker * per_worker + i) % len(cpus)] for i in range(per_worker)]
+        for worker in range(workers)
+    ]
+
+
+def apply_thread_budget(threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                        cpus: Optional[Sequence[int]] = None) -> None:
+    """
+    设置 PyTorch 线程数并绑定整个进程的 CPU（用于独立的 STT 工作进程）
+
+    Args:
+        threads: intra-op 线程数（单个算子内部的并行度）
+        interop_threads: inter-op 线程数（只能在首次推理前设置一次）
+        cpus: 绑定的 CPU 编号
+    """
+    if cpus and AFFINITY_AVAILABLE:
+        os.sched_setaffinity(0, cpus)
+    if threads is None and interop_threads is None:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # 已经运行过并行任务后无法再修改，保持原值
+            pass
+
+
+@contextmanager
+def pinned(cpus: Optional[Sequence[int]]) -> Iterator[None]:
+    """
+    在上下文内把当前线程绑定到指定 CPU，退出时恢复
+
+    只影响当前线程：OpenMP 线程池在进程内第一次并行计算时由执行它的线程创建，工作线程继承该线程
+    当时的绑定，之后不再改变。要让推理的工作线程也受限，必须在第一次推理（加载后的预热解码）的
+    线程上进入这个上下文，见 ModelRegistry.preload 的 cpus 参数；独立的工作进程用 apply_thread_budget
+    """
+    if not cpus or not AFFINITY_AVAILABLE:
+        yield
+        return
+    tid = threading.get_native_id()
+    previous = os.sched_getaffinity(tid)
+    os.sched_setaffinity(tid, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(tid, previous)
@@ -0,0 +1,200 @@
+"""
+音频设备管理模块
+进程内只初始化一次 PortAudio，并按采样率/格式缓存已打开的输入输出流，避免每轮对话重新打开设备
+"""
+
+import atexit
+import threading
+from typing import Callable, Dict, List, Optional
+
+# pyaudio 是可选依赖
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+    _PA_CONTINUE = pyaudio.paContinue
+    _PA_INT16 = pyaudio.paInt16
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+    _PA_CONTINUE = 0
+    _PA_INT16 = 8
+
+
+class PooledInputStream:
+    """池化的回调模式输入流，回调目标可在借出时切换"""
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.stream = None
+        self.callback: Optional[Callable] = None
+
+    def _dispatch(self, in_data, frame_count, time_info, status):
+        """PortAudio 回调，转发给当前借用者"""
+        callback = self.callback
+        if callback is None:
+            return (None, _PA_CONTINUE)
+        return callback(in_data, frame_count, time_info, status)
+
+
+class AudioDeviceManager:
+    """共享的 PortAudio 实例与预热流池"""
+
+    def __init__(self):
+        """初始化设备管理器（PortAudio 在首次使用时才初始化）"""
+        self._pa = None
+        self._lock = threading.Lock()
+        self._idle_inputs: Dict[tuple, List[PooledInputStream]] = {}
+        self._idle_outputs: Dict[tuple, list] = {}
+        self._output_keys: Dict[int, tuple] = {}
+        self.opened = 0
+        self.reused = 0
+
+    @property
+    def pa(self):
+        """共享的 pyaudio.PyAudio 实例"""
+        if self._pa is None:
+            if not PYAUDIO_AVAILABLE:
+                raise ImportError(
+                    "音频设备需要 pyaudio。\n"
+                    "请运行: pip install pyaudio\n"
+                    "macOS 用户可能需要先运行: brew install portaudio"
+                )
+            with self._lock:
+                if self._pa is None:
+                    self._pa = pyaudio.PyAudio()
+        return self._pa
+
+    def acquire_input(
+        self,
+        rate: int,
+        channels: int,
+        frames_per_buffer: int,
+        callback: Optional[Callable],
+        device_index: Optional[int] = None
+    ) -> PooledInputStream:
+        """
+        借出一个已启动的回调模式输入流
+
+        Args:
+            rate: 采样率
+            channels: 声道数
+            frames_per_buffer: 每次回调的帧数
+            callback: PortAudio 回调函数
+            device_index: 输入设备索引（可选）
+
+        Returns:
+            池化输入流，用完后调用 release_input 归还
+        """
+        key = (rate, channels, frames_per_buffer, device_index)
+        with self._lock:
+            idle = self._idle_inputs.get(key)
+            pooled = idle.pop() if idle else None
+
+        if pooled is None:
+            pooled = PooledInputStream(key)
+            pooled.stream = self.pa.open(
+                format=_PA_INT16,
+                channels=channels,
+                rate=rate,
+                input=True,
+                input_device_index=device_index,
+                frames_per_buffer=frames_per_buffer,
+                stream_callback=pooled._dispatch,
+                start=False
+            )
+            self.opened += 1
+        else:
+            self.reused += 1
+
+        pooled.callback = callback
+        pooled.stream.start_stream()
+        return pooled
+
+    def release_input(self, pooled: PooledInputStream) -> None:
+        """归还输入流：停止采集但保持设备打开"""
+        pooled.stream.stop_stream()
+        pooled.callback = None
+        with self._lock:
+            self._idle_inputs.setdefault(pooled.key, []).append(pooled)
+
+    def acquire_output(self, rate: int, channels: int, format: int = _PA_INT16):
+        """
+        借出一个阻塞模式输出流
+
+        Args:
+            rate: 采样率
+            channels: 声道数
+            format: PortAudio 采样格式
+
+        Returns:
+            pyaudio 输出流，用完后调用 release_output 归还
+        """
+        key = (rate, channels, format)
+        with self._lock:
+            idle = self._idle_outputs.get(key)
+            stream = idle.pop() if idle else None
+
+        if stream is None:
+            stream = self.pa.open(format=format, channels=channels, rate=rate, output=True)
+            self.opened += 1
+        else:
+            self.reused += 1
+            if stream.is_stopped():
+                stream.start_stream()
+
+        with self._lock:
+            self._output_keys[id(stream)] = key
+        return stream
+
+    def release_output(self, stream) -> None:
+        """归还输出流：等待缓冲播放完毕后停止，但保持设备打开"""
+        stream.stop_stream()
+        with self._lock:
+            key = self._output_keys.pop(id(stream))
+            self._idle_outputs.setdefault(key, []).append(stream)
+
+    def prewarm_input(self, rate: int = 16000, channels: int = 1, frames_per_buffer: int = 320) -> None:
+        """预先打开一个输入流放入池中"""
+        self.release_input(self.acquire_input(rate, channels, frames_per_buffer, callback=None))
+
+    def prewarm_output(self, rate: int, channels: int = 1, format: int = _PA_INT16) -> None:
+        """预先打开一个输出流放入池中"""
+        self.release_output(self.acquire_output(rate, channels, format))
+
+    def get_stats(self) -> dict:
+        """返回流的打开与复用次数"""
+        with self._lock:
+            idle = sum(len(v) for v in self._idle_inputs.values())
+            idle += sum(len(v) for v in self._idle_outputs.values())
+        return {"opened": self.opened, "reused": self.reused, "idle": idle}
+
+    def close_idle(self) -> None:
+        """关闭池中所有空闲流"""
+        with self._lock:
+            inputs = [p.stream for pool in self._idle_inputs.values() for p in pool]
+            outputs = [s for pool in self._idle_outputs.values() for s in pool]
+            self._idle_inputs.clear()
+            self._idle_outputs.clear()
+        for stream in inputs + outputs:
+            stream.close()
+
+    def terminate(self) -> None:
+        """关闭所有空闲流并释放 PortAudio"""
+        self.close_idle()
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+_manager: Optional[AudioDeviceManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_device_manager() -> AudioDeviceManager:
+    """获取进程共享的设备管理器"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = AudioDeviceManager()
+                atexit.register(_manager.terminate)
+    return _manager
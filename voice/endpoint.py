@@ -0,0 +1,228 @@
+"""
+语音端点检测模块
+基于自适应噪声底的端点检测，支持预录(pre-roll)、拖尾(hangover)和最短语音时长规则
+"""
+
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+import numpy as np
+
+from .vad import VADBase, frame_rms
+
+
+class UtteranceStats:
+    """单次语音的计时统计"""
+
+    def __init__(self):
+        self.reason = ""
+        self.captured_ms = 0.0
+        self.speech_start_ms: Optional[float] = None
+        self.speech_end_ms: Optional[float] = None
+        self.endpoint_delay_ms = 0.0
+        self.wall_ms = 0.0
+        self.noise_floor = 0.0
+        self.threshold = 0.0
+
+    @property
+    def speech_ms(self) -> float:
+        """检测到的语音时长（毫秒）"""
+        if self.speech_start_ms is None or self.speech_end_ms is None:
+            return 0.0
+        return self.speech_end_ms - self.speech_start_ms
+
+    def as_dict(self) -> dict:
+        """以字典形式返回统计信息"""
+        return {
+            "reason": self.reason,
+            "captured_ms": round(self.captured_ms, 1),
+            "speech_start_ms": self.speech_start_ms,
+            "speech_end_ms": self.speech_end_ms,
+            "speech_ms": round(self.speech_ms, 1),
+            "endpoint_delay_ms": round(self.endpoint_delay_ms, 1),
+            "wall_ms": round(self.wall_ms, 1),
+            "noise_floor": round(self.noise_floor, 1),
+            "threshold": round(self.threshold, 1),
+        }
+
+
+class Endpointer:
+    """自适应端点检测器，逐帧输入，判断一句话何时结束"""
+
+    # 结束原因
+    ENDPOINT = "endpoint"
+    NO_SPEECH = "no_speech"
+    MAX_DURATION = "max_duration"
+
+    def __init__(
+        self,
+        rate: int = 16000,
+        preroll_ms: float = 300.0,
+        hangover_ms: float = 600.0,
+        min_speech_ms: float = 150.0,
+        no_speech_timeout: float = 8.0,
+        max_duration: float = 15.0,
+        floor_ratio: float = 3.0,
+        min_threshold: float = 200.0,
+        floor_alpha: float = 0.05,
+        initial_floor: float = 100.0,
+        calibration_ms: float = 200.0,
+        vad: Optional[VADBase] = None
+    ):
+        """
+        初始化端点检测器
+
+        Args:
+            rate: 采样率
+            preroll_ms: 语音起点之前保留的音频时长（毫秒）
+            hangover_ms: 语音结束后持续静音多久判定为结束（毫秒）
+            min_speech_ms: 连续语音达到该时长才视为开始说话（毫秒）
+            no_speech_timeout: 一直没有开始说话的超时（秒）
+            max_duration: 单句最长语音时长（秒，从语音起点算起）
+            floor_ratio: 语音阈值相对噪声底的倍数
+            min_threshold: 语音阈值下限（帧 RMS）
+            floor_alpha: 噪声底的指数平滑系数
+            initial_floor: 初始噪声底（帧 RMS）
+            calibration_ms: 首次录音开头快速校准噪声底的时长（毫秒）；之后各句沿用已学习的噪声底
+            vad: 附加的 VAD（可选），与能量阈值同时满足才算语音
+        """
+        self.rate = rate
+        self.preroll = int(rate * preroll_ms / 1000)
+        self.hangover = int(rate * hangover_ms / 1000)
+        self.min_speech = int(rate * min_speech_ms / 1000)
+        self.no_speech_limit = int(rate * no_speech_timeout)
+        self.max_samples = int(rate * max_duration)
+        self.floor_ratio = floor_ratio
+        self.min_threshold = min_threshold
+        self.floor_alpha = floor_alpha
+        self.calibration = int(rate * calibration_ms / 1000)
+        self.vad = vad
+
+        # 噪声底在多次录音之间保留，持续适应环境
+        self.noise_floor = initial_floor
+        # 校准只在还没有学习到噪声底时进行一次；明显高于初始阈值的帧视为有人开口，不参与校准
+        self._calibration_left = self.calibration
+        self._calibration_gate = self.threshold * floor_ratio
+        self._calibrated_floor: Optional[float] = None
+        self.reset()
+
+    @property
+    def threshold(self) -> float:
+        """当前的语音能量阈值"""
+        return max(self.min_threshold, self.noise_floor * self.floor_ratio)
+
+    @property
+    def frames(self) -> List[np.ndarray]:
+        """语音起点（含 pre-roll）之后保留的帧；起点之前为空"""
+        return self._frames
+
+    @property
+    def in_speech(self) -> bool:
+        """是否已检测到语音起点"""
+        return self._triggered
+
+    def reset(self) -> None:
+        """开始新一句的检测（保留噪声底）"""
+        self._pending: Deque[np.ndarray] = deque()
+        self._pending_samples = 0
+        self._frames: List[np.ndarray] = []
+        self._elapsed = 0
+        self._onset = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._triggered = False
+        self._started_at = time.monotonic()
+        self.done = False
+        self.stats = UtteranceStats()
+        if self.vad is not None:
+            self.vad.reset()
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        rms = frame_rms(frame)
+        calibrating = self._calibration_left > 0
+        if calibrating:
+            self._calibration_left -= len(frame)
+            if rms < self._calibration_gate:
+                # 校准期间估计只降不升：语音在校准期间开始也不会抬高噪声底
+                if self._calibrated_floor is None or rms < self._calibrated_floor:
+                    self._calibrated_floor = rms
+                self.noise_floor = max(self._calibrated_floor, 1.0)
+
+        speech = rms >= self.threshold
+        if speech and self.vad is not None:
+            speech = self.vad.is_speech(frame)
+        if not speech and not calibrating:
+            # 快速跟随下降，缓慢跟随上升，避免被语音尾音抬高
+            if rms < self.noise_floor:
+                self.noise_floor = rms + (self.noise_floor - rms) * 0.5
+            else:
+                self.noise_floor += self.floor_alpha * (rms - self.noise_floor)
+            self.noise_floor = max(self.noise_floor, 1.0)
+        return speech
+
+    def process(self, frame: np.ndarray) -> bool:
+        """
+        处理一帧音频
+
+        Args:
+            frame: int16 采样数组
+
+        Returns:
+            这一句是否已经结束
+        """
+        if self.done:
+            return True
+
+        n = len(frame)
+        self._elapsed += n
+        speech = self._is_speech(frame)
+
+        if not self._triggered:
+            self._pending.append(frame)
+            self._pending_samples += n
+            self._speech_run = self._speech_run + n if speech else 0
+            # 预录缓冲区只保留 pre-roll 加上候选语音部分
+            while (len(self._pending) > 1 and
+                   self._pending_samples - len(self._pending[0]) >= self.preroll + self._speech_run):
+                self._pending_samples -= len(self._pending.popleft())
+
+            if self._speech_run >= self.min_speech:
+                self._triggered = True
+                self._onset = self._elapsed - self._speech_run
+                self._frames = list(self._pending)
+                self._pending.clear()
+                self.stats.speech_start_ms = self._onset * 1000.0 / self.rate
+                self.stats.speech_end_ms = self._elapsed * 1000.0 / self.rate
+            elif self._elapsed >= self.no_speech_limit:
+                self._finish(self.NO_SPEECH)
+        else:
+            self._frames.append(frame)
+            if speech:
+                self._silence_run = 0
+                self.stats.speech_end_ms = self._elapsed * 1000.0 / self.rate
+            else:
+                self._silence_run += n
+                if self._silence_run >= self.hangover:
+                    self._finish(self.ENDPOINT)
+
+        if not self.done and self._triggered and self._elapsed - self._onset >= self.max_samples:
+            self._finish(self.MAX_DURATION)
+        return self.done
+
+    def _finish(self, reason: str) -> None:
+        self.done = True
+        stats = self.stats
+        stats.reason = reason
+        stats.captured_ms = self._elapsed * 1000.0 / self.rate
+        stats.wall_ms = (time.monotonic() - self._started_at) * 1000.0
+        stats.noise_floor = self.noise_floor
+        stats.threshold = self.threshold
+        if stats.speech_end_ms is not None:
+            stats.endpoint_delay_ms = stats.captured_ms - stats.speech_end_ms
+
+    def audio(self) -> np.ndarray:
+        """返回本句的音频（含 pre-roll 与拖尾）；未检测到语音时为空数组"""
+        if not self._frames:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(self._frames)
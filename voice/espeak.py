@@ -0,0 +1,139 @@
+"""
+espeak 合成模块
+通过 ctypes 在进程内调用 libespeak-ng / libespeak：引擎只初始化一次并常驻，每句直接在内存中得到 PCM，
+不再为每句话 fork/exec 合成进程、经过 shell 转义或写临时 WAV 文件
+"""
+
+import ctypes
+import ctypes.util
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from .pcm import PCMBuffer
+
+# espeak_AUDIO_OUTPUT：同步模式下 espeak_Synth 返回前在调用线程中回调全部音频
+_AUDIO_OUTPUT_SYNCHRONOUS = 2
+_POS_CHARACTER = 1
+_ESPEAK_CHARS_UTF8 = 1
+_ESPEAK_RATE = 1
+_EE_OK = 0
+# 未指定语音时使用的语音文件
+_DEFAULT_VOICE = "default"
+
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+def find_espeak_library() -> Optional[str]:
+    """查找 espeak 动态库（优先 espeak-ng）"""
+    return ctypes.util.find_library("espeak-ng") or ctypes.util.find_library("espeak")
+
+
+class EspeakLibrary:
+    """进程内常驻的 espeak 合成器（语音与语速是 espeak 的全局状态，每次合成时按调用方的设置切换）"""
+
+    def __init__(self, path: str):
+        """
+        加载并初始化 espeak
+
+        Args:
+            path: 动态库路径或名称（find_espeak_library 的结果）
+        """
+        self.lib = ctypes.cdll.LoadLibrary(path)
+        self.lib.espeak_Initialize.restype = ctypes.c_int
+        self.lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        self.lib.espeak_SetSynthCallback.argtypes = [_SYNTH_CALLBACK]
+        self.lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        self.lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        self.lib.espeak_GetParameter.restype = ctypes.c_int
+        self.lib.espeak_GetParameter.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.lib.espeak_Synth.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int, ctypes.c_uint,
+            ctypes.c_uint, ctypes.POINTER(ctypes.c_uint), ctypes.c_void_p
+        ]
+
+        self.rate = self.lib.espeak_Initialize(_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.rate <= 0:
+            raise RuntimeError(f"espeak 初始化失败: {path}")
+
+        self._chunks: List[np.ndarray] = []
+        # 回调对象必须一直被引用，否则会被回收
+        self._callback = _SYNTH_CALLBACK(self._on_audio)
+        self.lib.espeak_SetSynthCallback(self._callback)
+        # espeak 的全局状态不是线程安全的
+        self._lock = threading.Lock()
+
+        # 当前生效的语音与语速（语速为每分钟词数，不是采样率）
+        self._default_speed = self.lib.espeak_GetParameter(_ESPEAK_RATE, 0)
+        self._voice: Optional[str] = None
+        self._speed = self._default_speed
+
+    def _configure(self, voice: Optional[str], rate: Optional[int]) -> None:
+        """切换到调用方的语音与语速（持有 _lock 时调用，设置未变时不重复调用 espeak）"""
+        voice = voice or _DEFAULT_VOICE
+        if voice != self._voice:
+            if self.lib.espeak_SetVoiceByName(voice.encode("utf-8")) != _EE_OK:
+                print(f"⚠️ espeak 没有语音 {voice}，使用默认语音")
+                self.lib.espeak_SetVoiceByName(_DEFAULT_VOICE.encode("utf-8"))
+            self._voice = voice
+        speed = int(rate) if rate else self._default_speed
+        if speed != self._speed:
+            self.lib.espeak_SetParameter(_ESPEAK_RATE, speed, 0)
+            self._speed = speed
+
+    def _on_audio(self, wav, numsamples: int, events) -> int:
+        if wav and numsamples > 0:
+            self._chunks.append(np.ctypeslib.as_array(wav, shape=(numsamples,)).copy())
+        return 0
+
+    def synthesize(self, text: str, voice: Optional[str] = None, rate: Optional[int] = None) -> PCMBuffer:
+        """
+        合成一句话
+
+        Args:
+            text: 文本
+            voice: 语音名称（如 "zh"、"cmn"、"en"），None 使用默认语音
+            rate: 语速（每分钟词数），None 使用默认值
+
+        Returns:
+            单声道 int16 PCM（采样率为 espeak 的输出采样率，通常是 22050Hz）
+        """
+        data = text.encode("utf-8") + b"\0"
+        with self._lock:
+            self._configure(voice, rate)
+            self._chunks = []
+            result = self.lib.espeak_Synth(data, len(data), 0, _POS_CHARACTER, 0, _ESPEAK_CHARS_UTF8, None, None)
+            chunks, self._chunks = self._chunks, []
+        if result != _EE_OK:
+            raise RuntimeError(f"espeak 合成失败 (错误码 {result})")
+        if not chunks:
+            return PCMBuffer.empty(self.rate)
+        return PCMBuffer(np.concatenate(chunks), self.rate)
+
+
+_library: Optional[EspeakLibrary] = None
+_library_failed = False
+_library_lock = threading.Lock()
+
+
+def get_espeak_library() -> Optional[EspeakLibrary]:
+    """
+    获取进程共享的 espeak 合成器（espeak 只能初始化一次，语音与语速在每次合成时指定）
+
+    Returns:
+        合成器；系统没有 espeak 动态库或加载失败时为 None
+    """
+    global _library, _library_failed
+    if _library is None and not _library_failed:
+        with _library_lock:
+            if _library is None and not _library_failed:
+                path = find_espeak_library()
+                try:
+                    if path is None:
+                        raise OSError("未找到 libespeak-ng / libespeak")
+                    _library = EspeakLibrary(path)
+                except (OSError, AttributeError, RuntimeError) as e:
+                    print(f"⚠️ 无法加载 espeak 动态库，改用命令行: {e}")
+                    _library_failed = True
+    return _library
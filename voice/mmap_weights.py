@@ -0,0 +1,120 @@
+"""
+内存映射权重模块
+把 Whisper 检查点一次性转换为 fp32、可内存映射的格式，之后以 mmap 方式加载：
+多个进程（语音助手、启动器打开的终端、测试）通过系统页缓存共享同一份权重，不再各自反序列化到私有内存
+
+用法: python -m voice.mmap_weights tiny base small
+"""
+
+import argparse
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+# 设置为 1 时注册表以内存映射方式加载 CPU 上的 fp32 模型
+MMAP_ENV = "WHISPER_MMAP_WEIGHTS"
+
+
+def mmap_enabled() -> bool:
+    """是否启用内存映射加载（环境变量 WHISPER_MMAP_WEIGHTS）"""
+    return os.environ.get(MMAP_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+def mmap_cache_path(model_name: str) -> str:
+    """转换后检查点的路径"""
+    cache_root = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_root, "whisper", "mmap", f"{model_name}.pt")
+
+
+def convert_checkpoint(model_name: str, force: bool = False) -> str:
+    """
+    把 Whisper 官方检查点转换为可内存映射的格式
+
+    官方检查点是 fp16 权重，加载时要逐个转换为 fp32 并复制到模型参数中；
+    转换后的文件直接保存 fp32 的连续张量，加载时参数直接指向映射的文件页
+
+    Args:
+        model_name: Whisper 模型名称
+        force: 已存在时是否重新转换
+
+    Returns:
+        转换后的文件路径
+    """
+    import torch
+    import whisper
+
+    path = mmap_cache_path(model_name)
+    if os.path.exists(path) and not force:
+        return path
+    if model_name not in whisper._MODELS:
+        raise ValueError(f"未知的 Whisper 模型: {model_name}")
+
+    started = time.time()
+    download_root = os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "whisper"
+    )
+    checkpoint_file = whisper._download(whisper._MODELS[model_name], download_root, False)
+    checkpoint = torch.load(checkpoint_file, map_location="cpu")
+    state = {
+        name: (tensor.float() if tensor.is_floating_point() else tensor).contiguous()
+        for name, tensor in checkpoint["model_state_dict"].items()
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save({"dims": dict(checkpoint["dims"]), "model_state_dict": state}, temp_path)
+    os.replace(temp_path, path)
+    print(f"✅ 已转换 Whisper {model_name} 检查点: {path} ({time.time() - started:.2f}秒)")
+    return path
+
+
+def load_mmap_model(model_name: str, path: Optional[str] = None):
+    """
+    以内存映射方式加载 Whisper 模型（仅 CPU）
+
+    模型先在 meta 设备上构建（不分配内存），再把映射的张量直接作为参数；
+    推理只读权重，页面在进程之间共享
+
+    Args:
+        model_name: Whisper 模型名称
+        path: 转换后的文件，默认为 mmap_cache_path；不存在时先转换
+
+    Returns:
+        Whisper 模型
+    """
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    path = path or convert_checkpoint(model_name)
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+    with torch.device("meta"):
+        model = Whisper(dims)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    # 解码器的因果掩码是非持久缓冲区，不在检查点中，需要重新生成
+    model.decoder.mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    for name, buffer in model.named_buffers():
+        if buffer.is_meta:
+            raise RuntimeError(f"内存映射加载缺少缓冲区: {name}")
+    if model_name in whisper._ALIGNMENT_HEADS:
+        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_name])
+    return model.eval()
+
+
+def main():
+    """命令行：预先转换检查点"""
+    parser = argparse.ArgumentParser(description="把 Whisper 检查点转换为可内存映射的格式")
+    parser.add_argument("models", nargs="+", help="模型名称 (tiny/base/small/...)")
+    parser.add_argument("--force", action="store_true", help="重新转换已存在的文件")
+    args = parser.parse_args()
+    for model_name in args.models:
+        convert_checkpoint(model_name, force=args.force)
+    print(f"设置环境变量 {MMAP_ENV}=1 后，语音助手将以内存映射方式加载这些模型")
+
+
+if __name__ == "__main__":
+    main()
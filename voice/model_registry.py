@@ -0,0 +1,376 @@
+"""
+Whisper 模型注册表
+进程内按 (模型, 设备) 共享已加载的模型：后台预加载并预热，超出内存预算时淘汰空闲的模型
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cpu_budget import pinned
+from .pcm import WHISPER_SAMPLE_RATE
+
+# 各尺寸模型 fp32 权重的大致内存占用（MB），加载前用于预留预算
+_ESTIMATED_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 290, "base.en": 290,
+    "small": 970, "small.en": 970,
+    "medium": 3000, "medium.en": 3000,
+    "large": 6200, "large-v1": 6200, "large-v2": 6200, "large-v3": 6200,
+}
+
+# 动态 int8 量化后线性层权重缩小到约 1/4，整体约为 fp32 的 40%
+_INT8_SIZE_RATIO = 0.4
+
+PRECISIONS = ("fp32", "int8")
+
+ModelKey = Tuple[str, str]
+
+
+def registry_name(model_name: str, precision: str = "fp32") -> str:
+    """
+    注册表中的模型名：非 fp32 精度以后缀区分（如 base:int8），与 fp32 模型分开缓存
+
+    Args:
+        model_name: Whisper 模型名称
+        precision: 推理精度 (fp32, int8)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"不支持的精度: {precision}（可选: {', '.join(PRECISIONS)}）")
+    return model_name if precision == "fp32" else f"{model_name}:{precision}"
+
+
+def split_registry_name(name: str) -> Tuple[str, str]:
+    """registry_name 的逆操作，返回 (模型名称, 精度)"""
+    model_name, _, precision = name.partition(":")
+    return model_name, precision or "fp32"
+
+
+def estimated_mb(name: str) -> float:
+    """加载前预估的内存占用（MB）"""
+    model_name, precision = split_registry_name(name)
+    estimate = _ESTIMATED_MB.get(model_name, 0)
+    return estimate * _INT8_SIZE_RATIO if precision == "int8" else estimate
+
+
+def quantized_cache_path(model_name: str) -> str:
+    """int8 量化权重的磁盘缓存路径（按 torch 版本区分，升级 torch 后重新量化）"""
+    import torch
+    cache_root = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    version = torch.__version__.split("+")[0]
+    return os.path.join(cache_root, "whisper", "int8", f"{model_name}-torch{version}.pt")
+
+
+def quantize_int8(model):
+    """
+    对模型的线性层做动态 int8 量化（仅 CPU）
+
+    Whisper 的 Linear 是 nn.Linear 的子类，只在 forward 中把权重转换为输入的数据类型；
+    量化工具只识别 nn.Linear 本身，先把它们换回基类再量化
+    """
+    import torch
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized_model(model_name: str):
+    """加载 int8 量化模型：优先读取磁盘缓存，没有缓存时量化 fp32 模型并写入缓存"""
+    import torch
+    path = quantized_cache_path(model_name)
+    if os.path.exists(path):
+        try:
+            return torch.load(path, map_location="cpu", weights_only=False)
+        except Exception as e:
+            print(f"⚠️ 量化缓存损坏，重新量化: {e}")
+
+    import whisper
+    started = time.time()
+    model = quantize_int8(whisper.load_model(model_name, device="cpu"))
+    print(f"Whisper {model_name} int8 量化完成，耗时: {time.time() - started:.2f}秒")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(model, temp_path)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"⚠️ 无法写入量化缓存: {e}")
+    return model
+
+
+def load_whisper_model(model_name: str, device: str):
+    """
+    默认加载函数：调用 whisper.load_model
+
+    带 :int8 后缀的名称加载量化模型；设置 WHISPER_MMAP_WEIGHTS=1 时，CPU 上的 fp32 模型以内存映射方式加载
+    """
+    try:
+        import whisper
+    except ImportError:
+        raise ImportError(
+            "Whisper 未安装。请运行: pip install openai-whisper"
+        )
+    base_name, precision = split_registry_name(model_name)
+    if precision == "int8":
+        if device != "cpu":
+            raise ValueError("int8 动态量化只支持 CPU")
+        return load_quantized_model(base_name)
+    from .mmap_weights import load_mmap_model, mmap_enabled
+    if device == "cpu" and mmap_enabled() and model_name in whisper._MODELS:
+        try:
+            return load_mmap_model(model_name)
+        except (TypeError, RuntimeError, OSError) as e:
+            # torch 2.1 以下不支持 mmap 加载
+            print(f"⚠️ 内存映射加载失败，改为普通加载: {e}")
+    return whisper.load_model(model_name, device=device)
+
+
+def model_size_mb(model: Any) -> float:
+    """统计模型参数与缓冲区占用的内存（MB）；无法统计时返回 0"""
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if tensors is None:
+            continue
+        for tensor in tensors():
+            total += tensor.numel() * tensor.element_size()
+    return total / (1024 * 1024)
+
+
+class _Entry:
+    """注册表中的一个模型"""
+
+    def __init__(self, key: ModelKey):
+        self.key = key
+        self.model = None
+        self.size_mb = 0.0
+        self.users = 0
+        self.last_used = time.monotonic()
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.warmed = False
+
+
+class ModelRegistry:
+    """进程共享的模型注册表"""
+
+    def __init__(
+        self,
+        memory_budget_mb: Optional[float] = None,
+        loader: Callable[[str, str], Any] = load_whisper_model,
+        sizer: Callable[[Any], float] = model_size_mb
+    ):
+        """
+        初始化模型注册表
+
+        Args:
+            memory_budget_mb: 已加载模型的内存预算（MB），None 表示不限制
+            loader: 加载函数 (model_name, device) -> 模型
+            sizer: 统计模型内存占用（MB）的函数
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.loader = loader
+        self.sizer = sizer
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: ModelKey) -> Tuple[_Entry, bool]:
+        """取得条目并记录命中；返回 (条目, 是否需要由调用方加载)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry, False
+            entry = _Entry(key)
+            self._entries[key] = entry
+            return entry, True
+
+    def _load(self, entry: _Entry) -> None:
+        model_name, device = entry.key
+        try:
+            self._make_room(estimated_mb(model_name), exclude=entry.key)
+            print(f"正在加载 Whisper {model_name} 模型...")
+            start_time = time.time()
+            entry.model = self.loader(model_name, device)
+            entry.size_mb = self.sizer(entry.model)
+            with self._lock:
+                self.loads += 1
+            print(f"Whisper 模型加载完成，耗时: {time.time() - start_time:.2f}秒")
+            self._make_room(0, exclude=entry.key)
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                if self._entries.get(entry.key) is entry:
+                    del self._entries[entry.key]
+        finally:
+            entry.ready.set()
+
+    def _wait(self, key: ModelKey) -> _Entry:
+        entry, owner = self._entry(key)
+        if owner:
+            self._load(entry)
+        entry.ready.wait()
+        if entry.error is not None:
+            raise entry.error
+        return entry
+
+    def get(self, model_name: str, device: str = "cpu"):
+        """
+        获取模型，未加载时同步加载（其他线程正在加载时等待其完成）
+
+        Args:
+            model_name: 模型名称（量化模型带精度后缀，见 registry_name）
+            device: 运行设备
+
+        Returns:
+            模型对象
+        """
+        entry = self._wait((model_name, device))
+        entry.last_used = time.monotonic()
+        return entry.model
+
+    @contextmanager
+    def use(self, model_name: str, device: str = "cpu") -> Iterator[Any]:
+        """借用模型，借用期间不会被淘汰"""
+        while True:
+            entry = self._wait((model_name, device))
+            with self._lock:
+                # 等待期间可能刚好被淘汰，重新加载
+                if self._entries.get(entry.key) is entry:
+                    entry.users += 1
+                    break
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    def preload(self, model_name: str, device: str = "cpu", warmup: bool = True,
+                language: Optional[str] = "zh", cpus: Optional[Sequence[int]] = None) -> threading.Event:
+        """
+        在后台线程加载模型（可选预热一次解码），立即返回
+
+        Args:
+            model_name: 模型名称
+            device: 运行设备
+            warmup: 加载后是否用一秒静音做一次解码，提前完成首次推理的初始化
+            language: 预热解码使用的语言
+            cpus: 加载与预热期间把后台线程绑定到这些 CPU；预热是首次推理，OpenMP 线程池在此时创建并继承绑定
+
+        Returns:
+            加载（及预热）完成时置位的事件
+        """
+        done = threading.Event()
+
+        def run():
+            try:
+                with pinned(cpus), self.use(model_name, device) as model:
+                    # 并发的预加载只由一个线程预热
+                    with self._lock:
+                        entry = self._entries.get((model_name, device))
+                        warm = warmup and entry is not None and not entry.warmed
+                        if warm:
+                            entry.warmed = True
+                    if warm:
+                        try:
+                            self._warmup(model, device, language)
+                        except BaseException:
+                            with self._lock:
+                                entry.warmed = False
+                            raise
+            except Exception as e:
+                print(f"⚠️ Whisper {model_name} 预加载失败: {e}")
+            finally:
+                done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        return done
+
+    def _warmup(self, model, device: str, language: Optional[str]) -> None:
+        started = time.time()
+        silence = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+        model.transcribe(silence, language=language, fp16=device != "cpu")
+        print(f"Whisper 模型预热完成，耗时: {time.time() - started:.2f}秒")
+
+    def _make_room(self, needed_mb: float, exclude: ModelKey) -> None:
+        """淘汰最久未使用的空闲模型，直到预算容得下 needed_mb"""
+        if self.memory_budget_mb is None:
+            return
+        while True:
+            with self._lock:
+                used = sum(e.size_mb for e in self._entries.values())
+                if used + needed_mb <= self.memory_budget_mb:
+                    return
+                idle = [
+                    e for e in self._entries.values()
+                    if e.key != exclude and e.users == 0 and e.ready.is_set()
+                ]
+                if not idle:
+                    return
+                victim = min(idle, key=lambda e: e.last_used)
+                del self._entries[victim.key]
+                self.evictions += 1
+            print(f"♻️ 淘汰空闲的 Whisper {victim.key[0]} 模型 ({victim.size_mb:.0f} MB)")
+            victim.model = None
+
+    def evict(self, model_name: str, device: str = "cpu") -> bool:
+        """主动卸载一个空闲模型；正在使用时返回 False"""
+        with self._lock:
+            entry = self._entries.get((model_name, device))
+            if entry is None or entry.users > 0 or not entry.ready.is_set():
+                return False
+            del self._entries[entry.key]
+            self.evictions += 1
+        entry.model = None
+        return True
+
+    def loaded(self) -> list:
+        """已加载的 (模型, 设备) 列表"""
+        with self._lock:
+            return [key for key, e in self._entries.items() if e.model is not None]
+
+    def get_stats(self) -> dict:
+        """返回加载、命中、淘汰次数与内存占用"""
+        with self._lock:
+            memory = sum(e.size_mb for e in self._entries.values())
+            loaded = [f"{name}@{device}" for (name, device), e in self._entries.items() if e.model is not None]
+        return {
+            "loaded": loaded,
+            "loads": self.loads,
+            "hits": self.hits,
+            "evictions": self.evictions,
+            "memory_mb": round(memory, 1),
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """获取进程共享的模型注册表（内存预算取自环境变量 WHISPER_MEMORY_BUDGET_MB）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                budget = os.environ.get("WHISPER_MEMORY_BUDGET_MB")
+                _registry = ModelRegistry(memory_budget_mb=float(budget) if budget else None)
+    return _registry
+
+
+def preload_model(model_name: str = "tiny", device: str = "cpu", warmup: bool = True,
+                  language: Optional[str] = "zh", precision: str = "fp32",
+                  cpus: Optional[Sequence[int]] = None) -> threading.Event:
+    """在后台预加载并预热模型（进程启动时调用，不阻塞）"""
+    return get_model_registry().preload(registry_name(model_name, precision), device,
+                                        warmup=warmup, language=language, cpus=cpus)
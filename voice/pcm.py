@@ -0,0 +1,208 @@
+"""
+内存 PCM 音频模块
+录音器、STT、TTS 和播放器之间传递的统一音频类型，只在边界处编解码 WAV
+"""
+
+import io
+import wave
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+# 语音识别使用的采样率
+WHISPER_SAMPLE_RATE = 16000
+
+
+def _lowpass_kernel(cutoff: float, taps: int = 63) -> np.ndarray:
+    """
+    加窗 sinc 低通滤波器
+
+    Args:
+        cutoff: 截止频率（相对采样率，0-0.5）
+        taps: 滤波器阶数（奇数）
+
+    Returns:
+        归一化的 float32 滤波器系数
+    """
+    n = np.arange(taps) - (taps - 1) / 2.0
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def resample_float(audio: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """
+    在进程内重采样单声道 float32 音频（降采样前先抗混叠低通）
+
+    Args:
+        audio: 一维浮点数组
+        rate: 原采样率
+        target_rate: 目标采样率
+
+    Returns:
+        float32 数组
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if rate == target_rate or len(audio) == 0:
+        return audio
+
+    if target_rate < rate:
+        # 截止频率略低于目标奈奎斯特频率，避免 44.1/48 kHz 录音的高频混叠进语音频段
+        kernel = _lowpass_kernel(0.45 * target_rate / float(rate))
+        audio = np.convolve(audio, kernel, mode="same").astype(np.float32)
+
+    count = int(round(len(audio) * target_rate / float(rate)))
+    positions = np.arange(count) * (rate / float(target_rate))
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+class PCMBuffer:
+    """内存中的 16 位 PCM 音频（NumPy 数组承载，多声道按交错方式存放）"""
+
+    __slots__ = ("samples", "rate", "channels")
+
+    def __init__(self, samples: np.ndarray, rate: int, channels: int = 1):
+        """
+        初始化 PCM 缓冲区
+
+        Args:
+            samples: int16 采样数组（一维，多声道交错）
+            rate: 采样率
+            channels: 声道数
+        """
+        samples = np.asarray(samples)
+        if samples.dtype != np.int16:
+            samples = samples.astype(np.int16)
+        self.samples = samples.reshape(-1)
+        self.rate = rate
+        self.channels = channels
+
+    @classmethod
+    def empty(cls, rate: int = WHISPER_SAMPLE_RATE, channels: int = 1) -> "PCMBuffer":
+        """创建空缓冲区"""
+        return cls(np.zeros(0, dtype=np.int16), rate, channels)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[np.ndarray], rate: int, channels: int = 1) -> "PCMBuffer":
+        """由一组 int16 帧拼接而成"""
+        frames = list(frames)
+        if not frames:
+            return cls.empty(rate, channels)
+        return cls(np.concatenate(frames), rate, channels)
+
+    @classmethod
+    def from_float(cls, audio: np.ndarray, rate: int, channels: int = 1) -> "PCMBuffer":
+        """由 [-1, 1] 范围的浮点数组创建"""
+        audio = np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0)
+        return cls((audio * 32767.0).astype(np.int16), rate, channels)
+
+    @classmethod
+    def from_wav_bytes(cls, wav_bytes: bytes) -> "PCMBuffer":
+        """
+        在内存中解码 WAV 字节流
+
+        Args:
+            wav_bytes: WAV 格式的音频字节流
+
+        Returns:
+            PCM 缓冲区
+
+        Raises:
+            wave.Error: 不是 PCM WAV 数据
+        """
+        with wave.open(io.BytesIO(wav_bytes), 'rb') as wf:
+            return cls._from_wave(wf)
+
+    @classmethod
+    def from_wav_file(cls, wav_path: str) -> "PCMBuffer":
+        """读取 WAV 文件"""
+        with wave.open(wav_path, 'rb') as wf:
+            return cls._from_wave(wf)
+
+    @classmethod
+    def _from_wave(cls, wf: wave.Wave_read) -> "PCMBuffer":
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+        if width == 2:
+            samples = np.frombuffer(raw, dtype='<i2')
+        elif width == 1:
+            samples = ((np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8)
+        elif width == 4:
+            samples = (np.frombuffer(raw, dtype='<i4') >> 16).astype(np.int16)
+        else:
+            raise wave.Error(f"不支持的采样位宽: {width * 8} bit")
+        return cls(samples, wf.getframerate(), wf.getnchannels())
+
+    @property
+    def num_frames(self) -> int:
+        """采样帧数（每帧包含所有声道）"""
+        return len(self.samples) // self.channels
+
+    @property
+    def duration(self) -> float:
+        """时长（秒）"""
+        return self.num_frames / float(self.rate) if self.rate else 0.0
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def to_wav_bytes(self) -> bytes:
+        """在内存中编码为 WAV 字节流"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.rate)
+            wf.writeframes(self.samples.astype('<i2', copy=False).tobytes())
+        return buffer.getvalue()
+
+    def to_mono(self) -> "PCMBuffer":
+        """混缩为单声道"""
+        if self.channels == 1:
+            return self
+        frames = self.samples[:self.num_frames * self.channels].reshape(-1, self.channels)
+        return PCMBuffer(frames.mean(axis=1).astype(np.int16), self.rate, 1)
+
+    def resample(self, rate: int) -> "PCMBuffer":
+        """
+        重采样到指定采样率（线性插值）
+
+        Args:
+            rate: 目标采样率
+
+        Returns:
+            新的 PCM 缓冲区；采样率相同时返回自身
+        """
+        if rate == self.rate:
+            return self
+        if self.num_frames == 0:
+            return PCMBuffer.empty(rate, self.channels)
+
+        count = int(round(self.num_frames * rate / float(self.rate)))
+        positions = np.arange(count) * (self.rate / float(rate))
+        frames = self.samples[:self.num_frames * self.channels].reshape(-1, self.channels)
+        source = np.arange(self.num_frames)
+        out = np.empty((count, self.channels), dtype=np.int16)
+        for channel in range(self.channels):
+            out[:, channel] = np.interp(positions, source, frames[:, channel]).astype(np.int16)
+        return PCMBuffer(out.reshape(-1), rate, self.channels)
+
+    def to_float32(self, rate: Optional[int] = None) -> np.ndarray:
+        """
+        转换为单声道 float32 数组（[-1, 1]），可同时重采样
+
+        Args:
+            rate: 目标采样率（可选）
+
+        Returns:
+            float32 数组
+        """
+        audio = self.to_mono().samples.astype(np.float32) / 32768.0
+        if rate is not None:
+            audio = resample_float(audio, self.rate, rate)
+        return audio
+
+    def chunks(self, frames_per_chunk: int) -> Iterator[np.ndarray]:
+        """按帧数切分，返回 int16 视图（不复制）"""
+        step = frames_per_chunk * self.channels
+        for offset in range(0, len(self.samples), step):
+            yield self.samples[offset:offset + step]
@@ -0,0 +1,231 @@
+"""
+流式播放模块
+为分块到达的 PCM 提供抖动缓冲：后台线程拉取音频块并统一格式，播放端按固定块无缝输出
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from .pcm import PCMBuffer
+from .vad import frame_rms
+
+PCMChunk = Union[PCMBuffer, np.ndarray, bytes]
+
+
+def to_pcm(chunk: PCMChunk, rate: int, channels: int = 1) -> PCMBuffer:
+    """
+    把各种形式的音频块统一为 PCMBuffer
+
+    Args:
+        chunk: PCMBuffer、NumPy 数组（int16 或 [-1, 1] 浮点）、原始 int16 字节或 WAV 字节
+        rate: 数组/原始字节的采样率
+        channels: 数组/原始字节的声道数
+
+    Returns:
+        PCM 缓冲区
+    """
+    if isinstance(chunk, PCMBuffer):
+        return chunk
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        chunk = bytes(chunk)
+        if chunk[:4] == b'RIFF':
+            return PCMBuffer.from_wav_bytes(chunk)
+        return PCMBuffer(np.frombuffer(chunk, dtype='<i2'), rate, channels)
+    chunk = np.asarray(chunk)
+    if np.issubdtype(chunk.dtype, np.floating):
+        return PCMBuffer.from_float(chunk, rate, channels)
+    return PCMBuffer(chunk, rate, channels)
+
+
+class OutputMeter:
+    """记录最近输出音频的电平，作为回声门限的参考信号"""
+
+    def __init__(self, window_ms: float = 300.0):
+        """
+        初始化输出电平表
+
+        Args:
+            window_ms: 参考窗口（毫秒），应覆盖声卡输出到麦克风拾音的回声延迟
+        """
+        self.window = window_ms / 1000.0
+        self._levels: Deque[tuple] = deque()
+        self._lock = threading.Lock()
+
+    def update(self, block: np.ndarray) -> None:
+        """记录刚写入输出流的音频块"""
+        now = time.monotonic()
+        with self._lock:
+            self._levels.append((now, frame_rms(block)))
+            while self._levels and now - self._levels[0][0] > self.window:
+                self._levels.popleft()
+
+    def level(self) -> float:
+        """参考窗口内的最大输出电平（帧 RMS），没有输出时为 0"""
+        now = time.monotonic()
+        with self._lock:
+            levels = [rms for t, rms in self._levels if now - t <= self.window]
+        return max(levels) if levels else 0.0
+
+
+class JitterBuffer:
+    """音频块的抖动缓冲区"""
+
+    def __init__(
+        self,
+        source: Iterable[PCMChunk],
+        rate: Optional[int] = None,
+        channels: int = 1,
+        prebuffer_ms: float = 120.0,
+        max_buffer_ms: float = 5000.0
+    ):
+        """
+        初始化抖动缓冲区
+
+        Args:
+            source: 音频块的可迭代对象（可以是边合成边产出的生成器）
+            rate: 输出采样率，默认取第一个音频块的采样率
+            channels: 输出声道数
+            prebuffer_ms: 开始播放（及欠载后恢复播放）前需要缓冲的时长（毫秒）
+            max_buffer_ms: 缓冲上限（毫秒），超过时暂停拉取音频块
+        """
+        self.source = source
+        self.rate = rate
+        self.channels = channels
+        self.prebuffer_ms = prebuffer_ms
+        self.max_buffer_ms = max_buffer_ms
+        self.underruns = 0
+        self.resampled_chunks = 0
+
+        self._queue: Deque[np.ndarray] = deque()
+        self._buffered = 0
+        self._finished = False
+        self._stopped = False
+        self._error: Optional[BaseException] = None
+        self._format_ready = threading.Event()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def stopped(self) -> bool:
+        """是否已被中止"""
+        return self._stopped
+
+    def start(self) -> None:
+        """启动后台拉取线程"""
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """中止播放：丢弃缓冲内容并停止拉取"""
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._buffered = 0
+            self._cond.notify_all()
+        self._format_ready.set()
+
+    def wait_format(self) -> Optional[int]:
+        """等待第一个音频块确定输出采样率；没有任何音频时返回 None"""
+        self._format_ready.wait()
+        self._raise_error()
+        if self._stopped:
+            return None
+        return self.rate
+
+    def _produce(self) -> None:
+        try:
+            for chunk in self.source:
+                if self._stopped:
+                    break
+                pcm = to_pcm(chunk, self.rate or 16000, self.channels)
+                if self.rate is None:
+                    self.rate = pcm.rate
+                if pcm.rate != self.rate:
+                    self.resampled_chunks += 1
+                samples = self._convert(pcm)
+                if len(samples) == 0:
+                    continue
+                self._format_ready.set()
+
+                limit = int(self.rate * self.max_buffer_ms / 1000) * self.channels
+                with self._cond:
+                    while self._buffered >= limit and not self._stopped:
+                        self._cond.wait()
+                    if self._stopped:
+                        break
+                    self._queue.append(samples)
+                    self._buffered += len(samples)
+                    self._cond.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+            if self.rate is None:
+                self._stopped = True
+            self._format_ready.set()
+
+    def _convert(self, pcm: PCMBuffer) -> np.ndarray:
+        """转换为输出流的采样率和声道数"""
+        if pcm.channels != self.channels:
+            pcm = pcm.to_mono()
+            if self.channels > 1:
+                pcm = PCMBuffer(np.repeat(pcm.samples, self.channels), pcm.rate, self.channels)
+        return pcm.resample(self.rate).samples
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def blocks(self, block_frames: int = 1024) -> Iterator[np.ndarray]:
+        """
+        按固定帧数无缝产出音频块（最后一块可能较短）
+
+        Args:
+            block_frames: 每块帧数
+
+        Yields:
+            int16 采样数组
+        """
+        block = block_frames * self.channels
+        prebuffer = int((self.rate or 16000) * self.prebuffer_ms / 1000) * self.channels
+        buffering = True
+
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._finished or (self._buffered >= block and
+                                          (not buffering or self._buffered >= prebuffer)):
+                        break
+                    if not buffering and self._buffered < block:
+                        # 欠载：重新积累预缓冲后再继续，避免断断续续
+                        self.underruns += 1
+                        buffering = True
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                buffering = False
+
+                parts = []
+                need = block
+                while need > 0 and self._queue:
+                    head = self._queue.popleft()
+                    if len(head) > need:
+                        self._queue.appendleft(head[need:])
+                        head = head[:need]
+                    parts.append(head)
+                    need -= len(head)
+                    self._buffered -= len(head)
+                finished = self._finished and not self._queue
+                self._cond.notify_all()
+
+            if parts:
+                yield parts[0] if len(parts) == 1 else np.concatenate(parts)
+            if finished:
+                self._raise_error()
+                return
@@ -0,0 +1,242 @@
+"""
+分句流水线播放模块
+把回复切分为句子/分句，后台线程合成下一句的同时播放当前句：首个音频的延迟从整段合成时间降到一句的合成时间
+"""
+
+import queue
+import re
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from .pcm import PCMBuffer
+from .tts import TTSBase
+
+# 句末标点（中英文），英文句点后需跟空白，避免切开小数和缩写中的点
+_SENTENCE_END = re.compile(r"(?:[。！？!?；;…]+[”’\"')）]*|\.(?=\s)|\n+)")
+# 超长句子退而在分句标点处切开
+_CLAUSE_END = re.compile(r"[，,、：:]")
+_PAUSES = "。！？!?；;…，,、：:”’\"')）"
+
+_CODE_BLOCK = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"https?://\S+")
+_LINE_MARKUP = re.compile(r"^\s*(?:#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)", re.MULTILINE)
+_INLINE_MARKUP = re.compile(r"(\*\*|__|\*|`|~~)")
+_TABLE_RULE = re.compile(r"^\s*\|?[\s:|-]+\|[\s:|-]*$", re.MULTILINE)
+
+
+def strip_markdown(text: str) -> str:
+    """
+    去掉朗读时没有意义的 Markdown 标记（代码块、链接地址、标题/列表符号、强调符号）
+
+    列表项和标题保留为独立的行，之后按换行分句
+    """
+    text = _CODE_BLOCK.sub("\n", text)
+    text = _LINK.sub(r"\1", text)
+    text = _URL.sub("", text)
+    text = _TABLE_RULE.sub("", text)
+    text = _LINE_MARKUP.sub("", text)
+    text = _INLINE_MARKUP.sub("", text)
+    return text.replace("|", " ")
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """把超过 max_chars 的句子在分句标点处切开，仍然过长时硬切"""
+    pieces: List[str] = []
+    start = 0
+    for match in _CLAUSE_END.finditer(sentence):
+        end = match.end()
+        if end - start >= max_chars // 2:
+            pieces.append(sentence[start:end])
+            start = end
+    pieces.append(sentence[start:])
+
+    result = []
+    for piece in pieces:
+        while len(piece) > max_chars:
+            result.append(piece[:max_chars])
+            piece = piece[max_chars:]
+        result.append(piece)
+    return result
+
+
+def split_sentences(text: str, min_chars: int = 4, max_chars: int = 80) -> List[str]:
+    """
+    把回复切分为适合逐句合成的片段
+
+    Args:
+        text: 回复文本（可以是 Markdown）
+        min_chars: 过短的片段并入下一句（避免一两个字单独合成，韵律破碎）
+        max_chars: 超过该长度的句子在逗号等分句标点处切开
+
+    Returns:
+        片段列表（不含空白片段）
+    """
+    text = strip_markdown(text)
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    sentences.append(text[start:])
+
+    pieces = []
+    for sentence in sentences:
+        sentence = " ".join(sentence.split())
+        if sentence:
+            pieces.extend(p.strip() for p in _split_long(sentence, max_chars) if p.strip())
+
+    merged: List[str] = []
+    carry = ""
+    for piece in pieces:
+        piece = _join(carry, piece) if carry else piece
+        if len(piece) < min_chars:
+            carry = piece
+            continue
+        merged.append(piece)
+        carry = ""
+    if carry:
+        if merged:
+            merged[-1] = _join(merged[-1], carry)
+        else:
+            merged.append(carry)
+    return merged
+
+
+def _join(first: str, second: str) -> str:
+    """合并两个片段：英文加空格，没有标点的中文片段（如标题）加逗号停顿"""
+    if first[-1].isascii() or second[0].isascii():
+        return f"{first} {second}"
+    if first[-1] in _PAUSES:
+        return first + second
+    return f"{first}，{second}"
+
+
+class PipelinedSpeaker:
+    """分句流水线播放器"""
+
+    _END = object()
+
+    def __init__(self, tts: TTSBase, player, lookahead: int = 1, min_chars: int = 4, max_chars: int = 80):
+        """
+        初始化流水线播放器
+
+        Args:
+            tts: 文本转语音引擎（使用 text_to_pcm）
+            player: 支持 play_stream 的播放器
+            lookahead: 最多提前合成的句数
+            min_chars: 见 split_sentences
+            max_chars: 见 split_sentences
+        """
+        self.tts = tts
+        self.player = player
+        self.lookahead = max(1, lookahead)
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+
+        self.sentences = 0
+        self.first_audio_ms: Optional[float] = None
+        self.synthesis_ms = 0.0
+        self.cancelled = False
+
+        self._cancel = threading.Event()
+
+    def synthesize(self, text: str) -> Iterator[PCMBuffer]:
+        """
+        逐句合成：后台线程最多提前 lookahead 句合成，调用方消费当前句时下一句已在合成
+
+        Args:
+            text: 回复文本
+
+        Yields:
+            每句的 PCM
+        """
+        sentences = split_sentences(text, self.min_chars, self.max_chars)
+        ready: "queue.Queue" = queue.Queue(maxsize=self.lookahead)
+        errors: List[BaseException] = []
+        started = time.perf_counter()
+
+        def put(item) -> bool:
+            while not self._cancel.is_set():
+                try:
+                    ready.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work() -> None:
+            try:
+                for sentence in sentences:
+                    if self._cancel.is_set():
+                        return
+                    synth_started = time.perf_counter()
+                    pcm = self.tts.text_to_pcm(sentence)
+                    self.synthesis_ms += (time.perf_counter() - synth_started) * 1000
+                    if not put(pcm):
+                        return
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(self._END)
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        try:
+            while not self._cancel.is_set():
+                try:
+                    item = ready.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if item is self._END:
+                    break
+                if self.first_audio_ms is None:
+                    self.first_audio_ms = (time.perf_counter() - started) * 1000
+                self.sentences += 1
+                yield item
+        finally:
+            self._cancel.set()
+            worker.join()
+        if errors:
+            raise errors[0]
+
+    def speak(self, text: str, prebuffer_ms: float = 0.0) -> bool:
+        """
+        合成并播放回复，阻塞到播放结束或被取消
+
+        Args:
+            text: 回复文本
+            prebuffer_ms: 播放器抖动缓冲的预缓冲时长（每句整句到达，默认不需要）
+
+        Returns:
+            完整播放返回 True，被 cancel() 中止返回 False
+        """
+        self._cancel.clear()
+        self.cancelled = False
+        self.sentences = 0
+        self.first_audio_ms = None
+        self.synthesis_ms = 0.0
+        try:
+            self.player.play_stream(self.synthesize(text), prebuffer_ms=prebuffer_ms)
+        finally:
+            # 播放器被直接 stop() 时生成器可能没有走到结尾，确保合成线程退出
+            self._cancel.set()
+        return not self.cancelled
+
+    def cancel(self) -> None:
+        """中止播放与后续句子的合成（可在其他线程调用）"""
+        self.cancelled = True
+        self._cancel.set()
+        stop = getattr(self.player, "stop", None)
+        if stop is not None:
+            stop()
+
+    def get_stats(self) -> dict:
+        """返回最近一次播放的句数、首个音频延迟和合成总耗时"""
+        return {
+            "sentences": self.sentences,
+            "first_audio_ms": round(self.first_audio_ms, 1) if self.first_audio_ms is not None else None,
+            "synthesis_ms": round(self.synthesis_ms, 1),
+            "cancelled": self.cancelled,
+        }
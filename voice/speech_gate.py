@@ -0,0 +1,115 @@
+"""
+语音门控模块
+在调用智能体之前拦截噪声上的识别结果：无语音概率高且置信度低的转录，以及 Whisper 在静音/噪声上的常见幻觉文本
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, Optional
+
+from .stt import Transcript
+
+# 整句只由这些短语构成时视为幻觉（Whisper 训练数据中视频结尾的常见字幕）
+# 不包含“谢谢”“再见”这类用户也会说的短句（“再见”还是退出命令）
+DEFAULT_HALLUCINATIONS = (
+    "谢谢观看", "谢谢大家观看", "感谢观看", "感谢您的观看", "谢谢收看",
+    "请订阅", "请不吝点赞订阅转发打赏支持", "点赞订阅转发", "我们下期再见", "下期再见",
+    "中文字幕", "Thank you for watching", "Thanks for watching",
+)
+# 出现在任何位置都说明是字幕署名一类的幻觉
+DEFAULT_MARKERS = (
+    "字幕由", "字幕志愿者", "字幕提供", "amara.org", "明镜与点点", "优优独播剧场", "索兰娅",
+)
+
+_NORMALIZE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白与标点并转为小写"""
+    return _NORMALIZE.sub("", text).lower()
+
+
+class SpeechGate:
+    """识别结果门控"""
+
+    def __init__(
+        self,
+        no_speech_threshold: float = 0.6,
+        logprob_threshold: float = -1.0,
+        min_logprob: float = -1.5,
+        hallucinations: Iterable[str] = DEFAULT_HALLUCINATIONS,
+        markers: Iterable[str] = DEFAULT_MARKERS
+    ):
+        """
+        初始化门控
+
+        Args:
+            no_speech_threshold: 无语音概率超过该值且置信度低于 logprob_threshold 时拒绝（与 Whisper 跳过静音窗口的规则一致）
+            logprob_threshold: 配合 no_speech_threshold 使用的平均对数概率阈值
+            min_logprob: 平均对数概率低于该值时无论无语音概率如何都拒绝
+            hallucinations: 整句只由这些短语构成时拒绝
+            markers: 包含这些片段时拒绝
+        """
+        self.no_speech_threshold = no_speech_threshold
+        self.logprob_threshold = logprob_threshold
+        self.min_logprob = min_logprob
+        # 长短语优先，避免先删掉其中的短词
+        self.hallucinations = sorted({normalize_text(p) for p in hallucinations if normalize_text(p)},
+                                     key=len, reverse=True)
+        self.markers = [normalize_text(m) for m in markers if normalize_text(m)]
+
+        self.accepted = 0
+        self.rejected = 0
+        self.reasons: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def reason(self, transcript: Transcript) -> Optional[str]:
+        """
+        判断一次转录应被拒绝的原因（不计数）
+
+        Returns:
+            no_speech / low_confidence / hallucination / empty；应接受时为 None
+        """
+        text = normalize_text(transcript.text)
+        if not text:
+            return "empty"
+
+        no_speech, logprob = transcript.no_speech_prob, transcript.avg_logprob
+        if logprob is not None:
+            if no_speech is not None and no_speech > self.no_speech_threshold and logprob < self.logprob_threshold:
+                return "no_speech"
+            if logprob < self.min_logprob:
+                return "low_confidence"
+
+        if any(marker in text for marker in self.markers):
+            return "hallucination"
+        for phrase in self.hallucinations:
+            text = text.replace(phrase, "")
+        if not text:
+            return "hallucination"
+        return None
+
+    def check(self, transcript: Transcript) -> bool:
+        """
+        判断是否把转录交给智能体，并更新计数
+
+        Returns:
+            True 表示接受
+        """
+        reason = self.reason(transcript)
+        with self._lock:
+            if reason is None:
+                self.accepted += 1
+                return True
+            self.rejected += 1
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return False
+
+    def get_stats(self) -> dict:
+        """返回接受与拒绝的轮数，以及各拒绝原因的次数"""
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "reasons": dict(self.reasons),
+            }
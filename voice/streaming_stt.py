@@ -0,0 +1,312 @@
+"""
+流式语音识别模块
+边录音边转录：按固定节奏重新解码滑动窗口，用相邻两次解码结果的公共前缀（local agreement）确认文本
+"""
+
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .pcm import WHISPER_SAMPLE_RATE, resample_float
+
+# 中日文按字切分，其他文字按空白分词（保留前导空白以便还原原文）
+_TOKEN_PATTERN = re.compile(r"\s*(?:[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]|[^\s\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+)")
+# Whisper 一次最多处理 30 秒音频，窗口无法按片段裁剪时的硬上限
+_MAX_WINDOW_SECONDS = 28.0
+_PUNCTUATION = ",.!?;:，。！？；：、…\"'“”‘’"
+
+
+def tokenize(text: str) -> List[str]:
+    """把识别文本切分为用于比较的单元"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def join_tokens(tokens: List[str]) -> str:
+    """把切分单元还原为文本"""
+    return "".join(tokens).strip()
+
+
+def _key(token: str) -> str:
+    """比较用的归一化形式：忽略大小写和标点（相邻两次解码的标点经常不同）"""
+    return token.strip().lower().strip(_PUNCTUATION)
+
+
+def common_prefix(a: List[str], b: List[str]) -> int:
+    """
+    两个切分结果的公共前缀（比较时跳过纯标点单元）
+
+    Returns:
+        公共前缀在 b 中占用的单元数
+    """
+    i = j = matched = 0
+    while True:
+        while i < len(a) and not _key(a[i]):
+            i += 1
+        while j < len(b) and not _key(b[j]):
+            j += 1
+        if i >= len(a) or j >= len(b) or _key(a[i]) != _key(b[j]):
+            return matched
+        i += 1
+        j += 1
+        matched = j
+
+
+class StreamUpdate:
+    """一次流式识别结果"""
+
+    def __init__(self, committed: str, partial: str, final: bool, audio_seconds: float, decode_ms: float):
+        self.committed = committed
+        self.partial = partial
+        self.final = final
+        self.audio_seconds = audio_seconds
+        self.decode_ms = decode_ms
+
+    @property
+    def text(self) -> str:
+        """已确认文本加上未确认的部分"""
+        return (self.committed + self.partial).strip()
+
+    def __repr__(self) -> str:
+        return f"StreamUpdate(committed={self.committed!r}, partial={self.partial!r}, final={self.final})"
+
+
+# 解码函数：输入 16kHz float32 窗口和上下文提示，返回 (文本, [(片段文本, 片段结束秒), ...])
+DecodeFunction = Callable[[np.ndarray, str], Tuple[str, List[Tuple[str, float]]]]
+
+
+class StreamingTranscriber:
+    """流式转录会话"""
+
+    def __init__(
+        self,
+        decode: DecodeFunction,
+        rate: int = WHISPER_SAMPLE_RATE,
+        step_ms: float = 500.0,
+        min_audio_ms: float = 300.0,
+        window_seconds: float = 15.0,
+        on_update: Optional[Callable[[StreamUpdate], None]] = None,
+        background: bool = True,
+        features=None
+    ):
+        """
+        初始化流式转录会话
+
+        Args:
+            decode: 解码函数（见 DecodeFunction），通常由 STT 引擎的 start_stream 提供
+            rate: 输入帧的采样率
+            step_ms: 两次解码之间至少新增的音频（毫秒）
+            min_audio_ms: 开始第一次解码前至少积累的音频（毫秒）
+            window_seconds: 解码窗口上限（秒），超过时把已确认的片段移出窗口
+            on_update: 每次解码后的回调（在解码线程中调用）
+            background: 是否在后台线程解码（False 时在 feed 中同步解码，便于测试）
+            features: 增量特征提取器（需有 samples、feed、trim），解码前把新增的 16kHz 音频喂给它，
+                裁剪窗口时同步裁剪；decode 可直接使用它已经算好的特征
+        """
+        self.decode = decode
+        self.rate = rate
+        self.step = int(rate * step_ms / 1000)
+        self.min_audio = int(rate * min_audio_ms / 1000)
+        self.window = int(rate * window_seconds)
+        self.on_update = on_update
+        self.background = background
+        self.features = features
+
+        self.passes = 0
+        self.last_update: Optional[StreamUpdate] = None
+
+        self._chunks: List[np.ndarray] = []
+        self._samples = 0
+        self._decoded_samples = 0
+        self._trimmed_seconds = 0.0
+        self._final_tokens: List[str] = []
+        self._committed: List[str] = []
+        self._previous: List[str] = []
+        self._segments: List[Tuple[str, float]] = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    @property
+    def committed_text(self) -> str:
+        """已确认、不会再改变的文本"""
+        with self._cond:
+            return join_tokens(self._final_tokens + self._committed)
+
+    def feed(self, frame: np.ndarray) -> None:
+        """
+        追加一帧音频
+
+        Args:
+            frame: int16 采样数组（单声道，采样率为 rate）
+        """
+        self.append(frame)
+        if not self.background:
+            self.poll()
+
+    def append(self, frame: np.ndarray) -> None:
+        """追加一帧音频但不解码（background=False 时由调用方在合适的线程调用 poll）"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("流式转录会话已结束")
+            self._chunks.append(np.asarray(frame, dtype=np.int16))
+            self._samples += len(frame)
+            self._cond.notify_all()
+
+    @property
+    def decode_due(self) -> bool:
+        """是否已积累足够的新音频，需要再解码一次"""
+        with self._cond:
+            return not self._closed and self._due()
+
+    def poll(self) -> Optional[StreamUpdate]:
+        """
+        新音频足够时解码一次
+
+        Returns:
+            本次解码的结果；未到解码时机时为 None
+        """
+        if not self.decode_due:
+            return None
+        return self._decode_pass(final=False)
+
+    def _due(self) -> bool:
+        return (self._samples >= self.min_audio and
+                self._samples - self._decoded_samples >= self.step)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self._decode_pass(final=False)
+
+    def _window(self) -> Tuple[np.ndarray, int]:
+        """当前窗口的 float32 音频及其覆盖到的采样位置"""
+        with self._cond:
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            samples = self._chunks[0] if self._chunks else np.zeros(0, dtype=np.int16)
+            total = self._samples
+        audio = samples.astype(np.float32) / 32768.0
+        if self.rate != WHISPER_SAMPLE_RATE:
+            audio = resample_float(audio, self.rate, WHISPER_SAMPLE_RATE)
+        if self.features is not None and len(audio) > self.features.samples:
+            self.features.feed(audio[self.features.samples:])
+        return audio, total
+
+    def _decode_pass(self, final: bool) -> StreamUpdate:
+        audio, total = self._window()
+        prompt = join_tokens(self._final_tokens)
+        started = time.perf_counter()
+        text, segments = self.decode(audio, prompt) if len(audio) else ("", [])
+        decode_ms = (time.perf_counter() - started) * 1000
+
+        with self._cond:
+            hypothesis = tokenize(text)
+            self.passes += 1
+            self._decoded_samples = total
+            self._segments = segments
+
+            # 已确认的文本不再改变，新假设只补充其后的部分
+            partial = hypothesis[len(self._committed):]
+            if final:
+                self._committed = self._committed + partial
+                partial = []
+            else:
+                agreed = common_prefix(self._previous, hypothesis)
+                if agreed > len(self._committed):
+                    self._committed = hypothesis[:agreed]
+                    partial = hypothesis[agreed:]
+            self._previous = hypothesis
+
+            update = StreamUpdate(
+                committed=join_tokens(self._final_tokens + self._committed),
+                partial=join_tokens(partial),
+                final=final,
+                audio_seconds=self._trimmed_seconds + total / float(self.rate),
+                decode_ms=decode_ms
+            )
+            self.last_update = update
+            if not final and self._samples > self.window:
+                self._trim()
+
+        if self.on_update is not None:
+            self.on_update(update)
+        return update
+
+    def _trim(self) -> None:
+        """把已确认的完整片段移出窗口（需持有锁）"""
+        cut_seconds = 0.0
+        cut_tokens = 0
+        count = 0
+        # 最后一个片段可能还没说完，只在它之前的片段边界处裁剪
+        for segment_text, end in self._segments[:-1]:
+            count += len(tokenize(segment_text))
+            if count > len(self._committed):
+                break
+            cut_seconds, cut_tokens = end, count
+
+        if cut_tokens == 0:
+            # 窗口内没有完整确认的片段：保留最近一个窗口，超出部分按当前假设定稿，避免超过模型上下文
+            if self._samples < int(_MAX_WINDOW_SECONDS * self.rate):
+                return
+            cut_seconds = (self._samples - self.window) / float(self.rate)
+            cut_tokens = len(self._committed)
+
+        # 按 10ms 对齐裁剪点，增量特征提取器可以整帧丢弃缓存
+        hop = self.rate // 100
+        cut = min(int(cut_seconds * self.rate) // hop * hop, self._samples // hop * hop)
+        samples = np.concatenate(self._chunks) if len(self._chunks) > 1 else self._chunks[0]
+        self._chunks = [samples[cut:]]
+        self._samples -= cut
+        self._decoded_samples = max(0, self._decoded_samples - cut)
+        self._trimmed_seconds += cut / float(self.rate)
+        if self.features is not None:
+            self.features.trim(cut // hop * (WHISPER_SAMPLE_RATE // 100))
+        self._final_tokens += self._committed[:cut_tokens]
+        self._committed = self._committed[cut_tokens:]
+        self._previous = self._previous[cut_tokens:]
+        self._segments = []
+
+    def cancel(self) -> None:
+        """结束会话并丢弃未解码的音频（不做最后一次解码）"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def finish(self) -> str:
+        """
+        结束输入并返回最终文本
+
+        如果最后一次解码已经覆盖了全部音频（端点检测的静音尾部期间通常如此），直接返回，不再解码
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+        last = self.last_update
+        if last is not None and self._decoded_samples == self._samples:
+            with self._cond:
+                self._committed = self._committed + self._previous[len(self._committed):]
+            final = StreamUpdate(
+                committed=self.committed_text, partial="", final=True,
+                audio_seconds=last.audio_seconds, decode_ms=0.0
+            )
+            self.last_update = final
+            if self.on_update is not None:
+                self.on_update(final)
+            return final.committed
+
+        if self._samples == 0:
+            return self.committed_text
+        return self._decode_pass(final=True).committed
@@ -5,10 +5,320 @@
 
 import os
 import tempfile
-import time
-from typing import Optional
+import threading
+import wave
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Union
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from .pcm import PCMBuffer, WHISPER_SAMPLE_RATE, resample_float
+from .streaming_stt import StreamingTranscriber
+from .model_registry import get_model_registry, registry_name
+from .cpu_budget import apply_thread_budget, pinned
+
+# transcribe_pcm 接受的音频：PCMBuffer，或 int16 / [-1, 1] 浮点的 NumPy 数组
+AudioInput = Union[PCMBuffer, np.ndarray]
+
+# Whisper 单个解码窗口的长度（采样点数，30 秒）
+WHISPER_WINDOW_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+# log-mel 帧移（采样点数）：每秒 100 帧，编码器卷积后每秒 50 个位置
+WHISPER_HOP_LENGTH = 160
+WHISPER_WINDOW_FRAMES = WHISPER_WINDOW_SAMPLES // WHISPER_HOP_LENGTH
+
+# 温度回退（与 whisper.transcribe 的默认值一致）：结果重复（压缩比过高）或置信度过低时依次提高温度重新解码
+FALLBACK_TEMPERATURES = (0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# 采样解码时的候选数
+FALLBACK_BEST_OF = 5
+
+
+def to_whisper_input(audio: AudioInput, sample_rate: Optional[int] = None) -> np.ndarray:
+    """
+    把内存音频转换为 Whisper 需要的 16kHz 单声道 float32 数组（进程内重采样，不经过 ffmpeg）
+    
+    Args:
+        audio: PCMBuffer 或 NumPy 数组（一维，或形如 (帧数, 声道数) 的二维数组）
+        sample_rate: 数组的采样率，默认视为 16kHz；PCMBuffer 使用自带的采样率
+        
+    Returns:
+        float32 数组
+    """
+    if isinstance(audio, PCMBuffer):
+        return audio.to_float32(WHISPER_SAMPLE_RATE)
+    
+    audio = np.asarray(audio)
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1)
+    if np.issubdtype(audio.dtype, np.integer):
+        audio = audio.astype(np.float32) / 32768.0
+    return resample_float(audio, sample_rate or WHISPER_SAMPLE_RATE, WHISPER_SAMPLE_RATE)
+
+
+def trim_silence(audio: np.ndarray, threshold_db: float = -35.0, pad_ms: float = 200.0,
+                 frame_ms: float = 20.0) -> np.ndarray:
+    """
+    去掉首尾的静音
+    
+    Args:
+        audio: 16kHz float32 数组
+        threshold_db: 相对最响一帧的能量阈值（dB），低于它的首尾帧视为静音
+        pad_ms: 语音前后保留的余量（毫秒）
+        frame_ms: 分析帧长（毫秒）
+        
+    Returns:
+        裁剪后的数组（视图）；全部静音时返回空数组
+    """
+    frame = int(WHISPER_SAMPLE_RATE * frame_ms / 1000)
+    count = len(audio) // frame
+    if count == 0:
+        return audio
+    frames = audio[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    peak = rms.max()
+    if peak <= 1e-4:
+        return audio[:0]
+    voiced = np.nonzero(rms >= peak * 10 ** (threshold_db / 20.0))[0]
+    pad = int(WHISPER_SAMPLE_RATE * pad_ms / 1000)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(audio), (voiced[-1] + 1) * frame + pad)
+    return audio[start:end]
+
+
+def audio_context_frames(num_samples: int, margin_ms: float = 1000.0) -> int:
+    """
+    给定音频长度所需的 log-mel 帧数（含余量，取偶数，不超过 30 秒窗口）
+    
+    Args:
+        num_samples: 16kHz 采样点数
+        margin_ms: 在语音之后额外保留的上下文（毫秒），缓解截断上下文后的重复与幻觉
+    """
+    frames = int(np.ceil(num_samples / WHISPER_HOP_LENGTH + margin_ms / 10.0))
+    frames += frames % 2
+    return min(WHISPER_WINDOW_FRAMES, frames)
+
+
+# Whisper 的 STFT 参数：25ms 汉宁窗，10ms 帧移，帧以采样点为中心
+WHISPER_N_FFT = 400
+
+
+class LogMelExtractor:
+    """
+    增量 log-mel 特征提取器
+    
+    随音频到达只计算新增帧的 STFT 与 mel 能量，并缓存下来；滑动窗口重复解码时不再对整个窗口重做 STFT。
+    输出与 Whisper transcribe 对同一窗口计算的特征一致（左端反射填充、右端补零、按窗口最大值压缩动态范围）
+    """
+    
+    def __init__(self, filters: np.ndarray):
+        """
+        初始化特征提取器
+        
+        Args:
+            filters: mel 滤波器组，形状 (n_mels, WHISPER_N_FFT // 2 + 1)
+        """
+        self.filters = np.asarray(filters, dtype=np.float32)
+        self.n_mels = self.filters.shape[0]
+        self.computed_frames = 0
+        
+        n = np.arange(WHISPER_N_FFT)
+        # torch.hann_window 默认的周期汉宁窗
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * n / WHISPER_N_FFT)).astype(np.float32)
+        self._audio = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+        self._samples = 0
+        self._mel = np.zeros((self.n_mels, 256), dtype=np.float32)
+        # 已缓存的帧数（这些帧的窗口完全落在已收到的音频内，不会再变）
+        self._final = 0
+    
+    @classmethod
+    def for_whisper(cls, n_mels: int = 80) -> "LogMelExtractor":
+        """使用 Whisper 自带的 mel 滤波器组"""
+        import whisper.audio
+        path = os.path.join(os.path.dirname(whisper.audio.__file__), "assets", "mel_filters.npz")
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f[f"mel_{n_mels}"])
+    
+    @property
+    def samples(self) -> int:
+        """窗口内的采样点数"""
+        return self._samples
+    
+    def feed(self, audio: np.ndarray) -> None:
+        """
+        追加 16kHz float32 音频
+        
+        Args:
+            audio: 新到达的采样
+        """
+        count = len(audio)
+        if count == 0:
+            return
+        needed = self._samples + count
+        if needed > len(self._audio):
+            grown = np.zeros(max(needed, 2 * len(self._audio)), dtype=np.float32)
+            grown[:self._samples] = self._audio[:self._samples]
+            self._audio = grown
+        self._audio[self._samples:needed] = audio
+        self._samples = needed
+    
+    def trim(self, count: int) -> None:
+        """
+        从窗口开头移除采样（需为帧移的整数倍，缓存的帧随之移除）
+        
+        Args:
+            count: 移除的采样点数
+        """
+        if count % WHISPER_HOP_LENGTH:
+            raise ValueError(f"裁剪长度需为 {WHISPER_HOP_LENGTH} 的整数倍")
+        count = min(count, self._samples)
+        frames = count // WHISPER_HOP_LENGTH
+        remaining = self._samples - count
+        self._audio[:remaining] = self._audio[count:self._samples]
+        self._samples = remaining
+        kept = max(0, self._final - frames)
+        self._mel[:, :kept] = self._mel[:, frames:frames + kept]
+        if kept < 2:
+            self._final = 0
+        else:
+            # 新窗口开头的两帧需要按新的窗口边界重新做反射填充
+            self._final = kept
+            self._mel[:, :2] = self._power_mel(0, 2)
+    
+    def _power_mel(self, start: int, end: int) -> np.ndarray:
+        """计算第 start 到 end 帧的 mel 能量"""
+        half = WHISPER_N_FFT // 2
+        # 填充后的信号中第 p 个采样对应原音频第 p - half 个：左端反射，右端补零
+        offsets = np.arange(start * WHISPER_HOP_LENGTH, (end - 1) * WHISPER_HOP_LENGTH + WHISPER_N_FFT) - half
+        indices = np.abs(offsets)
+        valid = indices < self._samples
+        padded = np.where(valid, self._audio[np.minimum(indices, max(self._samples - 1, 0))], 0.0)
+        frames = np.lib.stride_tricks.sliding_window_view(padded, WHISPER_N_FFT)[::WHISPER_HOP_LENGTH]
+        spectrum = np.fft.rfft(frames * self._window, axis=1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        self.computed_frames += end - start
+        return self.filters @ power.T
+    
+    def spectrogram(self) -> np.ndarray:
+        """
+        当前窗口的 log-mel 特征
+        
+        Returns:
+            形状 (n_mels, samples // 160) 的 float32 数组
+        """
+        total = self._samples // WHISPER_HOP_LENGTH
+        if total == 0:
+            return np.zeros((self.n_mels, 0), dtype=np.float32)
+        # 窗口右端完全落在已收到音频内的帧不会再变，计算一次后缓存
+        final = min(total, max(0, (self._samples - WHISPER_N_FFT // 2) // WHISPER_HOP_LENGTH + 1))
+        if final > self._final:
+            if final > self._mel.shape[1]:
+                grown = np.zeros((self.n_mels, max(final, 2 * self._mel.shape[1])), dtype=np.float32)
+                grown[:, :self._final] = self._mel[:, :self._final]
+                self._mel = grown
+            self._mel[:, self._final:final] = self._power_mel(self._final, final)
+            self._final = final
+        
+        mel = self._mel[:, :total]
+        if final < total:
+            # 末尾一两帧的窗口超出已收到的音频，按补零计算，不缓存
+            mel = np.concatenate([self._mel[:, :final], self._power_mel(final, total)], axis=1)
+        log_spec = np.log10(np.maximum(mel, 1e-10))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+_FEATURES_TASK = None
+
+
+def _features_decoding_task(whisper):
+    """使用预先计算好的编码器输出的 DecodingTask 子类（Whisper 默认只接受 30 秒窗口的特征）"""
+    global _FEATURES_TASK
+    if _FEATURES_TASK is None:
+        class FeaturesDecodingTask(whisper.decoding.DecodingTask):
+            def _get_audio_features(self, mel):
+                return mel
+        _FEATURES_TASK = FeaturesDecodingTask
+    return _FEATURES_TASK
+
+
+def needs_temperature_fallback(result) -> bool:
+    """
+    判断一次解码是否需要提高温度重试（规则同 whisper.transcribe）
+    
+    Args:
+        result: Whisper 的 DecodingResult（含 compression_ratio、avg_logprob、no_speech_prob）
+        
+    Returns:
+        结果重复或置信度过低、且不是静音时为 True
+    """
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        # 静音：低置信度是正常的，重试没有意义
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def load_wav_audio(audio_path: str) -> Optional[np.ndarray]:
+    """
+    在进程内读取 WAV 文件为 Whisper 输入数组
+    
+    Returns:
+        float32 数组；不是 PCM WAV 文件时返回 None（交给 ffmpeg 解码）
+    """
+    try:
+        return to_whisper_input(PCMBuffer.from_wav_file(audio_path))
+    except (wave.Error, EOFError):
+        return None
+
+
+class Transcript:
+    """带置信度的转录结果"""
+    
+    def __init__(self, text: str, segments: Optional[List[dict]] = None):
+        """
+        Args:
+            text: 识别的文本
+            segments: 片段列表，每个片段含 text、no_speech_prob、avg_logprob；引擎不提供置信度时为空
+        """
+        self.text = text
+        self.segments = segments or []
+    
+    @property
+    def no_speech_prob(self) -> Optional[float]:
+        """各片段中最小的无语音概率（任何一段像语音就不算噪声）；没有置信度时为 None"""
+        if not self.segments:
+            return None
+        return min(segment["no_speech_prob"] for segment in self.segments)
+    
+    @property
+    def avg_logprob(self) -> Optional[float]:
+        """各片段平均对数概率的均值；没有置信度时为 None"""
+        if not self.segments:
+            return None
+        return sum(segment["avg_logprob"] for segment in self.segments) / len(self.segments)
+    
+    def __repr__(self) -> str:
+        return f"Transcript({self.text!r}, no_speech_prob={self.no_speech_prob}, avg_logprob={self.avg_logprob})"
+
+
+def _decoding_transcript(result) -> Transcript:
+    """由 Whisper 的 DecodingResult 构造转录结果（整段作为一个片段）"""
+    return Transcript(result.text.strip(), [{
+        "text": result.text,
+        "no_speech_prob": result.no_speech_prob,
+        "avg_logprob": result.avg_logprob,
+    }])
+
+
+def _transcribe_transcript(result: dict) -> Transcript:
+    """由 whisper.transcribe 的结果构造转录结果"""
+    return Transcript(result["text"].strip(), [
+        {key: segment[key] for key in ("text", "no_speech_prob", "avg_logprob")}
+        for segment in result.get("segments", [])
+    ])
+
 
 class STTBase(ABC):
     """语音转文本基类"""
@@ -22,19 +332,139 @@ class STTBase(ABC):
     def transcribe_bytes(self, audio_bytes: bytes) -> str:
         """转录音频字节流"""
         pass
+    
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """转录内存中的音频（默认编码为 WAV 后交给 transcribe_bytes）"""
+        if not isinstance(pcm, PCMBuffer):
+            pcm = PCMBuffer.from_float(to_whisper_input(pcm, sample_rate), WHISPER_SAMPLE_RATE)
+        return self.transcribe_bytes(pcm.to_wav_bytes())
+    
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Transcript:
+        """转录内存中的音频并附带置信度（默认实现不提供置信度）"""
+        return Transcript(self.transcribe_pcm(pcm, sample_rate))
+    
+    def transcribe_batch(self, items: Sequence[AudioInput], sample_rate: Optional[int] = None) -> List[str]:
+        """
+        批量转录多段音频（默认逐段转录）
+        
+        Args:
+            items: 音频列表（PCMBuffer 或 NumPy 数组）
+            sample_rate: 数组的采样率
+            
+        Returns:
+            与输入顺序一致的文本列表
+        """
+        return [self.transcribe_pcm(item, sample_rate) for item in items]
+    
+    def transcribe_batch_detailed(self, items: Sequence[AudioInput],
+                                  sample_rate: Optional[int] = None) -> List[Transcript]:
+        """
+        批量转录多段音频并附带置信度（默认逐段转录）
+        
+        Args:
+            items: 音频列表（PCMBuffer 或 NumPy 数组）
+            sample_rate: 数组的采样率
+            
+        Returns:
+            与输入顺序一致的转录结果列表
+        """
+        return [self.transcribe_detailed(item, sample_rate) for item in items]
+    
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """
+        流式转录时解码一个窗口
+        
+        Args:
+            audio: 16kHz float32 数组
+            prompt: 窗口之前已定稿的文本（可作为上下文）
+            
+        Returns:
+            (文本, [(片段文本, 片段结束秒), ...])；默认实现不提供片段
+        """
+        return self.transcribe_pcm(audio, WHISPER_SAMPLE_RATE), []
+    
+    def start_stream(self, **kwargs) -> StreamingTranscriber:
+        """
+        开始一次流式转录
+        
+        Args:
+            **kwargs: StreamingTranscriber 的配置参数（rate, step_ms, window_seconds, on_update 等）
+            
+        Returns:
+            流式转录会话：feed() 追加音频帧，finish() 返回最终文本
+        """
+        return StreamingTranscriber(self.decode_window, **kwargs)
+    
+    async def transcribe_async(self, pcm: AudioInput, sample_rate: Optional[int] = None, executor=None) -> str:
+        """
+        在 asyncio 事件循环中转录内存音频（在专用执行器中运行，不阻塞事件循环）
+        
+        Args:
+            pcm: PCMBuffer 或 NumPy 数组
+            sample_rate: 数组的采样率
+            executor: async_stt.STTExecutor，默认为进程共享的执行器
+            
+        Returns:
+            识别文本
+        """
+        from .async_stt import transcribe_async
+        return await transcribe_async(self, pcm, sample_rate, executor)
+    
+    def stream_async(self, frames, executor=None, **kwargs):
+        """
+        异步流式转录
+        
+        Args:
+            frames: int16 音频帧的异步迭代器
+            executor: async_stt.STTExecutor，默认为进程共享的执行器
+            **kwargs: StreamingTranscriber 的配置参数
+            
+        Returns:
+            StreamUpdate 的异步迭代器，最后一个结果的 final 为 True
+        """
+        from .async_stt import stream_async
+        return stream_async(self, frames, executor, **kwargs)
+    
+    def cache_identity(self) -> str:
+        """
+        影响转录结果的引擎配置（模型、语言、解码选项），作为转录缓存键的一部分
+        
+        Returns:
+            配置相同的引擎返回相同的字符串
+        """
+        return type(self).__name__
 
 
 class WhisperSTT(STTBase):
     """使用 OpenAI Whisper 进行本地语音识别"""
     
-    def __init__(self, model_name: str = "tiny", device: str = "cpu", language: str = "zh"):
+    def __init__(self, model_name: str = "tiny", device: str = "cpu", language: str = "zh",
+                 lazy: bool = False, short_utterance: bool = False, max_short_seconds: float = 10.0,
+                 ctx_margin_ms: float = 1000.0, precision: str = "fp32",
+                 beam_size: Optional[int] = None, temperature_fallback: bool = True,
+                 threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                 cpu_affinity: Optional[Sequence[int]] = None):
         """
         初始化 Whisper STT
         
+        模型由进程共享的注册表管理：同一尺寸只加载一次，多个引擎实例共用
+        
         Args:
             model_name: 模型名称 (tiny, base, small, medium, large)
             device: 运行设备 (cpu, cuda, mps)
             language: 默认语言代码
+            lazy: 为 True 时不阻塞初始化，在后台加载并预热，首次转录时再等待
+            short_utterance: 短句模式：裁掉首尾静音，并按实际时长截断编码器的音频上下文，
+                不再把每句话补齐到 30 秒
+            max_short_seconds: 不超过该时长（秒）的音频才走短句模式
+            ctx_margin_ms: 截断上下文时在语音之后保留的余量（毫秒）
+            precision: 推理精度；int8 对线性层做动态量化（仅 CPU），量化结果缓存在磁盘上
+            beam_size: 束搜索宽度，None 为贪心解码
+            temperature_fallback: 解码质量差（压缩比过高、平均对数概率过低）时是否提高温度重新解码
+            threads: PyTorch intra-op 线程数（进程级设置），None 表示使用全部核心
+            interop_threads: PyTorch inter-op 线程数
+            cpu_affinity: 加载、预热与推理期间把执行线程绑定到这些 CPU（仅 Linux）；
+                OpenMP 工作线程继承首次推理线程的绑定
         """
         try:
             import whisper
@@ -44,11 +474,52 @@ class WhisperSTT(STTBase):
                 "Whisper 未安装。请运行: pip install openai-whisper"
             )
         
-        print(f"正在加载 Whisper {model_name} 模型...")
-        start_time = time.time()
-        self.model = self.whisper.load_model(model_name, device=device)
+        if precision == "int8" and device != "cpu":
+            print(f"⚠️ int8 量化只支持 CPU，{device} 上使用 fp32")
+            precision = "fp32"
+        
+        self.model_name = model_name
+        self.device = device
         self.language = language
-        print(f"Whisper 模型加载完成，耗时: {time.time() - start_time:.2f}秒")
+        self.precision = precision
+        # 注册表按 (名称, 设备) 共享模型，量化模型使用带后缀的名称
+        self.registry_name = registry_name(model_name, precision)
+        self.short_utterance = short_utterance
+        self.max_short_samples = int(max_short_seconds * WHISPER_SAMPLE_RATE)
+        self.ctx_margin_ms = ctx_margin_ms
+        self.beam_size = beam_size
+        self.temperature_fallback = temperature_fallback
+        self.threads = threads
+        self.cpu_affinity = list(cpu_affinity) if cpu_affinity else None
+        apply_thread_budget(threads, interop_threads)
+        self.registry = get_model_registry()
+        if lazy:
+            self.ready = self.registry.preload(self.registry_name, device, language=language,
+                                               cpus=self.cpu_affinity)
+        else:
+            with pinned(self.cpu_affinity):
+                self.registry.get(self.registry_name, device)
+            self.ready = threading.Event()
+            self.ready.set()
+        # CPU 不支持半精度，显式关闭以免每次转录都回退并告警
+        self.fp16 = device != "cpu"
+    
+    @property
+    def model(self):
+        """共享的 Whisper 模型（被淘汰后会重新加载）"""
+        return self.registry.get(self.registry_name, self.device)
+    
+    @contextmanager
+    def _use_model(self) -> Iterator:
+        """借用共享模型，推理期间按配置绑定 CPU"""
+        with pinned(self.cpu_affinity), self.registry.use(self.registry_name, self.device) as model:
+            yield model
+    
+    def cache_identity(self) -> str:
+        """模型、精度、语言与短句模式参数"""
+        short = f"short:{self.max_short_samples}:{self.ctx_margin_ms:g}" if self.short_utterance else "full"
+        decoding = f"beam:{self.beam_size or 1}:fallback:{int(self.temperature_fallback)}"
+        return f"whisper:{self.registry_name}:{self.language}:{short}:{decoding}"
     
     def transcribe_file(self, audio_path: str) -> str:
         """
@@ -60,11 +531,7 @@ class WhisperSTT(STTBase):
         Returns:
             识别的文本
         """
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
-        
-        result = self.model.transcribe(audio_path, language=self.language)
-        return result["text"].strip()
+        return self.transcribe_with_timestamps(audio_path)["text"].strip()
     
     def transcribe_bytes(self, audio_bytes: bytes) -> str:
         """
@@ -76,8 +543,15 @@ class WhisperSTT(STTBase):
         Returns:
             识别的文本
         """
-        # 保存到临时文件
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+        try:
+            pcm = PCMBuffer.from_wav_bytes(audio_bytes)
+        except (wave.Error, EOFError):
+            pcm = None
+        if pcm is not None:
+            return self.transcribe_pcm(pcm)
+        
+        # 非 WAV 格式（如 mp3）才需要落盘交给 ffmpeg 解码
+        with tempfile.NamedTemporaryFile(suffix=".audio", delete=False) as tmp_file:
             tmp_file.write(audio_bytes)
             tmp_path = tmp_file.name
         
@@ -90,6 +564,236 @@ class WhisperSTT(STTBase):
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
     
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """
+        转录内存中的音频，在进程内重采样后直接以 float32 数组送入 Whisper
+        
+        Args:
+            pcm: PCMBuffer，或 int16 / [-1, 1] 浮点的 NumPy 数组
+            sample_rate: 数组的采样率（默认 16kHz；PCMBuffer 使用自带的采样率）
+            
+        Returns:
+            识别的文本
+        """
+        return self.transcribe_detailed(pcm, sample_rate).text
+    
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> "Transcript":
+        """
+        转录内存中的音频，并返回各片段的 no_speech_prob 与 avg_logprob
+        
+        Args:
+            pcm: PCMBuffer，或 int16 / [-1, 1] 浮点的 NumPy 数组
+            sample_rate: 数组的采样率
+            
+        Returns:
+            带置信度的转录结果
+        """
+        audio = to_whisper_input(pcm, sample_rate)
+        if self.short_utterance:
+            audio = trim_silence(audio)
+        if len(audio) == 0:
+            return Transcript("")
+        if self.short_utterance and len(audio) <= self.max_short_samples:
+            return _decoding_transcript(self._decode_results([audio])[0])
+        return _transcribe_transcript(self._transcribe_array(audio))
+    
+    def transcribe_batch(self, items: Sequence[AudioInput], sample_rate: Optional[int] = None) -> List[str]:
+        """
+        批量转录：把不超过 30 秒的音频的 log-mel 频谱补齐后拼成一批，一次编码器前向、一起解码
+        
+        短句模式下按批内最长的一句截断音频上下文，而不是补齐到 30 秒
+        
+        Args:
+            items: 音频列表（PCMBuffer 或 NumPy 数组）
+            sample_rate: 数组的采样率
+            
+        Returns:
+            与输入顺序一致的文本列表
+        """
+        return [transcript.text for transcript in self.transcribe_batch_detailed(items, sample_rate)]
+    
+    def transcribe_batch_detailed(self, items: Sequence[AudioInput],
+                                  sample_rate: Optional[int] = None) -> List[Transcript]:
+        """
+        批量转录并附带置信度（与 transcribe_batch 相同的一次编码、一起解码，置信度取自解码结果）
+        
+        Args:
+            items: 音频列表（PCMBuffer 或 NumPy 数组）
+            sample_rate: 数组的采样率
+            
+        Returns:
+            与输入顺序一致的转录结果列表
+        """
+        audios = [to_whisper_input(item, sample_rate) for item in items]
+        if self.short_utterance:
+            audios = [trim_silence(audio) for audio in audios]
+        transcripts = [Transcript("") for _ in audios]
+        batch = [i for i, audio in enumerate(audios) if 0 < len(audio) <= WHISPER_WINDOW_SAMPLES]
+        
+        # 超过一个窗口的长音频需要滑动解码，逐段转录
+        for i, audio in enumerate(audios):
+            if len(audio) > WHISPER_WINDOW_SAMPLES:
+                transcripts[i] = _transcribe_transcript(self._transcribe_array(audio))
+        if batch:
+            for i, result in zip(batch, self._decode_results([audios[i] for i in batch])):
+                transcripts[i] = _decoding_transcript(result)
+        return transcripts
+    
+    def _decode_results(self, audios: List[np.ndarray]) -> list:
+        """
+        对不超过 30 秒的一批音频做一次编码、一次解码（不带时间戳），返回 Whisper 的 DecodingResult
+        
+        短句模式下 log-mel 只补齐到批内最长音频所需的帧数，编码器只计算对应长度的位置；
+        启用温度回退时，质量差的结果复用已算好的编码器输出，依次提高温度重新解码
+        """
+        import torch
+        import torch.nn.functional as F
+        whisper = self.whisper
+        
+        frames = WHISPER_WINDOW_FRAMES
+        if self.short_utterance:
+            frames = audio_context_frames(max(len(a) for a in audios), self.ctx_margin_ms)
+        
+        with self._use_model() as model, torch.no_grad():
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(audio), frames * WHISPER_HOP_LENGTH),
+                    n_mels=model.dims.n_mels
+                )
+                for audio in audios
+            ]).to(model.device)
+            if self.fp16:
+                mel = mel.half()
+            if frames != WHISPER_WINDOW_FRAMES:
+                # 与 AudioEncoder.forward 相同，只是位置编码截取到实际长度
+                encoder = model.encoder
+                x = F.gelu(encoder.conv1(mel))
+                x = F.gelu(encoder.conv2(x)).permute(0, 2, 1)
+                x = (x + encoder.positional_embedding[:x.shape[1]]).to(x.dtype)
+                for block in encoder.blocks:
+                    x = block(x)
+                mel = encoder.ln_post(x)
+            # 截断的编码器输出需要跳过编码的 DecodingTask
+            task = _features_decoding_task(whisper) if frames != WHISPER_WINDOW_FRAMES else whisper.decoding.DecodingTask
+            
+            def decode(inputs, temperature: float) -> list:
+                options = whisper.DecodingOptions(
+                    language=self.language, fp16=self.fp16, without_timestamps=True, temperature=temperature,
+                    # 与 whisper.transcribe 相同：温度大于 0 时改为采样多个候选，不做束搜索
+                    beam_size=self.beam_size if temperature == 0 else None,
+                    best_of=FALLBACK_BEST_OF if temperature > 0 else None
+                )
+                return task(model, options).run(inputs)
+            
+            results = decode(mel, 0.0)
+            if self.temperature_fallback:
+                for temperature in FALLBACK_TEMPERATURES:
+                    retry = [i for i, result in enumerate(results) if needs_temperature_fallback(result)]
+                    if not retry:
+                        break
+                    for i, result in zip(retry, decode(mel[retry], temperature)):
+                        results[i] = result
+        return results
+    
+    def _transcribe_array(self, audio: np.ndarray, **options) -> dict:
+        """对 16kHz float32 数组运行 Whisper"""
+        with self._use_model() as model:
+            return model.transcribe(audio, **self._decode_options(options))
+    
+    def _decode_options(self, options: dict) -> dict:
+        """合并引擎的解码设置（调用方显式给出的选项优先）"""
+        merged = {"language": self.language, "fp16": self.fp16}
+        if self.beam_size:
+            merged["beam_size"] = self.beam_size
+        if not self.temperature_fallback:
+            merged["temperature"] = 0.0
+        merged.update(options)
+        return merged
+    
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """
+        流式转录时解码一个窗口（贪心解码，不做温度回退，保证节奏稳定）
+        
+        Args:
+            audio: 16kHz float32 数组
+            prompt: 窗口之前已定稿的文本，作为 initial_prompt 提供上下文
+            
+        Returns:
+            (文本, [(片段文本, 片段结束秒), ...])
+        """
+        result = self._transcribe_array(
+            audio,
+            initial_prompt=prompt or None,
+            temperature=0.0,
+            beam_size=None,
+            condition_on_previous_text=False
+        )
+        segments = [(seg["text"], float(seg["end"])) for seg in result.get("segments", [])]
+        return result["text"].strip(), segments
+    
+    def start_stream(self, **kwargs) -> StreamingTranscriber:
+        """
+        开始一次流式转录，log-mel 特征随音频到达增量计算，每次窗口解码只对新增的帧做 STFT
+        
+        Args:
+            **kwargs: StreamingTranscriber 的配置参数
+            
+        Returns:
+            流式转录会话
+        """
+        extractor = LogMelExtractor.for_whisper(self.model.dims.n_mels)
+        
+        def decode(audio: np.ndarray, prompt: str) -> tuple:
+            return self.decode_mel(extractor.spectrogram(), prompt)
+        
+        return StreamingTranscriber(decode, features=extractor, **kwargs)
+    
+    def decode_mel(self, mel: np.ndarray, prompt: str = "") -> tuple:
+        """
+        用已经算好的 log-mel 特征解码一个不超过 30 秒的窗口（贪心解码，带时间戳）
+        
+        Args:
+            mel: 形状 (n_mels, 帧数) 的特征，如 LogMelExtractor.spectrogram() 的输出
+            prompt: 窗口之前已定稿的文本
+            
+        Returns:
+            (文本, [(片段文本, 片段结束秒), ...])
+        """
+        import torch
+        whisper = self.whisper
+        frames = min(mel.shape[1], WHISPER_WINDOW_FRAMES)
+        # 与 transcribe 相同：内容帧之后以 0 补齐到 30 秒
+        padded = np.zeros((mel.shape[0], WHISPER_WINDOW_FRAMES), dtype=np.float32)
+        padded[:, :frames] = mel[:, :frames]
+        
+        with self._use_model() as model, torch.no_grad():
+            features = torch.from_numpy(padded).to(model.device)
+            if self.fp16:
+                features = features.half()
+            options = whisper.DecodingOptions(
+                language=self.language, fp16=self.fp16, temperature=0.0, prompt=prompt or None
+            )
+            result = whisper.decode(model, features, options)
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual, num_languages=model.num_languages,
+                language=self.language, task="transcribe"
+            )
+        
+        # 时间戳标记之间的文本为一个片段，以后一个时间戳作为片段结束时间
+        segments = []
+        text_tokens = []
+        for token in result.tokens:
+            if token >= tokenizer.timestamp_begin:
+                if text_tokens:
+                    end = (token - tokenizer.timestamp_begin) * 0.02
+                    segments.append((tokenizer.decode(text_tokens), end))
+                    text_tokens = []
+            else:
+                text_tokens.append(token)
+        if text_tokens:
+            segments.append((tokenizer.decode(text_tokens), frames * WHISPER_HOP_LENGTH / WHISPER_SAMPLE_RATE))
+        return result.text.strip(), segments
+    
     def transcribe_with_timestamps(self, audio_path: str) -> dict:
         """
         转录音频并返回带时间戳的结果
@@ -103,8 +807,12 @@ class WhisperSTT(STTBase):
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音频文件不存在: {audio_path}")
         
-        result = self.model.transcribe(audio_path, language=self.language)
-        return result
+        # WAV 在进程内解码；其他格式才交给 Whisper 调用 ffmpeg
+        audio = load_wav_audio(audio_path)
+        if audio is None:
+            with self._use_model() as model:
+                return model.transcribe(audio_path, **self._decode_options({}))
+        return self._transcribe_array(audio)
 
 
 class MockSTT(STTBase):
@@ -117,22 +825,49 @@ class MockSTT(STTBase):
     def transcribe_bytes(self, audio_bytes: bytes) -> str:
         """模拟转录"""
         return "这是模拟的语音识别结果"
+    
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """模拟转录"""
+        return "这是模拟的语音识别结果"
 
 
-def get_stt_engine(engine: str = "whisper", **kwargs) -> STTBase:
+def get_stt_engine(engine: str = "whisper", workers: int = 0, max_batch: int = 0,
+                   cache_size: int = 0, cache_dir: Optional[str] = None, pin_workers: bool = False,
+                   **kwargs) -> STTBase:
     """
     获取 STT 引擎实例
     
     Args:
-        engine: 引擎类型 (whisper, mock)
-        **kwargs: 引擎配置参数
+        engine: 引擎类型 (whisper, adaptive, mock)；adaptive 按实时率在 models 列出的模型间切换
+        workers: 大于 0 时在加载模型后 fork 出对应数量的工作进程，以进程池并发转录
+        max_batch: 大于 1 时启用微批调度，把并发会话的请求合并为最多 max_batch 个一批
+        cache_size: 大于 0 时启用转录缓存，内存中最多保留的结果数
+        cache_dir: 转录缓存的磁盘目录（需要 diskcache），重启后仍可命中
+        pin_workers: 为每个工作进程绑定互不重叠的 CPU（核心数取自 threads 参数）
+        **kwargs: 引擎配置参数（如 model_name、precision="int8" 使用量化的 CPU 推理）
         
     Returns:
         STT 引擎实例
     """
     if engine == "whisper":
-        return WhisperSTT(**kwargs)
+        stt = WhisperSTT(**kwargs)
+    elif engine == "adaptive":
+        from .adaptive_stt import AdaptiveSTT, build_ladder
+        models = kwargs.pop("models", ("tiny", "base", "small"))
+        stt = AdaptiveSTT(build_ladder(models), **kwargs)
     elif engine == "mock":
-        return MockSTT()
+        stt = MockSTT()
     else:
         raise ValueError(f"不支持的 STT 引擎: {engine}")
+    
+    if workers > 0:
+        from .stt_pool import STTWorkerPool
+        stt = STTWorkerPool(stt, workers=workers, threads_per_worker=kwargs.get("threads") or 1,
+                            cpu_affinity="auto" if pin_workers else None)
+    if max_batch > 1:
+        from .batching import BatchingSTT
+        stt = BatchingSTT(stt, max_batch=max_batch)
+    if cache_size > 0 or cache_dir:
+        from .stt_cache import CachedSTT, TranscriptionCache
+        stt = CachedSTT(stt, TranscriptionCache(max_entries=cache_size or 256, directory=cache_dir))
+    return stt
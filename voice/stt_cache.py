@@ -0,0 +1,150 @@
+"""
+转录缓存模块
+按规范化 PCM 内容与引擎配置的哈希缓存转录结果：内存 LRU 一级缓存，可选 diskcache 磁盘二级缓存（见 cache.py）
+"""
+
+import hashlib
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .cache import TwoLevelCache
+from .pcm import PCMBuffer, WHISPER_SAMPLE_RATE
+from .stt import AudioInput, STTBase, Transcript, load_wav_audio, to_whisper_input
+
+
+def audio_key(audio: np.ndarray, identity: str) -> str:
+    """
+    计算缓存键
+
+    音频先规范化为 16kHz 单声道 int16，同一段声音无论以 int16、浮点还是其他采样率的 WAV 输入都得到相同的键
+
+    Args:
+        audio: 16kHz float32 数组（to_whisper_input 的输出）
+        identity: 引擎配置（STTBase.cache_identity）
+
+    Returns:
+        十六进制 SHA-256 摘要
+    """
+    samples = np.clip(np.round(audio * 32767.0), -32768, 32767).astype("<i2")
+    digest = hashlib.sha256(identity.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(samples.tobytes())
+    return digest.hexdigest()
+
+
+class TranscriptionCache(TwoLevelCache):
+    """两级转录缓存（值为文本，或文本与片段置信度）"""
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None, disk_size_mb: float = 256.0):
+        """
+        初始化转录缓存
+
+        Args:
+            max_entries: 内存中最多保留的结果数（最久未使用的先淘汰）
+            directory: 磁盘缓存目录，None 表示只用内存
+            disk_size_mb: 磁盘缓存的容量上限（MB）
+        """
+        super().__init__(max_entries, directory, disk_size_mb, name="转录缓存")
+
+
+class CachedSTT(STTBase):
+    """带转录缓存的 STT 包装器"""
+
+    def __init__(self, engine: STTBase, cache: Optional[TranscriptionCache] = None):
+        """
+        初始化缓存包装器
+
+        Args:
+            engine: 实际执行转录的引擎
+            cache: 转录缓存，None 时新建一个只用内存的缓存
+        """
+        self.engine = engine
+        self.cache = cache or TranscriptionCache()
+        self.identity = engine.cache_identity()
+
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """转录内存音频，相同内容直接返回缓存的结果"""
+        audio = to_whisper_input(pcm, sample_rate)
+        if len(audio) == 0:
+            return ""
+        key = audio_key(audio, self.identity)
+        text = self.cache.get(key)
+        if text is None:
+            text = self.engine.transcribe_pcm(audio, WHISPER_SAMPLE_RATE)
+            self.cache.put(key, text)
+        return text
+
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Transcript:
+        """转录内存音频并附带置信度，置信度与文本一起缓存"""
+        audio = to_whisper_input(pcm, sample_rate)
+        if len(audio) == 0:
+            return Transcript("")
+        key = audio_key(audio, self.identity) + ":detailed"
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Transcript(*cached)
+        transcript = self.engine.transcribe_detailed(audio, WHISPER_SAMPLE_RATE)
+        self.cache.put(key, (transcript.text, transcript.segments))
+        return transcript
+
+    def transcribe_bytes(self, audio_bytes: bytes) -> str:
+        """转录音频字节流；WAV 按解码后的 PCM 缓存，其他格式按原始字节缓存"""
+        try:
+            pcm = PCMBuffer.from_wav_bytes(audio_bytes)
+        except Exception:
+            return self._cached_raw(audio_bytes, lambda: self.engine.transcribe_bytes(audio_bytes))
+        return self.transcribe_pcm(pcm)
+
+    def transcribe_file(self, audio_path: str) -> str:
+        """转录音频文件；WAV 按解码后的 PCM 缓存，其他格式按文件内容缓存"""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
+        audio = load_wav_audio(audio_path)
+        if audio is not None:
+            return self.transcribe_pcm(audio, WHISPER_SAMPLE_RATE)
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        return self._cached_raw(data, lambda: self.engine.transcribe_file(audio_path))
+
+    def _cached_raw(self, data: bytes, transcribe) -> str:
+        """无法在进程内解码的格式：以原始字节为键"""
+        key = hashlib.sha256(self.identity.encode("utf-8") + b"\0raw\0" + data).hexdigest()
+        text = self.cache.get(key)
+        if text is None:
+            text = transcribe()
+            self.cache.put(key, text)
+        return text
+
+    def transcribe_batch(self, items, sample_rate: Optional[int] = None) -> List[str]:
+        """批量转录，只把未命中的音频交给引擎（仍然成批）"""
+        audios = [to_whisper_input(item, sample_rate) for item in items]
+        texts: List[Optional[str]] = [None] * len(audios)
+        keys = {}
+        for i, audio in enumerate(audios):
+            if len(audio) == 0:
+                texts[i] = ""
+                continue
+            keys[i] = audio_key(audio, self.identity)
+            texts[i] = self.cache.get(keys[i])
+
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if missing:
+            results = self.engine.transcribe_batch([audios[i] for i in missing], WHISPER_SAMPLE_RATE)
+            for i, text in zip(missing, results):
+                texts[i] = text
+                self.cache.put(keys[i], text)
+        return texts
+
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """流式窗口每次都在变化，不经过缓存"""
+        return self.engine.decode_window(audio, prompt)
+
+    def cache_identity(self) -> str:
+        """与被包装的引擎相同"""
+        return self.identity
+
+    def get_stats(self) -> dict:
+        """返回缓存命中统计"""
+        return self.cache.get_stats()
@@ -0,0 +1,361 @@
+"""
+STT 工作进程池
+在父进程加载一次模型后 fork 出多个工作进程，权重以写时复制方式共享，通过 submit/future 接口并发转录
+"""
+
+import gc
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .cpu_budget import apply_thread_budget, plan_affinity
+from .pcm import PCMBuffer, WHISPER_SAMPLE_RATE
+from .stt import AudioInput, STTBase, Transcript, load_wav_audio, to_whisper_input
+
+# 分发线程的轮询间隔（秒）
+_POLL_INTERVAL = 0.5
+
+
+def _worker_main(engine: STTBase, conn, threads: Optional[int], interop_threads: Optional[int] = None,
+                 cpus: Optional[List[int]] = None) -> None:
+    """工作进程入口：逐个执行父进程分配的调用"""
+    apply_thread_budget(threads, interop_threads, cpus)
+    if cpus and getattr(engine, "cpu_affinity", None):
+        # 整个工作进程已经绑定，不再按引擎的配置绑定推理线程
+        engine.cpu_affinity = None
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        task_id, method, args = task
+        started = time.perf_counter()
+        try:
+            value = getattr(engine, method)(*args)
+            status = "ok"
+        except Exception as e:
+            value = f"{type(e).__name__}: {e}"
+            status = "error"
+        conn.send((status, task_id, value, time.perf_counter() - started))
+
+
+class _WorkerState:
+    """父进程记录的工作进程状态"""
+
+    def __init__(self, worker_id: int, process, conn):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.started_at = time.monotonic()
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self.current: Optional[int] = None
+
+
+class STTWorkerPool(STTBase):
+    """预先 fork 的 STT 工作进程池"""
+
+    def __init__(self, engine: STTBase, workers: int = 2, threads_per_worker: Optional[int] = 1,
+                 interop_threads: Optional[int] = 1,
+                 cpu_affinity: Union[None, str, Sequence[Sequence[int]]] = None):
+        """
+        初始化工作进程池
+
+        Args:
+            engine: 已在父进程中加载好模型的 STT 引擎（工作进程继承它）
+            workers: 工作进程数
+            threads_per_worker: 每个工作进程的 torch intra-op 线程数，避免多个进程争抢 CPU
+            interop_threads: 每个工作进程的 torch inter-op 线程数
+            cpu_affinity: 各工作进程绑定的 CPU 列表；"auto" 按 threads_per_worker 划分互不重叠的核心
+        """
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker
+        self.interop_threads = interop_threads
+        if cpu_affinity == "auto":
+            cpu_affinity = plan_affinity(self.workers, threads_per_worker or 1)
+        self.cpu_affinity: Optional[List[List[int]]] = (
+            [list(cpus) for cpus in cpu_affinity] if cpu_affinity else None
+        )
+        self.restarts = 0
+        self.failed = 0
+
+        self._ids = itertools.count()
+        self._futures: Dict[int, Future] = {}
+        self._pending: Deque[tuple] = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._state: Dict[int, _WorkerState] = {}
+        self._dead: List[int] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            # 不支持 fork 的平台（Windows）退化为进程内执行
+            print("⚠️ 当前平台不支持 fork，STT 将在进程内执行")
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            return
+
+        # 先在父进程加载好模型（访问 model 属性会等待注册表加载完成），工作进程直接继承
+        getattr(engine, "model", None)
+
+        self._ctx = multiprocessing.get_context("fork")
+        self._wake_reader, self._wake_writer = self._ctx.Pipe(duplex=False)
+        # 所有 fork（首次启动与重启）都由分发线程在持有锁、没有进行中的收发时执行
+        self._dead = list(range(self.workers))
+        self._spawned = threading.Event()
+        self._spawn_error: Optional[BaseException] = None
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        self._spawned.wait()
+        if self._spawn_error is not None:
+            raise self._spawn_error
+
+    def _spawn_dead(self) -> None:
+        """重新 fork 已退出的工作进程（仅在分发线程中、持有锁时调用）"""
+        while self._dead:
+            self._spawn(self._dead[0])
+            self._dead.pop(0)
+
+    def _spawn(self, worker_id: int) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.engine, child_conn, self.threads_per_worker, self.interop_threads,
+                  self.cpu_affinity[worker_id % len(self.cpu_affinity)] if self.cpu_affinity else None),
+            daemon=True
+        )
+        # fork 前冻结已有对象，避免工作进程的垃圾回收写对象头导致共享页被复制
+        gc.collect()
+        gc.freeze()
+        try:
+            process.start()
+        finally:
+            gc.unfreeze()
+        child_conn.close()
+        self._state[worker_id] = _WorkerState(worker_id, process, parent_conn)
+
+    def _dispatch(self) -> None:
+        """父进程的分发线程：把排队的任务交给空闲的工作进程，收集结果并监视进程退出"""
+        try:
+            with self._lock:
+                self._spawn_dead()
+        except BaseException as e:
+            self._spawn_error = e
+            return
+        finally:
+            self._spawned.set()
+
+        while True:
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._spawn_dead()
+                for state in self._state.values():
+                    if state.current is None and self._pending:
+                        task = self._pending.popleft()
+                        state.current = task[0]
+                        state.conn.send(task)
+                states = list(self._state.values())
+
+            if closed:
+                for state in states:
+                    try:
+                        state.conn.send(None)
+                    except OSError:
+                        pass
+                return
+
+            waitables = [self._wake_reader]
+            for state in states:
+                waitables += [state.conn, state.process.sentinel]
+            ready = wait_connections(waitables, timeout=_POLL_INTERVAL)
+
+            if self._wake_reader in ready:
+                while self._wake_reader.poll():
+                    self._wake_reader.recv()
+            for state in states:
+                if state.conn in ready:
+                    try:
+                        self._collect(state, state.conn.recv())
+                        continue
+                    except (EOFError, OSError):
+                        pass
+                if state.conn in ready or state.process.sentinel in ready:
+                    self._retire(state)
+
+    def _collect(self, state: _WorkerState, message: tuple) -> None:
+        """处理工作进程返回的结果"""
+        status, task_id, value, seconds = message
+        with self._lock:
+            future = self._futures.pop(task_id, None)
+            state.current = None
+            state.busy_seconds += seconds
+            state.completed += 1
+            if status == "error":
+                self.failed += 1
+        if future is None:
+            return
+        if status == "ok":
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(f"STT 工作进程 {state.worker_id} 出错: {value}"))
+
+    def _retire(self, state: _WorkerState) -> None:
+        """回收意外退出的工作进程并让它手上的任务失败；分发线程在下一轮开始时重新 fork"""
+        state.process.join(timeout=1.0)
+        state.conn.close()
+        with self._lock:
+            future = self._futures.pop(state.current, None) if state.current is not None else None
+            self._state.pop(state.worker_id, None)
+            self._dead.append(state.worker_id)
+            self.restarts += 1
+            if future is not None:
+                self.failed += 1
+        print(f"⚠️ STT 工作进程 {state.worker_id} 已退出 (exitcode={state.process.exitcode})，正在重启")
+        if future is not None:
+            future.set_exception(RuntimeError(f"STT 工作进程 {state.worker_id} 意外退出"))
+
+    def submit(self, method: str, *args: Any) -> Future:
+        """
+        提交一次引擎调用
+
+        Args:
+            method: 引擎方法名（如 transcribe_pcm、decode_window）
+            *args: 方法参数（需可序列化）
+
+        Returns:
+            完成时给出方法返回值的 Future
+        """
+        if self._closed:
+            raise RuntimeError("STT 工作进程池已关闭")
+        if self._executor is not None:
+            return self._executor.submit(getattr(self.engine, method), *args)
+
+        future: Future = Future()
+        with self._lock:
+            task_id = next(self._ids)
+            self._futures[task_id] = future
+            self._pending.append((task_id, method, args))
+            self._wake_writer.send(None)
+        return future
+
+    def submit_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Future:
+        """提交一段内存音频的转录，返回给出文本的 Future"""
+        audio = to_whisper_input(pcm, sample_rate)
+        return self.submit("transcribe_pcm", audio, WHISPER_SAMPLE_RATE)
+
+    def transcribe_pcm(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> str:
+        """转录内存音频（阻塞到结果返回）"""
+        audio = to_whisper_input(pcm, sample_rate)
+        if len(audio) == 0:
+            return ""
+        return self.submit("transcribe_pcm", audio, WHISPER_SAMPLE_RATE).result()
+
+    def transcribe_detailed(self, pcm: AudioInput, sample_rate: Optional[int] = None) -> Transcript:
+        """转录内存音频并附带置信度"""
+        audio = to_whisper_input(pcm, sample_rate)
+        if len(audio) == 0:
+            return Transcript("")
+        return self.submit("transcribe_detailed", audio, WHISPER_SAMPLE_RATE).result()
+
+    def transcribe_file(self, audio_path: str) -> str:
+        """转录音频文件（WAV 在父进程解码后以数组提交）"""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
+        audio = load_wav_audio(audio_path)
+        if audio is None:
+            return self.submit("transcribe_file", audio_path).result()
+        return self.submit("transcribe_pcm", audio, WHISPER_SAMPLE_RATE).result()
+
+    def transcribe_bytes(self, audio_bytes: bytes) -> str:
+        """转录音频字节流"""
+        try:
+            pcm = PCMBuffer.from_wav_bytes(audio_bytes)
+        except (wave.Error, EOFError):
+            return self.submit("transcribe_bytes", audio_bytes).result()
+        return self.transcribe_pcm(pcm)
+
+    def transcribe_batch(self, items, sample_rate: Optional[int] = None) -> list:
+        """整批交给同一个工作进程，保留批量解码的收益"""
+        audios = [to_whisper_input(item, sample_rate) for item in items]
+        return self.submit("transcribe_batch", audios, WHISPER_SAMPLE_RATE).result()
+
+    def transcribe_batch_detailed(self, items, sample_rate: Optional[int] = None) -> list:
+        """整批交给同一个工作进程，结果附带置信度"""
+        audios = [to_whisper_input(item, sample_rate) for item in items]
+        return self.submit("transcribe_batch_detailed", audios, WHISPER_SAMPLE_RATE).result()
+
+    def decode_window(self, audio: np.ndarray, prompt: str = "") -> tuple:
+        """流式转录的窗口解码同样交给工作进程"""
+        return self.submit("decode_window", audio, prompt).result()
+
+    def cache_identity(self) -> str:
+        """与被包装的引擎相同"""
+        return self.engine.cache_identity()
+
+    def get_stats(self) -> dict:
+        """
+        返回队列深度与各工作进程的利用率
+
+        Returns:
+            queue_depth: 排队等待空闲工作进程的任务数
+            in_flight: 正在处理的任务数
+            utilisation: 各工作进程忙碌时间占其存活时间的比例
+        """
+        now = time.monotonic()
+        with self._lock:
+            workers = sorted(self._state.values(), key=lambda s: s.worker_id)
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._pending),
+                "in_flight": sum(1 for s in workers if s.current is not None),
+                "completed": sum(s.completed for s in workers),
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "affinity": self.cpu_affinity,
+                "utilisation": [
+                    round(s.busy_seconds / max(now - s.started_at, 1e-6), 3) for s in workers
+                ],
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭工作进程，尚未完成的任务以异常结束"""
+        if self._closed:
+            return
+        if self._executor is not None:
+            self._closed = True
+            self._executor.shutdown(wait=wait)
+            return
+        with self._lock:
+            self._closed = True
+            self._wake_writer.send(None)
+        self._dispatcher.join(timeout=5.0)
+        for state in self._state.values():
+            if wait:
+                state.process.join(timeout=5.0)
+            if state.process.is_alive():
+                state.process.terminate()
+            state.conn.close()
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+            self._pending.clear()
+        for future in futures:
+            future.set_exception(RuntimeError("STT 工作进程池已关闭"))
+
+    def __enter__(self) -> "STTWorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
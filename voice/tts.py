@@ -4,9 +4,15 @@
 """
 
 import os
+import shutil
+import subprocess
 import tempfile
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .pcm import PCMBuffer
 
 # pyttsx3 是可选依赖
 try:
@@ -33,6 +39,50 @@ class TTSBase(ABC):
     def text_to_wav(self, text: str) -> bytes:
         """将文本转换为 WAV 字节流"""
         pass
+    
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        """将文本转换为内存中的 PCM（默认解码 text_to_wav 的结果）"""
+        return PCMBuffer.from_wav_bytes(self.text_to_wav(text))
+    
+    def cache_identity(self) -> str:
+        """
+        影响合成结果的引擎配置（引擎、语音、语速），作为 TTS 缓存键的一部分
+        
+        Returns:
+            配置相同的引擎返回相同的字符串
+        """
+        return type(self).__name__
+
+
+class _ScratchFile:
+    """
+    可复用的合成输出文件
+    
+    pyttsx3 和 macOS say 只能输出到文件，这里每个引擎只创建一次并反复覆盖，
+    避免每次合成都创建/删除临时文件
+    """
+    
+    def __init__(self, suffix: str = ".wav"):
+        self.suffix = suffix
+        self.path: Optional[str] = None
+    
+    def get(self) -> str:
+        """返回文件路径（首次调用时创建，优先放在 /dev/shm）"""
+        if self.path is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            fd, self.path = tempfile.mkstemp(suffix=self.suffix, dir=directory)
+            os.close(fd)
+        return self.path
+    
+    def read_pcm(self) -> PCMBuffer:
+        """读取合成结果"""
+        return PCMBuffer.from_wav_file(self.get())
+    
+    def remove(self) -> None:
+        """删除文件"""
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
 
 
 class Pyttsx3TTS(TTSBase):
@@ -56,6 +106,10 @@ class Pyttsx3TTS(TTSBase):
         self.engine = pyttsx3.init()
         self.engine.setProperty('rate', rate)
         self.engine.setProperty('volume', volume)
+        self.rate = rate
+        self.volume = volume
+        
+        self._scratch = _ScratchFile()
         
         # 设置语音
         if voice_id:
@@ -81,16 +135,21 @@ class Pyttsx3TTS(TTSBase):
     
     def text_to_wav(self, text: str) -> bytes:
         """将文本转换为 WAV 字节流"""
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        self.save_to_file(text, tmp_path)
-        
-        with open(tmp_path, 'rb') as f:
-            wav_bytes = f.read()
-        
-        os.unlink(tmp_path)
-        return wav_bytes
+        return self.text_to_pcm(text).to_wav_bytes()
+    
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        """将文本转换为内存中的 PCM"""
+        self.save_to_file(text, self._scratch.get())
+        return self._scratch.read_pcm()
+    
+    def cache_identity(self) -> str:
+        """引擎、语音、语速与音量"""
+        return f"pyttsx3:{self.engine.getProperty('voice')}:{self.rate}:{self.volume}"
+    
+    def __del__(self):
+        """清理资源"""
+        if hasattr(self, '_scratch'):
+            self._scratch.remove()
 
 
 class MockTTS(TTSBase):
@@ -111,75 +170,140 @@ class MockTTS(TTSBase):
         """模拟转换"""
         print(f"[模拟 TTS] 转换文本: {text}")
         return b'RIFF' + b'\x00' * 40
+    
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        """模拟转换，返回 0.1 秒静音"""
+        print(f"[模拟 TTS] 转换文本: {text}")
+        return PCMBuffer(np.zeros(1600, dtype=np.int16), 16000)
 
 
 class SystemTTS(TTSBase):
-    """使用系统命令进行 TTS（macOS/Linux）"""
+    """使用系统语音合成（macOS say / Linux espeak、festival），直接以参数列表启动，不经过 shell"""
     
-    def __init__(self):
-        """初始化系统 TTS"""
+    def __init__(self, voice: Optional[str] = None, rate: Optional[int] = None, use_library: bool = True):
+        """
+        初始化系统 TTS
+        
+        Args:
+            voice: 语音名称（espeak 如 "zh"，say 如 "Ting-Ting"），None 使用系统默认
+            rate: 语速（每分钟词数），None 使用系统默认
+            use_library: espeak 是否优先使用进程内常驻的 libespeak（每句不再启动合成进程）
+        """
         import platform
         self.system = platform.system()
+        self.voice = voice
+        self.rate = rate
         
         if self.system == "Darwin":  # macOS
             self.command = "say"
         elif self.system == "Linux":
             # 检查可用的 TTS 命令
-            if os.system("which espeak > /dev/null 2>&1") == 0:
-                self.command = "espeak"
-            elif os.system("which festival > /dev/null 2>&1") == 0:
-                self.command = "festival --tts"
+            for command in ("espeak-ng", "espeak", "festival"):
+                if shutil.which(command):
+                    self.command = command
+                    break
             else:
                 raise RuntimeError("Linux 系统需要安装 espeak 或 festival")
         else:
             raise RuntimeError(f"不支持的系统: {self.system}")
+        
+        self.espeak = self.command.startswith("espeak")
+        self.library = None
+        if self.espeak and use_library:
+            from .espeak import get_espeak_library
+            self.library = get_espeak_library()
+        
+        self._player = None
+        self._scratch = _ScratchFile()
+    
+    def _options(self) -> List[str]:
+        """语音与语速参数"""
+        options = []
+        if self.voice:
+            options += ["-v", self.voice]
+        if self.rate:
+            options += ["-r" if self.command == "say" else "-s", str(self.rate)]
+        return options
+    
+    def _run(self, args: List[str], text: str, **kwargs) -> subprocess.CompletedProcess:
+        """启动合成命令，文本从标准输入传入（不需要任何转义）"""
+        return subprocess.run(args, input=text.encode("utf-8"), stderr=subprocess.DEVNULL, **kwargs)
+    
+    def _audio_player(self):
+        """进程内合成时用于发声的播放器（首次调用时创建，没有 pyaudio 时为 None）"""
+        if self._player is None:
+            from .audio_io import PYAUDIO_AVAILABLE, get_audio_player
+            self._player = get_audio_player() if PYAUDIO_AVAILABLE else False
+        return self._player or None
     
     def speak(self, text: str) -> None:
-        """使用系统命令播放语音"""
+        """播放语音"""
         print(f"🔊 播放: {text}")
         
-        # 转义特殊字符
-        text = text.replace("'", "\\'").replace('"', '\\"')
-        
-        if self.system == "Darwin":
-            os.system(f'{self.command} "{text}"')
+        if self.library is not None and self._audio_player() is not None:
+            self._audio_player().play_pcm(self.library.synthesize(text, self.voice, self.rate))
+        elif self.command == "say":
+            self._run([self.command, *self._options(), "-f", "-"], text)
+        elif self.espeak:
+            self._run([self.command, *self._options()], text)
         else:
-            os.system(f'echo "{text}" | {self.command}')
+            self._run([self.command, "--tts"], text)
     
     def save_to_file(self, text: str, filename: str) -> None:
         """保存语音到文件"""
-        text = text.replace("'", "\\'").replace('"', '\\"')
-        
-        if self.system == "Darwin":
-            os.system(f'{self.command} -o "{filename}" "{text}"')
+        if self.command == "say":
+            self._run([self.command, *self._options(), "-o", filename, "--data-format=LEI16@22050", "-f", "-"],
+                      text, check=True)
+        elif self.espeak:
+            with open(filename, 'wb') as f:
+                f.write(self.text_to_wav(text))
         else:
-            # espeak 示例
-            if "espeak" in self.command:
-                os.system(f'{self.command} -w "{filename}" "{text}"')
-            else:
-                # festival 不直接支持保存到文件，使用 arecord
-                raise NotImplementedError("Festival 不支持直接保存到文件")
+            # festival 不直接支持保存到文件
+            raise NotImplementedError("Festival 不支持直接保存到文件")
     
     def text_to_wav(self, text: str) -> bytes:
         """将文本转换为 WAV 字节流"""
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        
-        self.save_to_file(text, tmp_path)
-        
-        with open(tmp_path, 'rb') as f:
-            wav_bytes = f.read()
-        
-        os.unlink(tmp_path)
-        return wav_bytes
+        if self.espeak and self.library is None:
+            return self._espeak_wav(text)
+        return self.text_to_pcm(text).to_wav_bytes()
+    
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        """将文本转换为内存中的 PCM"""
+        if self.library is not None:
+            return self.library.synthesize(text, self.voice, self.rate)
+        if self.espeak:
+            return PCMBuffer.from_wav_bytes(self._espeak_wav(text))
+        if self.command == "say":
+            self.save_to_file(text, self._scratch.get())
+            return self._scratch.read_pcm()
+        raise NotImplementedError("Festival 不支持直接保存到文件")
+    
+    def cache_identity(self) -> str:
+        """合成命令（或进程内 espeak）、语音与语速"""
+        backend = "libespeak" if self.library is not None else self.command
+        return f"system:{backend}:{self.voice}:{self.rate}"
+    
+    def _espeak_wav(self, text: str) -> bytes:
+        """espeak 命令直接把 WAV 写到标准输出，不经过临时文件"""
+        return self._run([self.command, *self._options(), "--stdout"], text,
+                         stdout=subprocess.PIPE, check=True).stdout
+    
+    def __del__(self):
+        """清理资源"""
+        if hasattr(self, '_scratch'):
+            self._scratch.remove()
 
 
-def get_tts_engine(engine: str = "auto", **kwargs) -> TTSBase:
+def get_tts_engine(engine: str = "auto", cache_size: int = 0, cache_dir: Optional[str] = None,
+                   prewarm: Sequence[str] = (), **kwargs) -> TTSBase:
     """
     获取 TTS 引擎实例
     
     Args:
         engine: 引擎类型 (auto, pyttsx3, system, mock)
+        cache_size: 大于 0 时启用短语缓存，内存中最多保留的句数
+        cache_dir: 短语缓存的磁盘目录（需要 diskcache），重启后仍可命中
+        prewarm: 启用缓存时在后台提前合成的固定提示语
         **kwargs: 引擎配置参数
         
     Returns:
@@ -188,17 +312,25 @@ def get_tts_engine(engine: str = "auto", **kwargs) -> TTSBase:
     if engine == "auto":
         # 自动选择可用的引擎
         if PYTTSX3_AVAILABLE:
-            return Pyttsx3TTS(**kwargs)
+            tts = Pyttsx3TTS(**kwargs)
         else:
             try:
-                return SystemTTS()
+                tts = SystemTTS()
             except:
-                return MockTTS()
+                tts = MockTTS()
     elif engine == "pyttsx3":
-        return Pyttsx3TTS(**kwargs)
+        tts = Pyttsx3TTS(**kwargs)
     elif engine == "system":
-        return SystemTTS()
+        tts = SystemTTS(**kwargs)
     elif engine == "mock":
-        return MockTTS()
+        tts = MockTTS()
     else:
         raise ValueError(f"不支持的 TTS 引擎: {engine}")
+    
+    if cache_size > 0 or cache_dir:
+        from .cache import TwoLevelCache
+        from .tts_cache import CachedTTS
+        tts = CachedTTS(tts, TwoLevelCache(max_entries=cache_size or 128, directory=cache_dir, name="TTS 缓存"))
+        if prewarm:
+            tts.prewarm(prewarm)
+    return tts
@@ -0,0 +1,164 @@
+"""
+TTS 短语缓存模块
+按规范化文本与引擎配置（引擎、语音、语速）缓存合成的 PCM：欢迎语、告别语等固定提示语启动时提前合成并常驻，
+重复出现的句子直接播放，不再重新合成
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional
+
+from .cache import TwoLevelCache
+from .pcm import PCMBuffer
+from .speaker import PipelinedSpeaker, split_sentences
+from .tts import TTSBase
+
+
+def normalize_phrase(text: str) -> str:
+    """合并空白（标点影响语调，保留）"""
+    return " ".join(text.split())
+
+
+def phrase_key(text: str, identity: str) -> str:
+    """
+    计算缓存键
+
+    Args:
+        text: 规范化后的文本
+        identity: 引擎配置（TTSBase.cache_identity）
+
+    Returns:
+        十六进制 SHA-256 摘要
+    """
+    return hashlib.sha256(f"{identity}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedTTS(TTSBase):
+    """带短语缓存的 TTS 包装器"""
+
+    def __init__(self, engine: TTSBase, cache: Optional[TwoLevelCache] = None, player=None,
+                 max_phrase_chars: int = 80):
+        """
+        初始化缓存包装器
+
+        Args:
+            engine: 实际执行合成的引擎
+            cache: 两级缓存（内存 LRU + 可选磁盘），None 时新建一个只用内存的缓存
+            player: 支持 play_stream 的播放器；设置后 speak() 逐句播放缓存的 PCM，否则交给引擎自行发声
+            max_phrase_chars: 超过该长度的文本不缓存（长句很少重复）
+        """
+        self.engine = engine
+        self.cache = cache or TwoLevelCache(max_entries=128, name="TTS 缓存")
+        self.player = player
+        self.max_phrase_chars = max_phrase_chars
+        self.identity = engine.cache_identity()
+
+        # 预热的提示语常驻内存，不参与 LRU 淘汰（预热线程写入，播放线程读取）
+        self._pinned: Dict[str, PCMBuffer] = {}
+        self._pinned_hits = 0
+        self._pinned_lock = threading.Lock()
+        self._pcm_supported = True
+        self._synth_lock = threading.Lock()
+        self._speaker: Optional[PipelinedSpeaker] = None
+
+    def text_to_pcm(self, text: str) -> PCMBuffer:
+        """将文本转换为 PCM，相同短语直接返回缓存的结果"""
+        phrase = normalize_phrase(text)
+        if len(phrase) > self.max_phrase_chars:
+            return self._synthesize(phrase)
+        key = phrase_key(phrase, self.identity)
+        with self._pinned_lock:
+            pcm = self._pinned.get(key)
+            if pcm is not None:
+                self._pinned_hits += 1
+                return pcm
+        pcm = self.cache.get(key)
+        if pcm is None:
+            pcm = self._synthesize(phrase)
+            self.cache.put(key, pcm)
+        return pcm
+
+    def _synthesize(self, text: str) -> PCMBuffer:
+        # 预热线程与播放线程可能同时合成，多数引擎不支持并发调用
+        with self._synth_lock:
+            return self.engine.text_to_pcm(text)
+
+    def text_to_wav(self, text: str) -> bytes:
+        """将文本转换为 WAV 字节流"""
+        return self.text_to_pcm(text).to_wav_bytes()
+
+    def save_to_file(self, text: str, filename: str) -> None:
+        """保存语音到文件"""
+        with open(filename, 'wb') as f:
+            f.write(self.text_to_wav(text))
+
+    def speak(self, text: str) -> None:
+        """有播放器时逐句播放（缓存命中的句子没有合成延迟），否则交给引擎"""
+        if self.player is None or not self._pcm_supported:
+            self.engine.speak(text)
+            return
+        print(f"🔊 播放: {text}")
+        if self._speaker is None:
+            self._speaker = PipelinedSpeaker(self, self.player)
+        try:
+            self._speaker.speak(text)
+        except NotImplementedError:
+            # 引擎只能自行发声（如 festival）
+            self._pcm_supported = False
+            self.engine.speak(text)
+
+    def prewarm(self, phrases: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """
+        提前合成固定提示语并常驻内存（整句以及逐句播放时切分出的各句）
+
+        Args:
+            phrases: 提示语列表
+            background: 是否在后台线程合成（不阻塞启动）
+
+        Returns:
+            后台线程；同步合成时为 None
+        """
+        targets = []
+        for phrase in phrases:
+            for piece in [normalize_phrase(phrase)] + split_sentences(phrase):
+                if piece and piece not in targets:
+                    targets.append(piece)
+
+        def run() -> None:
+            for phrase in targets:
+                key = phrase_key(phrase, self.identity)
+                with self._pinned_lock:
+                    if key in self._pinned:
+                        continue
+                pcm = self.cache.get(key)
+                try:
+                    if pcm is None:
+                        pcm = self._synthesize(phrase)
+                        self.cache.put(key, pcm)
+                except NotImplementedError:
+                    self._pcm_supported = False
+                    return
+                except Exception as e:
+                    print(f"⚠️ 提示语预合成失败: {e}")
+                    return
+                with self._pinned_lock:
+                    self._pinned[key] = pcm
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def cache_identity(self) -> str:
+        """与被包装的引擎相同"""
+        return self.identity
+
+    def get_stats(self) -> dict:
+        """返回缓存命中统计（包含预热提示语的命中）"""
+        stats = self.cache.get_stats()
+        with self._pinned_lock:
+            stats["pinned"] = len(self._pinned)
+            stats["pinned_hits"] = self._pinned_hits
+        return stats
@@ -0,0 +1,169 @@
+"""
+音频帧分析与语音活动检测(VAD)
+使用 NumPy 对整段缓冲区向量化计算 RMS、峰值和过零率，并提供可插拔的 VAD 接口
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+# webrtcvad 是可选依赖
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+
+class FrameFeatures:
+    """一组等长音频帧的特征，每个属性都是按帧排列的数组"""
+
+    __slots__ = ("rms", "peak", "zcr")
+
+    def __init__(self, rms: np.ndarray, peak: np.ndarray, zcr: np.ndarray):
+        self.rms = rms
+        self.peak = peak
+        self.zcr = zcr
+
+    def __len__(self) -> int:
+        return len(self.rms)
+
+
+def frame_features(samples: np.ndarray, frame_size: Optional[int] = None) -> FrameFeatures:
+    """
+    向量化计算音频帧特征
+
+    Args:
+        samples: int16 或 float 采样数组
+        frame_size: 每帧采样点数，默认把整个数组视为一帧；末尾不足一帧的部分被忽略
+
+    Returns:
+        RMS、峰值（与输入同一量纲）和过零率（0-1）
+    """
+    samples = np.asarray(samples)
+    if frame_size is None or frame_size > len(samples):
+        frame_size = len(samples)
+    count = len(samples) // frame_size if frame_size else 0
+    if count == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return FrameFeatures(empty, empty, empty)
+
+    frames = samples[:count * frame_size].reshape(count, frame_size).astype(np.float32)
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+    peak = np.abs(frames).max(axis=1)
+    if frame_size > 1:
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_size - 1)
+    else:
+        zcr = np.zeros(count)
+    return FrameFeatures(rms, peak, zcr.astype(np.float32))
+
+
+def frame_rms(frame: np.ndarray) -> float:
+    """计算单帧的 RMS 能量"""
+    frame = np.asarray(frame, dtype=np.float32)
+    if len(frame) == 0:
+        return 0.0
+    return float(np.sqrt(np.dot(frame, frame) / len(frame)))
+
+
+class VADBase(ABC):
+    """语音活动检测基类"""
+
+    @abstractmethod
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """判断单帧是否包含语音"""
+        pass
+
+    def speech_mask(self, samples: np.ndarray, frame_size: int) -> np.ndarray:
+        """
+        对整段缓冲区逐帧判断是否为语音
+
+        Args:
+            samples: int16 采样数组
+            frame_size: 每帧采样点数
+
+        Returns:
+            布尔数组，每帧一个值
+        """
+        count = len(samples) // frame_size
+        return np.array(
+            [self.is_speech(samples[i * frame_size:(i + 1) * frame_size]) for i in range(count)],
+            dtype=bool
+        )
+
+    def reset(self) -> None:
+        """重置内部状态（新一轮录音前调用）"""
+        pass
+
+
+class EnergyVAD(VADBase):
+    """基于 RMS 能量（可选过零率约束）的 VAD"""
+
+    def __init__(self, threshold: float = 500.0, max_zcr: Optional[float] = None):
+        """
+        初始化能量 VAD
+
+        Args:
+            threshold: RMS 阈值（int16 量纲）
+            max_zcr: 过零率上限，超过时视为嘶声等噪声（可选）
+        """
+        self.threshold = threshold
+        self.max_zcr = max_zcr
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """判断单帧是否包含语音"""
+        return bool(self.speech_mask(frame, len(frame))[0]) if len(frame) else False
+
+    def speech_mask(self, samples: np.ndarray, frame_size: int) -> np.ndarray:
+        """对整段缓冲区逐帧判断是否为语音（向量化）"""
+        features = frame_features(samples, frame_size)
+        mask = features.rms >= self.threshold
+        if self.max_zcr is not None:
+            mask &= features.zcr <= self.max_zcr
+        return mask
+
+
+class WebRTCVAD(VADBase):
+    """使用 webrtcvad 的 VAD，要求 10/20/30 毫秒的 16 位单声道帧"""
+
+    def __init__(self, rate: int = 16000, aggressiveness: int = 2):
+        """
+        初始化 WebRTC VAD
+
+        Args:
+            rate: 采样率 (8000, 16000, 32000, 48000)
+            aggressiveness: 激进程度 (0-3)，越大越容易判为非语音
+        """
+        if not WEBRTCVAD_AVAILABLE:
+            raise ImportError(
+                "WebRTC VAD 需要 webrtcvad。\n"
+                "请运行: pip install webrtcvad"
+            )
+
+        self.rate = rate
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """判断单帧是否包含语音"""
+        return self.vad.is_speech(np.asarray(frame, dtype=np.int16).tobytes(), self.rate)
+
+
+def get_vad(engine: str = "energy", **kwargs) -> VADBase:
+    """
+    获取 VAD 实例
+
+    Args:
+        engine: VAD 类型 (energy, webrtc)
+        **kwargs: VAD 配置参数
+
+    Returns:
+        VAD 实例
+    """
+    if engine == "energy":
+        return EnergyVAD(**kwargs)
+    elif engine == "webrtc":
+        return WebRTCVAD(**kwargs)
+    else:
+        raise ValueError(f"不支持的 VAD 引擎: {engine}")
@@ -0,0 +1,267 @@
+"""
+虚拟音频设备模块
+以 WAV 文件、目录或 NumPy 数组代替麦克风，以内存捕获代替扬声器，
+用于在没有声卡的服务器上跑通完整语音链路并做延迟压测
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from .audio_io import BaseRecorder
+from .pcm import PCMBuffer
+from .playback import JitterBuffer, OutputMeter, PCMChunk
+from .vad import VADBase
+
+AudioSource = Union[str, np.ndarray, PCMBuffer, list, tuple]
+
+
+def load_clips(source: AudioSource, rate: int) -> List[PCMBuffer]:
+    """
+    把音频来源展开为一组单声道 PCM 片段
+
+    Args:
+        source: WAV 文件路径、包含 WAV 的目录、NumPy 数组（int16 或 [-1, 1] 浮点）、
+            PCMBuffer，或由它们组成的列表
+        rate: 目标采样率（数组按该采样率解释，文件会被重采样）
+
+    Returns:
+        PCM 片段列表
+    """
+    if isinstance(source, (list, tuple)):
+        clips = []
+        for item in source:
+            clips.extend(load_clips(item, rate))
+        return clips
+
+    if isinstance(source, PCMBuffer):
+        pcm = source
+    elif isinstance(source, np.ndarray):
+        if np.issubdtype(source.dtype, np.floating):
+            pcm = PCMBuffer.from_float(source, rate)
+        else:
+            pcm = PCMBuffer(source, rate)
+    elif isinstance(source, str) and os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(".wav"))
+        if not names:
+            raise FileNotFoundError(f"目录中没有 WAV 文件: {source}")
+        return [load_clips(os.path.join(source, n), rate)[0] for n in names]
+    elif isinstance(source, str):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"音频文件不存在: {source}")
+        pcm = PCMBuffer.from_wav_file(source)
+    else:
+        raise TypeError(f"不支持的音频来源类型: {type(source).__name__}")
+
+    return [pcm.to_mono().resample(rate)]
+
+
+class _ClipSubscription:
+    """按帧回放一个片段的订阅对象，接口与实时帧订阅一致"""
+
+    def __init__(self, samples: np.ndarray, frame_size: int, rate: int, realtime: bool):
+        self._samples = samples
+        self._frame_size = frame_size
+        self._rate = rate
+        self._realtime = realtime
+        self._offset = 0
+        self._started_at = time.monotonic()
+        self.dropped = 0
+        self.closed = False
+
+    def get(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """返回下一帧；片段播完后返回 None"""
+        if self.closed or self._offset >= len(self._samples):
+            return None
+
+        frame = self._samples[self._offset:self._offset + self._frame_size]
+        self._offset += len(frame)
+        if self._realtime:
+            # 按真实时间节奏出帧，模拟麦克风
+            due = self._started_at + self._offset / float(self._rate)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return frame
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self) -> None:
+        """结束回放"""
+        self.closed = True
+
+
+class VirtualAudioRecorder(BaseRecorder):
+    """由文件或数组驱动的虚拟录音器，每次录音依次回放下一个片段"""
+
+    def __init__(
+        self,
+        source: AudioSource,
+        rate: int = 16000,
+        frame_ms: float = 20.0,
+        realtime: bool = True,
+        loop: bool = True,
+        lead_silence: float = 0.3,
+        tail_silence: float = 1.5,
+        vad: Optional[VADBase] = None
+    ):
+        """
+        初始化虚拟录音器
+
+        Args:
+            source: 音频来源（见 load_clips）
+            rate: 采样率
+            frame_ms: 每帧时长（毫秒）
+            realtime: 是否按真实时间节奏出帧（False 时尽快回放）
+            loop: 片段用完后是否从头循环
+            lead_silence: 每个片段前补的静音（秒），供端点检测校准噪声底
+            tail_silence: 每个片段后补的静音（秒），让端点检测能够结束
+            vad: 语音活动检测器（可选）
+        """
+        super().__init__(rate, 1, max(1, int(rate * frame_ms / 1000)), vad)
+        self.clips = load_clips(source, rate)
+        if not self.clips:
+            raise ValueError("虚拟录音器至少需要一个音频片段")
+        self.realtime = realtime
+        self.loop = loop
+        self.lead = np.zeros(int(rate * lead_silence), dtype=np.int16)
+        self.tail = np.zeros(int(rate * tail_silence), dtype=np.int16)
+        self._index = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """尚未回放的片段数（循环模式下不会耗尽）"""
+        return max(0, len(self.clips) - self._index)
+
+    def _next_clip(self) -> Optional[PCMBuffer]:
+        with self._lock:
+            if self._index >= len(self.clips):
+                if not self.loop:
+                    return None
+                self._index = 0
+            clip = self.clips[self._index]
+            self._index += 1
+            return clip
+
+    @contextmanager
+    def listen(self, preroll_ms: float = 0.0) -> Iterator[_ClipSubscription]:
+        """回放下一个片段（前后补静音）；片段耗尽时产出空订阅"""
+        clip = self._next_clip()
+        samples = np.zeros(0, dtype=np.int16)
+        if clip is not None:
+            samples = np.concatenate((self.lead, clip.samples, self.tail))
+        subscription = _ClipSubscription(samples, self.chunk, self.rate, self.realtime)
+        try:
+            yield subscription
+        finally:
+            subscription.close()
+
+
+class VirtualAudioPlayer:
+    """把播放内容捕获到内存的虚拟播放器"""
+
+    def __init__(self, realtime: bool = False, capture: bool = True):
+        """
+        初始化虚拟播放器
+
+        Args:
+            realtime: 是否按音频时长阻塞，模拟真实播放耗时
+            capture: 是否保存播放过的音频
+        """
+        self.realtime = realtime
+        self.capture = capture
+        self.captured: List[PCMBuffer] = []
+        self.played_seconds = 0.0
+        self._active: Optional[JitterBuffer] = None
+        self.meter = OutputMeter()
+
+    def play_wav(self, wav_path: str) -> None:
+        """播放 WAV 文件"""
+        self.play_pcm(PCMBuffer.from_wav_file(wav_path))
+
+    def play_bytes(self, wav_bytes: bytes) -> None:
+        """播放 WAV 字节流"""
+        self.play_pcm(PCMBuffer.from_wav_bytes(wav_bytes))
+
+    def play_pcm(self, pcm: PCMBuffer) -> None:
+        """播放内存中的 PCM"""
+        self.play_stream([pcm], channels=pcm.channels, prebuffer_ms=0.0)
+
+    def play_stream(
+        self,
+        chunks: Iterable[PCMChunk],
+        rate: Optional[int] = None,
+        channels: int = 1,
+        prebuffer_ms: float = 120.0
+    ) -> None:
+        """边到达边播放音频块，经过与真实播放器相同的抖动缓冲"""
+        buffer = JitterBuffer(chunks, rate=rate, channels=channels, prebuffer_ms=prebuffer_ms)
+        self._active = buffer
+        buffer.start()
+        blocks = []
+        try:
+            stream_rate = buffer.wait_format()
+            if stream_rate is None:
+                return
+            started = time.monotonic()
+            played = 0.0
+            for block in buffer.blocks(1024):
+                blocks.append(block)
+                self.meter.update(block)
+                duration = len(block) / float(channels * stream_rate)
+                self.played_seconds += duration
+                if self.realtime:
+                    played += duration
+                    delay = started + played - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            buffer.stop()
+            self._active = None
+            if self.capture and blocks:
+                self.captured.append(PCMBuffer.from_frames(blocks, buffer.rate, channels))
+
+    @property
+    def playing(self) -> bool:
+        """是否正在播放"""
+        return self._active is not None
+
+    def stop(self) -> None:
+        """立即中止当前播放"""
+        buffer = self._active
+        if buffer is not None:
+            buffer.stop()
+
+    def captured_pcm(self, rate: Optional[int] = None) -> PCMBuffer:
+        """
+        返回捕获到的全部音频（拼接为一段单声道 PCM）
+
+        Args:
+            rate: 目标采样率，默认使用第一段音频的采样率
+        """
+        if not self.captured:
+            return PCMBuffer.empty(rate or 16000)
+        rate = rate or self.captured[0].rate
+        return PCMBuffer.from_frames(
+            [pcm.to_mono().resample(rate).samples for pcm in self.captured], rate
+        )
+
+    def save(self, wav_path: str) -> None:
+        """把捕获的音频保存为 WAV 文件"""
+        with open(wav_path, 'wb') as f:
+            f.write(self.captured_pcm().to_wav_bytes())
+
+    def clear(self) -> None:
+        """清空捕获内容"""
+        self.captured = []
+        self.played_seconds = 0.0
@@ -3,11 +3,27 @@
 管理语音交互的完整流程
 """
 
+import threading
 import time
+from collections import deque
 from typing import Optional, Callable, Any
-from .stt import STTBase
+from .stt import STTBase, Transcript
 from .tts import TTSBase
 from .audio_io import AudioRecorder, AudioPlayer
+from .barge_in import BargeInDetector
+from .speech_gate import SpeechGate
+from .speaker import PipelinedSpeaker
+from .tts_cache import CachedTTS
+from .pcm import PCMBuffer
+
+# 插话判定前保留的麦克风音频（毫秒），作为用户语音的开头
+_BARGE_IN_HISTORY_MS = 600.0
+
+# 固定提示语（启用 TTS 短语缓存时可在启动时提前合成）
+WELCOME_TEXT = "你好！我是你的智能助手，有什么可以帮助你的吗？"
+FAREWELL_TEXT = "好的，再见！"
+NOT_HEARD_TEXT = "抱歉，我没有听清楚"
+SYSTEM_PROMPTS = (WELCOME_TEXT, FAREWELL_TEXT, NOT_HEARD_TEXT)
 
 
 class VoiceSession:
@@ -19,7 +35,15 @@ class VoiceSession:
         tts: TTSBase,
         recorder: AudioRecorder,
         player: AudioPlayer,
-        process_message: Callable[[str], str]
+        process_message: Callable[[str], str],
+        endpointing: bool = True,
+        tts_via_player: bool = False,
+        barge_in: bool = False,
+        barge_in_detector: Optional[BargeInDetector] = None,
+        streaming_stt: bool = False,
+        speech_gating: bool = True,
+        speech_gate: Optional[SpeechGate] = None,
+        pipelined_tts: bool = True
     ):
         """
         初始化语音会话
@@ -30,13 +54,197 @@ class VoiceSession:
             recorder: 录音器
             player: 播放器
             process_message: 处理消息的回调函数
+            endpointing: 是否使用端点检测录音（否则固定录音 5 秒）
+            tts_via_player: 不逐句播放时是否把整段合成的 PCM 交给播放器播放（否则由 TTS 引擎自行发声）
+            barge_in: 是否启用全双工插话：播放回复时持续监听，用户开口即停止播放并进入下一轮
+                （需要支持 listen() 的录音器和带输出电平表的播放器，启用后总是经播放器发声）
+            barge_in_detector: 自定义插话检测器（可选）
+            streaming_stt: 是否边录音边转录（用户停止说话时文本基本已就绪，只在端点检测模式下生效）
+            speech_gating: 是否在调用智能体前拒绝噪声上的识别结果（低置信度、无语音、常见幻觉文本）；
+                流式转录不提供置信度，只按幻觉文本过滤
+            speech_gate: 自定义门控（可选）
+            pipelined_tts: 播放器支持 play_stream 时是否逐句合成并经播放器发声：合成下一句的同时播放当前句，
+                插话时同时停止后续合成；没有这样的播放器或引擎不能输出 PCM 时按 tts_via_player 处理
         """
         self.stt = stt
         self.tts = tts
         self.recorder = recorder
         self.player = player
         self.process_message = process_message
+        self.endpointing = endpointing
+        self.tts_via_player = tts_via_player
+        self.barge_in = (barge_in and hasattr(recorder, 'listen')
+                         and hasattr(player, 'meter') and hasattr(player, 'stop'))
+        if barge_in and not self.barge_in:
+            print("⚠️ 当前录音器/播放器不支持插话，已关闭插话模式")
+        self.barge_in_detector = barge_in_detector or BargeInDetector(
+            rate=getattr(recorder, 'rate', 16000)
+        )
+        self.streaming_stt = streaming_stt and hasattr(stt, 'start_stream')
+        self.speech_gate = (speech_gate or SpeechGate()) if speech_gating else None
+        self.speaker = (PipelinedSpeaker(tts, player)
+                        if pipelined_tts and hasattr(player, 'play_stream') else None)
+        # 带短语缓存的 TTS 经播放器播放缓存的 PCM，否则命中缓存也要由引擎重新发声
+        if isinstance(tts, CachedTTS) and tts.player is None and hasattr(player, 'play_stream'):
+            tts.player = player
+        self.barge_ins = 0
+        self.pending_pcm: Optional[PCMBuffer] = None
         self.running = False
+        self.last_timings: dict = {}
+    
+    def _speak(self, text: str) -> Optional[PCMBuffer]:
+        """
+        播放语音回复
+        
+        Returns:
+            插话模式下用户打断播放时录到的语音，否则为 None
+        """
+        if self.barge_in:
+            return self._speak_interruptible(text)
+        if self.speaker is not None:
+            try:
+                print(f"🔊 播放: {text}")
+                self.speaker.speak(text)
+                return None
+            except NotImplementedError:
+                # 引擎只能自行发声（如 festival），以后不再逐句合成
+                self.speaker = None
+        if self.tts_via_player:
+            print(f"🔊 播放: {text}")
+            self.player.play_pcm(self.tts.text_to_pcm(text))
+        else:
+            self.tts.speak(text)
+        return None
+    
+    def _speak_interruptible(self, text: str) -> Optional[PCMBuffer]:
+        """边播放边监听麦克风，检测到插话时立即停止播放并录完用户这句话"""
+        print(f"🔊 播放: {text}")
+        speaker = self.speaker
+        reply = self.tts.text_to_pcm(text) if speaker is None else None
+        
+        finished = threading.Event()
+        errors = []
+        
+        def play():
+            try:
+                if speaker is not None:
+                    speaker.speak(text)
+                else:
+                    self.player.play_pcm(reply)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                finished.set()
+        
+        detector = self.barge_in_detector
+        detector.reset()
+        history = deque()
+        history_samples = 0
+        history_limit = int(self.recorder.rate * _BARGE_IN_HISTORY_MS / 1000)
+        
+        player_thread = threading.Thread(target=play, daemon=True)
+        with self.recorder.listen() as subscription:
+            player_thread.start()
+            while not finished.is_set():
+                frame = subscription.get(timeout=0.1)
+                if frame is None:
+                    # 没有新帧（超时或虚拟音源已耗尽），只等待播放结束
+                    finished.wait(0.02)
+                    continue
+                
+                history.append(frame)
+                history_samples += len(frame)
+                while history_samples - len(history[0]) >= history_limit:
+                    history_samples -= len(history.popleft())
+                
+                if detector.process(frame, self.player.meter.level()):
+                    if speaker is not None:
+                        speaker.cancel()
+                    else:
+                        self.player.stop()
+                    player_thread.join()
+                    self.barge_ins += 1
+                    print("✋ 检测到插话，已停止播放")
+                    return self.recorder.continue_utterance(subscription, history)
+        
+        player_thread.join()
+        if errors:
+            raise errors[0]
+        return None
+    
+    def _record(self, duration: Optional[float] = None,
+                on_speech_frame: Optional[Callable[[Any], None]] = None) -> PCMBuffer:
+        """
+        录制一轮用户语音
+        
+        Args:
+            duration: 固定录音时长；为 None 时使用端点检测
+            on_speech_frame: 端点检测模式下每个语音帧的回调（流式转录）
+            
+        Returns:
+            PCM 缓冲区；未检测到语音时为空
+        """
+        if duration is not None or not self.endpointing:
+            return self.recorder.record_pcm(duration=duration or 5.0)
+        
+        pcm = self.recorder.record_utterance_pcm(on_speech_frame=on_speech_frame)
+        stats = self.recorder.last_stats
+        if stats is not None and stats.reason:
+            print(
+                f"⏱️  语音 {stats.speech_ms / 1000:.2f}秒, "
+                f"录音 {stats.captured_ms / 1000:.2f}秒, "
+                f"端点延迟 {stats.endpoint_delay_ms:.0f}毫秒"
+            )
+        return pcm
+    
+    def _show_partial(self, update) -> None:
+        """打印流式识别的中间结果"""
+        if update.partial:
+            print(f"   📝 {update.committed}[{update.partial}]")
+    
+    def _listen(self, duration: Optional[float] = None, timings: Optional[dict] = None,
+                wait_for_enter: bool = False) -> str:
+        """
+        录制并转录一轮用户语音；上一句回复被打断时直接使用打断时录到的语音
+        
+        Args:
+            duration: 固定录音时长；为 None 时使用端点检测
+            timings: 记录 record_ms / stt_ms 的字典（可选）
+            wait_for_enter: 录音前是否等待用户按 Enter
+            
+        Returns:
+            识别的文本；未检测到语音时为空字符串
+        """
+        timings = {} if timings is None else timings
+        
+        started = time.perf_counter()
+        pcm, self.pending_pcm = self.pending_pcm, None
+        stream = None
+        if pcm is None:
+            if wait_for_enter:
+                input("按 Enter 开始说话...")
+                started = time.perf_counter()
+            if self.streaming_stt and self.endpointing and duration is None:
+                stream = self.stt.start_stream(
+                    rate=getattr(self.recorder, 'rate', 16000), on_update=self._show_partial
+                )
+            pcm = self._record(duration, on_speech_frame=stream.feed if stream else None)
+        timings["record_ms"] = (time.perf_counter() - started) * 1000
+        
+        # 流式转录在录音期间已完成大部分解码，这里只等待最后一次
+        started = time.perf_counter()
+        if stream is not None:
+            transcript = Transcript(stream.finish())
+        else:
+            transcript = self.stt.transcribe_detailed(pcm) if pcm else Transcript("")
+        timings["stt_ms"] = (time.perf_counter() - started) * 1000
+        
+        # 噪声上的幻觉文本会触发整轮智能体调用，在这里拦下
+        if transcript.text.strip() and self.speech_gate is not None and not self.speech_gate.check(transcript):
+            print(f"🔇 忽略疑似噪声的识别结果: {transcript.text!r}")
+            timings["rejected"] = 1.0
+            return ""
+        return transcript.text
     
     def start_conversation(self) -> None:
         """开始对话循环"""
@@ -47,18 +255,17 @@ class VoiceSession:
         
         self.running = True
         
-        # 欢迎语
-        welcome_text = "你好！我是你的智能助手，有什么可以帮助你的吗？"
-        self.tts.speak(welcome_text)
+        # 插话模式下保持常驻采集，播放与录音之间不丢帧
+        if self.barge_in and hasattr(self.recorder, 'start_capture'):
+            self.recorder.start_capture()
         
         try:
+            # 欢迎语
+            self.pending_pcm = self._speak(WELCOME_TEXT)
+            
             while self.running:
-                # 录音
-                input("按 Enter 开始说话...")
-                audio_bytes = self.recorder.record(duration=5.0)
-                
-                # 转文字
-                user_text = self.stt.transcribe_bytes(audio_bytes)
+                # 录音并转文字（用户打断了上一句回复时不需要按 Enter）
+                user_text = self._listen(wait_for_enter=self.pending_pcm is None)
                 
                 if not user_text or user_text.strip() == "":
                     print("❓ 没有检测到语音，请重试")
@@ -68,9 +275,8 @@ class VoiceSession:
                 
                 # 检查退出命令
                 if any(word in user_text for word in ["退出", "再见", "拜拜"]):
-                    farewell = "好的，再见！"
-                    print(f"🤖 助手: {farewell}")
-                    self.tts.speak(farewell)
+                    print(f"🤖 助手: {FAREWELL_TEXT}")
+                    self._speak(FAREWELL_TEXT)
                     break
                 
                 # 处理消息
@@ -80,37 +286,46 @@ class VoiceSession:
                 print(f"🤖 助手: {response}")
                 
                 # 语音回复
-                self.tts.speak(response)
+                self.pending_pcm = self._speak(response)
                 
         except KeyboardInterrupt:
             print("\n\n👋 对话已结束")
         finally:
             self.running = False
+            if self.barge_in and hasattr(self.recorder, 'stop_capture'):
+                self.recorder.stop_capture()
     
-    def single_interaction(self, duration: float = 5.0) -> tuple[str, str]:
+    def single_interaction(self, duration: Optional[float] = None) -> tuple[str, str]:
         """
         单次交互
         
         Args:
-            duration: 录音时长
+            duration: 固定录音时长（可选，默认使用端点检测）
             
         Returns:
-            (用户输入, 系统回复) 元组
+            (用户输入, 系统回复) 元组；各阶段耗时（毫秒）记录在 last_timings 中。
+            插话模式下用户打断回复时，打断的语音保存在 pending_pcm 中，供下一次交互使用
         """
-        # 录音
-        audio_bytes = self.recorder.record(duration=duration)
+        timings = {}
+        self.last_timings = timings
         
-        # 转文字
-        user_text = self.stt.transcribe_bytes(audio_bytes)
+        # 录音并转文字
+        user_text = self._listen(duration, timings)
         
         if not user_text or user_text.strip() == "":
-            return "", "抱歉，我没有听清楚"
+            return "", NOT_HEARD_TEXT
         
         # 处理消息
+        started = time.perf_counter()
         response = self.process_message(user_text)
+        timings["agent_ms"] = (time.perf_counter() - started) * 1000
         
         # 语音回复
-        self.tts.speak(response)
+        started = time.perf_counter()
+        self.pending_pcm = self._speak(response)
+        timings["tts_ms"] = (time.perf_counter() - started) * 1000
+        if self.pending_pcm is not None:
+            timings["barge_in"] = 1.0
         
         return user_text, response
 
@@ -176,6 +391,15 @@ def create_voice_session(
         tts_engine: TTS 引擎类型
         process_message: 消息处理函数
         **kwargs: 其他配置参数
+            audio_source: 虚拟音频来源（WAV 文件、目录或数组），用于无声卡压测
+            realtime: 虚拟录音器是否按真实时间节奏出帧（默认 True）
+            virtual_player: 是否使用捕获输出的虚拟播放器
+            virtual_realtime: 虚拟播放器是否按音频时长阻塞（插话测试需要）
+            barge_in: 是否启用全双工插话
+            streaming_stt: 是否边录音边转录
+            speech_gating: 是否在调用智能体前拒绝噪声上的识别结果（默认 True）
+            pipelined_tts: 播放器支持流式播放时逐句流水线合成并经播放器发声（默认 True）
+            tts_cache_size: 大于 0 时启用 TTS 短语缓存，并在后台提前合成固定提示语
         
     Returns:
         配置好的语音会话实例
@@ -184,13 +408,25 @@ def create_voice_session(
     
     # 创建组件
     stt = get_stt_engine(stt_engine, **kwargs.get('stt_config', {}))
-    tts = get_tts_engine(tts_engine, **kwargs.get('tts_config', {}))
-    recorder = get_audio_recorder()
-    player = get_audio_player()
+    tts = get_tts_engine(tts_engine, cache_size=kwargs.get('tts_cache_size', 0), prewarm=SYSTEM_PROMPTS,
+                         **kwargs.get('tts_config', {}))
+    recorder = get_audio_recorder(
+        source=kwargs.get('audio_source'),
+        realtime=kwargs.get('realtime', True)
+    )
+    virtual_player = kwargs.get('virtual_player', False)
+    player = get_audio_player(virtual=virtual_player, realtime=kwargs.get('virtual_realtime', False))
     
     # 默认消息处理函数
     if process_message is None:
         def process_message(text: str) -> str:
             return f"你说了: {text}"
     
-    return VoiceSession(stt, tts, recorder, player, process_message)
+    return VoiceSession(
+        stt, tts, recorder, player, process_message,
+        tts_via_player=virtual_player,
+        barge_in=kwargs.get('barge_in', False),
+        streaming_stt=kwargs.get('streaming_stt', False),
+        speech_gating=kwargs.get('speech_gating', True),
+        pipelined_tts=kwargs.get('pipelined_tts', True)
+    )